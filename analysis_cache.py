@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Cached value: (analyzed_data, raw_llm_response)
+CachedAnalysis = Tuple[Dict[str, Any], str]
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so reformatted copies of a trace share a cache entry"""
+    return " ".join(text.split())
+
+
+def make_cache_key(thinking_text: str, prompt_version: str, model_name: str) -> str:
+    """Content address for an analysis: normalized text + prompt version + model"""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, normalize_text(thinking_text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache"""
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate
+        }
+
+
+class AnalysisCache:
+    """In-memory LRU layered over an optional SQLite store.
+
+    Entries expire after ``ttl_seconds`` (None keeps them forever). The memory
+    layer holds at most ``max_memory_entries``; the disk layer is trimmed to
+    ``max_disk_entries`` by evicting the least recently used rows. Any object
+    with the same ``get``/``set`` methods can be passed to ThinkingAnalyzer
+    instead.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 1024,
+                 max_disk_entries: int = 100_000, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS analysis_cache_accessed ON analysis_cache (accessed_at)"
+            )
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["AnalysisCache"]:
+        """Build the default cache from ANALYSIS_CACHE_* variables ('off' disables it)"""
+        path = os.getenv('ANALYSIS_CACHE_PATH', 'analysis_cache.sqlite3')
+        if path.lower() == 'off':
+            return None
+        ttl = os.getenv('ANALYSIS_CACHE_TTL_SECONDS')
+        return cls(
+            path=path or None,
+            max_memory_entries=int(os.getenv('ANALYSIS_CACHE_MEMORY_ENTRIES', 1024)),
+            max_disk_entries=int(os.getenv('ANALYSIS_CACHE_DISK_ENTRIES', 100_000)),
+            ttl_seconds=float(ttl) if ttl else None
+        )
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[CachedAnalysis]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return self._decode(value)
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._conn.execute(
+                            "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        self._remember(key, created_at, value)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return self._decode(value)
+                    self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, analyzed_data: Dict[str, Any], raw_response: str):
+        now = time.time()
+        value = json.dumps([analyzed_data, raw_response])
+        with self._lock:
+            self._remember(key, now, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)", (key, value, now, now)
+                )
+                self._writes_since_trim += 1
+                # Trimming costs a COUNT, so only do it every few hundred writes
+                if self._writes_since_trim >= 256:
+                    self._trim_disk()
+                self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM analysis_cache")
+                self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _remember(self, key: str, created_at: float, value: str):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _trim_disk(self):
+        self._writes_since_trim = 0
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.stats.expirations += cursor.rowcount
+        (count,) = self._conn.execute("SELECT count(*) FROM analysis_cache").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute("""
+                DELETE FROM analysis_cache WHERE key IN (
+                    SELECT key FROM analysis_cache ORDER BY accessed_at LIMIT ?
+                )
+            """, (excess,))
+            self.stats.evictions += excess
+
+    @staticmethod
+    def _decode(value: str) -> CachedAnalysis:
+        analyzed_data, raw_response = json.loads(value)
+        return analyzed_data, raw_response
+
+
+class PatternsCache:
+    """Caches the analyze_patterns aggregations against a graph version.
+
+    An entry is served while the version it was computed at is current and
+    it is younger than ``ttl_seconds``. The version is the one shared through
+    Neo4j, so writes from other processes invalidate it too; the TTL only
+    bounds staleness if a version bump is lost. One
+    caller recomputes on a miss while concurrent callers wait for its result.
+    Each result carries an ETag derived from its content.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self.not_modified = 0
+        self._entry: Optional[Tuple[str, float, Dict[str, Any], str]] = None
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "PatternsCache":
+        """Build the cache from PATTERNS_CACHE_TTL_SECONDS (default 300, empty for no TTL)"""
+        ttl = os.getenv('PATTERNS_CACHE_TTL_SECONDS', '300')
+        return cls(ttl_seconds=float(ttl) if ttl else None)
+
+    def get_or_compute(self, version: str,
+                       compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+        """Cached (result, etag) for ``version``, calling ``compute`` on a miss"""
+        cached = self._lookup(version)
+        if cached is not None:
+            return cached
+
+        with self._compute_lock:
+            # Another caller may have filled the entry while we waited
+            cached = self._lookup(version)
+            if cached is not None:
+                return cached
+
+            result = compute()
+            etag = hashlib.sha256(
+                json.dumps(result, sort_keys=True, default=str).encode('utf-8')
+            ).hexdigest()[:32]
+            with self._lock:
+                self.stats.misses += 1
+                self._entry = (version, time.time(), result, etag)
+            return result, etag
+
+    def record_not_modified(self):
+        """Count a conditional request answered with 304"""
+        with self._lock:
+            self.not_modified += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats.as_dict(), not_modified=self.not_modified)
+
+    def _lookup(self, version: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        with self._lock:
+            if self._entry is None:
+                return None
+            entry_version, created_at, result, etag = self._entry
+            if entry_version != version:
+                return None
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                self._entry = None
+                self.stats.expirations += 1
+                return None
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return result, etag
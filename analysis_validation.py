@@ -0,0 +1,336 @@
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jiter
+from jsonschema import Draft7Validator
+
+logger = logging.getLogger(__name__)
+
+THOUGHT_SCHEMA = {
+    "type": "object",
+    "required": ["content", "type", "entities", "tools_mentioned", "confidence"],
+    "properties": {
+        "content": {"type": "string", "minLength": 1},
+        "type": {"type": "string"},
+        "entities": {"type": "array", "items": {"type": "string"}},
+        "tools_mentioned": {"type": "array", "items": {"type": "string"}},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+    }
+}
+
+RELATIONSHIP_SCHEMA = {
+    "type": "object",
+    "required": ["source_thought", "target_thought", "relationship", "strength"],
+    "properties": {
+        "source_thought": {"type": "integer", "minimum": 0},
+        "target_thought": {"type": "integer", "minimum": 0},
+        "relationship": {"type": "string", "minLength": 1},
+        "strength": {"type": "number", "minimum": 0, "maximum": 1}
+    }
+}
+
+# The structure ANALYSIS_PROMPT asks for and KnowledgeGraphBuilder writes
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "required": ["thoughts", "relationships", "reasoning_strategy", "domain", "success_indicators"],
+    "properties": {
+        "thoughts": {"type": "array", "minItems": 1, "items": THOUGHT_SCHEMA},
+        "relationships": {"type": "array", "items": RELATIONSHIP_SCHEMA},
+        "reasoning_strategy": {"type": "string"},
+        "domain": {"type": "string"},
+        "success_indicators": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+_TYPES = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+}
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], bool]:
+    """Turn a schema into one predicate made of nested closures
+
+    Covers the keywords the analysis schemas use (type, required,
+    properties, items, minItems, minLength, minimum, maximum) and agrees
+    with jsonschema on them, at a fraction of the cost per call. Other
+    keywords raise ValueError so a schema change cannot silently go
+    unchecked.
+    """
+    Draft7Validator.check_schema(schema)
+    unsupported = set(schema) - {'type', 'required', 'properties', 'items',
+                                 'minItems', 'minLength', 'minimum', 'maximum'}
+    if unsupported:
+        raise ValueError(f"compile_schema does not support {', '.join(sorted(unsupported))}")
+
+    checks: List[Callable[[Any], bool]] = []
+    if 'type' in schema:
+        checks.append(_TYPES[schema['type']])
+    if 'required' in schema:
+        required = tuple(schema['required'])
+        checks.append(lambda value: not isinstance(value, dict) or all(key in value for key in required))
+    if 'properties' in schema:
+        properties = tuple((key, compile_schema(sub)) for key, sub in schema['properties'].items())
+        checks.append(lambda value: not isinstance(value, dict) or all(
+            key not in value or check(value[key]) for key, check in properties))
+    if 'items' in schema:
+        item = compile_schema(schema['items'])
+        checks.append(lambda value: not isinstance(value, list) or all(item(element) for element in value))
+    if 'minItems' in schema:
+        min_items = schema['minItems']
+        checks.append(lambda value: not isinstance(value, list) or len(value) >= min_items)
+    if 'minLength' in schema:
+        min_length = schema['minLength']
+        checks.append(lambda value: not isinstance(value, str) or len(value) >= min_length)
+    for keyword, compare in (('minimum', float.__ge__), ('maximum', float.__le__)):
+        if keyword in schema:
+            bound = float(schema[keyword])
+            checks.append(lambda value, bound=bound, compare=compare: not _TYPES['number'](value)
+                          or compare(float(value), bound))
+
+    checks = tuple(checks)
+    return lambda value: all(check(value) for check in checks)
+
+
+# Compiled once at import; jsonschema is only used for error messages
+is_valid_analysis = compile_schema(ANALYSIS_SCHEMA)
+is_valid_thought = compile_schema(THOUGHT_SCHEMA)
+ANALYSIS_VALIDATOR = Draft7Validator(ANALYSIS_SCHEMA)
+
+FENCE = re.compile(r'```(?:json)?\s*(.*?)(?:```|\Z)', re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+DEFAULT_THOUGHT_TYPE = 'reflection'
+DEFAULT_CONFIDENCE = 0.7
+DEFAULT_STRENGTH = 0.8
+
+# Ways a response can be turned into an analysis, best first
+PATHS = ('valid', 'repaired', 'retried', 'partial', 'degraded', 'fallback')
+
+
+class AnalysisParseError(ValueError):
+    """A model response that could not be parsed or repaired into an analysis"""
+
+
+@dataclass
+class ParsedAnalysis:
+    """A model response turned into an analysis that passes ANALYSIS_SCHEMA
+
+    ``path`` is 'valid' when the response needed no changes and 'repaired'
+    otherwise. ``complete`` is False when the response was cut off inside
+    the thoughts list, so thoughts after the last one kept are missing.
+    """
+    analysis: Dict[str, Any]
+    path: str
+    complete: bool = True
+    repairs: List[str] = field(default_factory=list)
+
+
+def strip_fences(raw_text: str) -> str:
+    """The JSON inside a markdown fence (closed or not), else the text from the first '{'"""
+    text = raw_text.strip()
+    match = FENCE.search(text)
+    if match:
+        text = match.group(1).strip()
+    start = text.find('{')
+    return text[start:] if start > 0 else text
+
+
+def _tolerant_load(text: str, repairs: List[str]) -> Tuple[Any, bool]:
+    """Parse JSON that json.loads rejected; returns (data, truncated)"""
+    try:
+        # Prose or a stray fence after the object
+        data, _ = json.JSONDecoder().raw_decode(text)
+        repairs.append('trailing_text')
+        return data, False
+    except ValueError:
+        pass
+
+    without_commas = TRAILING_COMMA.sub(r'\1', text)
+    if without_commas != text:
+        try:
+            data = json.loads(without_commas)
+            repairs.append('trailing_commas')
+            return data, False
+        except ValueError:
+            pass
+
+    try:
+        # Cut off mid-response: keep everything up to the break
+        data = jiter.from_json(without_commas.encode('utf-8'), partial_mode='trailing-strings')
+    except ValueError as e:
+        raise AnalysisParseError(f"Unparseable model response: {e}") from e
+    repairs.append('truncated')
+    return data, True
+
+
+def _number(value: Any, default: float) -> float:
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if isinstance(item, (str, int, float)) and str(item).strip()]
+
+
+def _repair_thought(thought: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(thought, dict):
+        return None
+    content = thought.get('content')
+    if not isinstance(content, str) or not content.strip():
+        return None
+    return {
+        **thought,
+        'content': content,
+        'type': thought.get('type') if isinstance(thought.get('type'), str) else DEFAULT_THOUGHT_TYPE,
+        'entities': _strings(thought.get('entities')),
+        'tools_mentioned': _strings(thought.get('tools_mentioned')),
+        'confidence': _number(thought.get('confidence'), DEFAULT_CONFIDENCE)
+    }
+
+
+def repair_analysis(data: Any, truncated: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """Coerce parsed model output into ANALYSIS_SCHEMA; returns (analysis, complete)
+
+    Thoughts without content are dropped and relationships are renumbered
+    to match; relationships that point outside the thoughts are dropped;
+    missing fields get the same defaults as the regex fallback. When the
+    response was truncated before its relationships, the thoughts list may
+    be cut short too, so the last thought is kept only if it is whole, the
+    thoughts are chained with ``leads_to`` and the result is marked
+    incomplete.
+    """
+    if not isinstance(data, dict):
+        raise AnalysisParseError(f"Expected a JSON object, got {type(data).__name__}")
+
+    raw_thoughts = data.get('thoughts') if isinstance(data.get('thoughts'), list) else []
+    cut_in_thoughts = truncated and 'relationships' not in data
+    if cut_in_thoughts and raw_thoughts and not is_valid_thought(raw_thoughts[-1]):
+        raw_thoughts = raw_thoughts[:-1]
+
+    thoughts, index_map = [], {}
+    for index, thought in enumerate(raw_thoughts):
+        repaired = _repair_thought(thought)
+        if repaired is not None:
+            index_map[index] = len(thoughts)
+            thoughts.append(repaired)
+    if not thoughts:
+        raise AnalysisParseError("Model response has no usable thoughts")
+
+    relationships = []
+    raw_relationships = data.get('relationships') if isinstance(data.get('relationships'), list) else []
+    for relationship in raw_relationships:
+        if not isinstance(relationship, dict):
+            continue
+        source, target = (index_map.get(index) if _TYPES['integer'](index) else None
+                          for index in (relationship.get('source_thought'), relationship.get('target_thought')))
+        kind = relationship.get('relationship')
+        if source is None or target is None or not isinstance(kind, str) or not kind:
+            continue
+        relationships.append({
+            **relationship,
+            'source_thought': source,
+            'target_thought': target,
+            'relationship': kind,
+            'strength': _number(relationship.get('strength'), DEFAULT_STRENGTH)
+        })
+
+    if cut_in_thoughts and not relationships:
+        # Cut off before any relationships: chain the thoughts like the regex fallback
+        relationships = [{
+            "source_thought": i,
+            "target_thought": i + 1,
+            "relationship": "leads_to",
+            "strength": DEFAULT_STRENGTH
+        } for i in range(len(thoughts) - 1)]
+
+    strategy, domain = data.get('reasoning_strategy'), data.get('domain')
+    analysis = {
+        **data,
+        'thoughts': thoughts,
+        'relationships': relationships,
+        'reasoning_strategy': strategy if isinstance(strategy, str) and strategy else 'sequential',
+        'domain': domain if isinstance(domain, str) and domain else 'general',
+        'success_indicators': _strings(data.get('success_indicators'))
+    }
+    return analysis, not cut_in_thoughts
+
+
+def _indices_in_range(analysis: Dict[str, Any]) -> bool:
+    """Relationships only point at thoughts that exist (the schema cannot say this)"""
+    count = len(analysis['thoughts'])
+    return all(relationship['source_thought'] < count and relationship['target_thought'] < count
+               for relationship in analysis['relationships'])
+
+
+def parse_analysis(raw_text: str) -> ParsedAnalysis:
+    """Parse a model response into a schema-valid analysis, repairing it if needed
+
+    Well-formed, valid responses cost one json.loads and one validation.
+    Raises AnalysisParseError when nothing usable can be recovered.
+    """
+    text = strip_fences(raw_text)
+    repairs: List[str] = []
+    truncated = False
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data, truncated = _tolerant_load(text, repairs)
+
+    if not truncated and is_valid_analysis(data) and _indices_in_range(data):
+        return ParsedAnalysis(data, 'valid' if not repairs else 'repaired', True, repairs)
+
+    if logger.isEnabledFor(logging.DEBUG) and not truncated:
+        error = next(ANALYSIS_VALIDATOR.iter_errors(data), None)
+        logger.debug("Repairing model response: %s", error.message if error else "invalid")
+    analysis, complete = repair_analysis(data, truncated)
+    repairs.append('schema')
+    return ParsedAnalysis(analysis, 'repaired', complete, repairs)
+
+
+class AnalysisPathStats:
+    """Thread-safe counts of how model responses became analyses
+
+    ``valid``: parsed and validated as-is; ``repaired``: fixed up locally;
+    ``retried``: truncated, with the missing tail re-analyzed by the model;
+    ``partial``: truncated and kept without the tail; ``degraded``: the model
+    was unavailable (breaker open, rate limit or deadline) and the local
+    extractor was used; ``fallback``: the model call or parsing failed
+    otherwise and the regex analysis was used.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {path: 0 for path in PATHS}
+        self.retry_calls = 0
+
+    def record(self, path: str):
+        with self._lock:
+            self.counts[path] += 1
+
+    def record_retry_call(self):
+        with self._lock:
+            self.retry_calls += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                **self.counts,
+                'total': total,
+                'retry_calls': self.retry_calls,
+                'fallback_rate': self.counts['fallback'] / total if total else 0.0
+            }
@@ -1,22 +1,38 @@
 import os
 import json
+import logging
 from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
-from neo4j import GraphDatabase
 import networkx as nx
-from collections import defaultdict, Counter
-import re
+from collections import defaultdict, Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 import streamlit as st
 import plotly.graph_objects as go
 from datetime import datetime
+from drivers import get_driver
 from main import AgentThinkingKG
+from model_client import get_model_client
+from path_scoring import DEFAULT_WEIGHTS, PathFeatures, ScoringWeights, score_path, score_paths_batch
+from reasoning_patterns import (
+    ANALYSIS_PARALYSIS_PATTERNS,
+    CIRCULAR_REASONING_PATTERNS,
+    CONFIDENCE_PATTERNS,
+    EFFICIENCY_WORD_GROUPS,
+    MISTAKE_PATTERNS,
+    OVERTHINKING_PATTERNS,
+    UNCERTAINTY_PATTERNS,
+    PatternSetMatcher,
+    WordGroupCounter,
+)
 import pandas as pd
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configure Gemini API
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 if not gemini_api_key:
@@ -102,7 +118,8 @@ class ReasoningPath:
     tool_usage: List[str]
     overall_score: float
     implicit_issues: List[str]  # New field for implicit problems
-    critique: Optional[str] = None  # AI-generated critique
+    critique: Optional[str] = None  # AI-generated critique, filled on demand
+    context: str = ""  # Domain/strategy summary passed to the critique prompt
 
 
 @dataclass
@@ -120,107 +137,38 @@ class EnhancedReasoningMistakeDetector:
     """Detects both explicit and implicit reasoning mistakes"""
 
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-
-        # Explicit mistake patterns (original)
-        self.mistake_patterns = [
-            r'on second thought',
-            r'actually',
-            r'wait',
-            r'no[,\s]',
-            r'incorrect',
-            r'wrong',
-            r'mistake',
-            r'error',
-            r'oops',
-            r'sorry',
-            r'let me reconsider',
-            r'I was wrong',
-            r'that\'s not right',
-            r'correction',
-            r'revise'
-        ]
-
-        # Patterns indicating uncertainty
-        self.uncertainty_patterns = [
-            r'maybe',
-            r'perhaps',
-            r'might',
-            r'could be',
-            r'not sure',
-            r'uncertain',
-            r'possibly',
-            r'I think'
-        ]
-
-        # Patterns indicating high confidence
-        self.confidence_patterns = [
-            r'clearly',
-            r'obviously',
-            r'definitely',
-            r'certainly',
-            r'without doubt',
-            r'I\'m confident',
-            r'sure that',
-            r'determined that'
-        ]
-
-        # New patterns for implicit issues
-        self.overthinking_patterns = [
-            r'but then again',
-            r'on the other hand',
-            r'alternatively',
-            r'or maybe',
-            r'but what if',
-            r'unless',
-            r'although',
-            r'however',
-            r'but I remember',
-            r'given all this'
-        ]
-
-        self.circular_reasoning_patterns = [
-            r'but if I already',
-            r'why do I need to confirm',
-            r'that seems circular',
-            r'back to',
-            r'again'
-        ]
-
-        self.analysis_paralysis_patterns = [
-            r'I should first',
-            r'maybe I should',
-            r'perhaps I should',
-            r'to be safe',
-            r'just to make sure',
-            r'I can\'t rule out',
-            r'unless I\'ve',
-            r'might just be'
-        ]
+        # Shares its rate limit and circuit breaker with every other user of the model
+        self.model = get_model_client('gemini-1.5-flash')
+
+        # Phrase lists, kept as attributes for callers that inspect them
+        self.mistake_patterns = list(MISTAKE_PATTERNS)
+        self.uncertainty_patterns = list(UNCERTAINTY_PATTERNS)
+        self.confidence_patterns = list(CONFIDENCE_PATTERNS)
+        self.overthinking_patterns = list(OVERTHINKING_PATTERNS)
+        self.circular_reasoning_patterns = list(CIRCULAR_REASONING_PATTERNS)
+        self.analysis_paralysis_patterns = list(ANALYSIS_PARALYSIS_PATTERNS)
+
+        # Compiled once: every category is counted from a single scan per thought
+        self.pattern_matcher = PatternSetMatcher({
+            'mistake': self.mistake_patterns,
+            'uncertainty': self.uncertainty_patterns,
+            'confidence': self.confidence_patterns,
+            'overthinking': self.overthinking_patterns,
+            'circular_reasoning': self.circular_reasoning_patterns,
+            'analysis_paralysis': self.analysis_paralysis_patterns
+        })
+        self.efficiency_counter = WordGroupCounter(EFFICIENCY_WORD_GROUPS)
 
     def analyze_thought_quality(self, thought_content: str, confidence_score: float) -> Dict[str, any]:
         """Analyze a single thought for quality indicators (enhanced)"""
-        content_lower = thought_content.lower()
-
-        # Original explicit mistake detection
-        mistake_count = sum(1 for pattern in self.mistake_patterns
-                            if re.search(pattern, content_lower))
-
-        uncertainty_count = sum(1 for pattern in self.uncertainty_patterns
-                                if re.search(pattern, content_lower))
-
-        confidence_count = sum(1 for pattern in self.confidence_patterns
-                               if re.search(pattern, content_lower))
+        counts = self.pattern_matcher.count(thought_content.lower())
 
-        # New implicit issue detection
-        overthinking_count = sum(1 for pattern in self.overthinking_patterns
-                                 if re.search(pattern, content_lower))
-
-        circular_reasoning_count = sum(1 for pattern in self.circular_reasoning_patterns
-                                       if re.search(pattern, content_lower))
-
-        analysis_paralysis_count = sum(1 for pattern in self.analysis_paralysis_patterns
-                                       if re.search(pattern, content_lower))
+        mistake_count = counts['mistake']
+        uncertainty_count = counts['uncertainty']
+        confidence_count = counts['confidence']
+        overthinking_count = counts['overthinking']
+        circular_reasoning_count = counts['circular_reasoning']
+        analysis_paralysis_count = counts['analysis_paralysis']
 
         # Detect implicit issues
         implicit_issues = []
@@ -259,8 +207,12 @@ class EnhancedReasoningMistakeDetector:
             'implicit_issues': implicit_issues
         }
 
-    def generate_ai_critique(self, thought_sequence: List[str], session_context: str = "") -> str:
-        """Use Gemini to generate intelligent critique of reasoning process"""
+    def generate_ai_critique(self, thought_sequence: List[str], session_context: str = "") -> Optional[str]:
+        """Use Gemini to generate intelligent critique of reasoning process
+
+        Returns None when the model call fails, so callers can retry later
+        instead of keeping an error message as the critique.
+        """
 
         full_reasoning = "\n".join([f"Step {i + 1}: {thought}" for i, thought in enumerate(thought_sequence)])
 
@@ -292,23 +244,24 @@ class EnhancedReasoningMistakeDetector:
             response = self.model.generate_content(critique_prompt)
             return response.text.strip()
         except Exception as e:
-            return f"Could not generate AI critique: {e}"
+            logger.warning("Could not generate AI critique: %s", e)
+            return None
 
     def analyze_reasoning_efficiency(self, thought_sequence: List[str]) -> Dict[str, any]:
         """Analyze overall reasoning efficiency and identify improvement areas"""
 
         full_text = " ".join(thought_sequence)
 
-        # Count decision points vs. analysis
-        decision_words = len(re.findall(r'\b(will|should|must|need to|going to|decide)\b', full_text.lower()))
-        analysis_words = len(
-            re.findall(r'\b(consider|maybe|perhaps|might|could|possibly|alternatively)\b', full_text.lower()))
+        # Count decision points, analysis and conditionals in one pass
+        word_counts = self.efficiency_counter.count(full_text.lower())
+        decision_words = word_counts['decision']
+        analysis_words = word_counts['analysis']
 
         # Count questions (often indicate uncertainty/overthinking)
         question_count = full_text.count('?')
 
         # Count conditional statements (complexity indicators)
-        conditional_count = len(re.findall(r'\b(if|unless|although|however|but)\b', full_text.lower()))
+        conditional_count = word_counts['conditional']
 
         # Calculate efficiency metrics
         decision_ratio = decision_words / max(1, decision_words + analysis_words)
@@ -332,89 +285,150 @@ class EnhancedReasoningMistakeDetector:
         }
 
 
+# One aggregated row per session: ordered thoughts plus the tools they use
+SESSION_RECORDS_QUERY = """
+    MATCH (s:Session)-[:CONTAINS]->(t:Thought)
+    WITH s, t ORDER BY t.sequence_order
+    // collect() drops nulls, so the per-thought lists are coalesced to stay aligned
+    WITH s,
+         collect(coalesce(t.content, '')) as thoughts,
+         collect(coalesce(t.type, 'unknown')) as thought_types,
+         collect(coalesce(t.confidence, 0.7)) as confidences,
+         collect(t.id) as thought_ids
+    CALL {
+        WITH s
+        OPTIONAL MATCH (s)-[:CONTAINS]->(:Thought)-[:USES_TOOL]->(tool:Tool)
+        RETURN collect(DISTINCT tool.name) as tools
+    }
+    RETURN s.id as session_id,
+           s.reasoning_strategy as strategy,
+           s.success_indicators as success_indicators,
+           s.domain as domain,
+           thoughts, thought_types, confidences, thought_ids, tools
+"""
+
+
 class OptimalReasoningAnalyzer:
     """Enhanced analyzer with implicit mistake detection and AI critique"""
 
     def __init__(self, neo4j_uri: str = None, neo4j_user: str = None,
-                 neo4j_password: str = None):
+                 neo4j_password: str = None, critique_parallelism: int = 4,
+                 scoring_weights: ScoringWeights = DEFAULT_WEIGHTS, driver=None,
+                 neo4j_read_uri: str = None, critique_cache_size: int = 256):
         # Use provided credentials or environment variables
         self.neo4j_uri = neo4j_uri or os.getenv('NEO4J_URI')
         self.neo4j_user = neo4j_user or os.getenv('NEO4J_USER')
         self.neo4j_password = neo4j_password or os.getenv('NEO4J_PASSWORD')
         
-        if not all([self.neo4j_uri, self.neo4j_user, self.neo4j_password]):
+        if driver is None and not all([self.neo4j_uri, self.neo4j_user, self.neo4j_password]):
             raise ValueError("Neo4j credentials must be provided either through parameters or environment variables")
 
-        self.driver = GraphDatabase.driver(
-            self.neo4j_uri, auth=(self.neo4j_user, self.neo4j_password)
+        # Shares the process-wide driver with AgentThinkingKG unless one is injected
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else get_driver(
+            self.neo4j_uri, self.neo4j_user, self.neo4j_password
         )
+        # Analytics reads go to a replica when NEO4J_READ_URI is set
+        read_uri = neo4j_read_uri or os.getenv('NEO4J_READ_URI')
+        self._owns_read_driver = bool(read_uri)
+        self.read_driver = get_driver(
+            read_uri, self.neo4j_user, self.neo4j_password
+        ) if read_uri else self.driver
 
         self.mistake_detector = EnhancedReasoningMistakeDetector()
 
+        # Critiques are generated lazily and memoized per (session, thoughts), least recently used evicted
+        self.critique_parallelism = critique_parallelism
+        self.critique_cache_size = critique_cache_size
+        self._critique_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+        self.scoring_weights = scoring_weights
+        self.path_features: Optional[PathFeatures] = None
+
+    def fetch_session_records(self) -> List[Dict[str, any]]:
+        """All aggregated session records, read in a managed (retried) read transaction"""
+        def work(tx):
+            return [record.data() for record in tx.run(SESSION_RECORDS_QUERY)]
+
+        with self.read_driver.session() as session:
+            return session.execute_read(work)
+
     def extract_reasoning_paths(self) -> List[ReasoningPath]:
         """Extract all reasoning paths from the knowledge graph (enhanced)"""
+        records = self.fetch_session_records()
+
+        # Text features are extracted once; all scores come from one vectorized pass
+        self.path_features = PathFeatures.from_sessions(records, self.mistake_detector)
+        scores = score_paths_batch(self.path_features, self.scoring_weights)
+        mistake_counts = self.path_features.mistake_counts()
+        backtrack_counts = self.path_features.backtrack_counts()
+
         paths = []
+        for i, session_data in enumerate(records):
+            # AI critique is deferred to ensure_critiques for the paths actually shown
+            context = f"Domain: {session_data.get('domain', 'unknown')}, Strategy: {session_data.get('strategy', 'unknown')}"
+
+            path = ReasoningPath(
+                session_id=session_data['session_id'],
+                thought_sequence=session_data['thoughts'],
+                thought_types=session_data['thought_types'],
+                confidence_scores=session_data['confidences'],
+                path_length=len(session_data['thoughts']),
+                success_indicators=session_data['success_indicators'] or [],
+                mistake_count=int(mistake_counts[i]),
+                backtrack_count=int(backtrack_counts[i]),
+                tool_usage=session_data['tools'],
+                overall_score=float(scores[i]),
+                implicit_issues=self.path_features.implicit_issues[i],
+                context=context
+            )
+
+            paths.append(path)
 
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (s:Session)-[:CONTAINS]->(t:Thought)
-                WITH s, t ORDER BY t.sequence_order
-                RETURN s.id as session_id,
-                       s.reasoning_strategy as strategy,
-                       s.success_indicators as success_indicators,
-                       s.domain as domain,
-                       collect(t.content) as thoughts,
-                       collect(t.type) as thought_types,
-                       collect(t.confidence) as confidences,
-                       collect(t.id) as thought_ids
-            """)
-
-            for record in result:
-                session_data = record.data()
-
-                # Get tool usage for this session
-                tools = self._get_session_tools(session_data['session_id'])
-
-                # Enhanced mistake analysis (explicit + implicit)
-                mistake_analysis = self._analyze_session_mistakes_enhanced(
-                    session_data['thoughts'],
-                    session_data['confidences']
-                )
+        return paths
 
-                # Generate AI critique for this reasoning path
-                context = f"Domain: {session_data.get('domain', 'unknown')}, Strategy: {session_data.get('strategy', 'unknown')}"
-                ai_critique = self.mistake_detector.generate_ai_critique(
-                    session_data['thoughts'],
-                    context
-                )
+    def rescore_paths(self, paths: List[ReasoningPath], weights: ScoringWeights) -> List[ReasoningPath]:
+        """Re-score paths from the last extraction with new weights, without rescanning text"""
+        if self.path_features is None:
+            raise ValueError("extract_reasoning_paths must run before rescore_paths")
 
-                # Calculate overall path score (enhanced)
-                overall_score = self._calculate_path_score_enhanced(
-                    session_data['confidences'],
-                    mistake_analysis['mistake_count'],
-                    mistake_analysis['backtrack_count'],
-                    len(session_data['success_indicators'] or []),
-                    len(tools),
-                    mistake_analysis['implicit_issue_count'],
-                    mistake_analysis['efficiency_score']
-                )
+        scores = dict(zip(self.path_features.session_ids,
+                          score_paths_batch(self.path_features, weights)))
+        for path in paths:
+            path.overall_score = float(scores[path.session_id])
+        self.scoring_weights = weights
+        return paths
 
-                path = ReasoningPath(
-                    session_id=session_data['session_id'],
-                    thought_sequence=session_data['thoughts'],
-                    thought_types=session_data['thought_types'],
-                    confidence_scores=session_data['confidences'],
-                    path_length=len(session_data['thoughts']),
-                    success_indicators=session_data['success_indicators'] or [],
-                    mistake_count=mistake_analysis['mistake_count'],
-                    backtrack_count=mistake_analysis['backtrack_count'],
-                    tool_usage=tools,
-                    overall_score=overall_score,
-                    implicit_issues=mistake_analysis['implicit_issues'],
-                    critique=ai_critique
+    def ensure_critiques(self, paths: List[ReasoningPath],
+                         max_workers: Optional[int] = None) -> List[ReasoningPath]:
+        """Generate AI critiques for the given paths only, at most max_workers at a time"""
+        pending = []
+        for path in paths:
+            if path.critique is not None:
+                continue
+            key = (path.session_id, hash(tuple(path.thought_sequence)))
+            if key in self._critique_cache:
+                self._critique_cache.move_to_end(key)
+                path.critique = self._critique_cache[key]
+            else:
+                pending.append((key, path))
+
+        if pending:
+            workers = max(1, min(max_workers or self.critique_parallelism, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                critiques = pool.map(
+                    lambda item: self.mistake_detector.generate_ai_critique(
+                        item[1].thought_sequence, item[1].context),
+                    pending
                 )
-
-                paths.append(path)
+                for (key, path), critique in zip(pending, critiques):
+                    # Failed critiques stay None and are retried on the next call
+                    if critique is None:
+                        continue
+                    self._critique_cache[key] = critique
+                    path.critique = critique
+            while len(self._critique_cache) > self.critique_cache_size:
+                self._critique_cache.popitem(last=False)
 
         return paths
 
@@ -456,28 +470,8 @@ class OptimalReasoningAnalyzer:
                                        backtrack_count: int, success_count: int, tool_count: int,
                                        implicit_issue_count: int, efficiency_score: float) -> float:
         """Enhanced path scoring including implicit issues"""
-        if not confidences:
-            return 0.0
-
-        # Base score from average confidence
-        base_score = sum(confidences) / len(confidences)
-
-        # Enhanced penalties and bonuses
-        mistake_penalty = mistake_count * 0.2
-        backtrack_penalty = backtrack_count * 0.15
-        implicit_penalty = implicit_issue_count * 0.1  # New penalty for implicit issues
-        success_bonus = success_count * 0.1
-        tool_efficiency = min(tool_count * 0.05, 0.2)
-        efficiency_bonus = efficiency_score * 0.2  # New efficiency bonus
-
-        # Length efficiency
-        length_efficiency = max(0, 1 - (len(confidences) - 3) * 0.02)
-
-        final_score = (base_score + success_bonus + tool_efficiency +
-                       length_efficiency + efficiency_bonus) - \
-                      (mistake_penalty + backtrack_penalty + implicit_penalty)
-
-        return max(0.0, min(1.0, final_score))
+        return score_path(confidences, mistake_count, backtrack_count, success_count,
+                          tool_count, implicit_issue_count, efficiency_score, self.scoring_weights)
 
     def generate_comprehensive_critique(self, paths: List[ReasoningPath]) -> Dict[str, any]:
         """Generate comprehensive critique and improvement suggestions"""
@@ -496,6 +490,9 @@ class OptimalReasoningAnalyzer:
 
         common_issues = Counter(all_implicit_issues).most_common(5)
 
+        # Only the worst 3 paths are shown with individual critiques
+        self.ensure_critiques(sorted_paths[-3:])
+
         # Generate overall recommendations using AI
         if low_scoring_paths:
             sample_issues = "\n".join([
@@ -564,6 +561,7 @@ class OptimalReasoningAnalyzer:
 
         # Find the best path
         best_path = max(filtered_paths, key=lambda p: p.overall_score)
+        self.ensure_critiques([best_path])
 
         # Enhanced improvement suggestions
         improvements = []
@@ -636,18 +634,22 @@ class OptimalReasoningAnalyzer:
 
     def _get_session_tools(self, session_id: str) -> List[str]:
         """Get tools used in a session"""
-        with self.driver.session() as session:
-            result = session.run("""
+        def work(tx):
+            record = tx.run("""
                 MATCH (s:Session {id: $session_id})-[:CONTAINS]->(t:Thought)-[:USES_TOOL]->(tool:Tool)
                 RETURN collect(DISTINCT tool.name) as tools
-            """, session_id=session_id)
-
-            record = result.single()
+            """, session_id=session_id).single()
             return record['tools'] if record else []
 
+        with self.read_driver.session() as session:
+            return session.execute_read(work)
+
     def close(self):
-        """Close database connection"""
-        self.driver.close()
+        """Close database connection (a shared driver closes with its last user)"""
+        if self._owns_read_driver:
+            self.read_driver.close()
+        if self._owns_driver:
+            self.driver.close()
 
 
 def create_knowledge_graph(session_id=None):
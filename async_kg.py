@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from neo4j import READ_ACCESS, AsyncGraphDatabase
+
+from analysis_cache import AnalysisCache
+from analysis_validation import parse_analysis
+from drivers import PoolSettings
+from model_client import ModelUnavailable
+from main import (
+    AGGREGATE_REBUILD_LEASE_SECONDS,
+    AGGREGATES_READY_QUERY,
+    ANALYSIS_PROMPT,
+    APPLY_PATTERN_AGGREGATES_QUERY,
+    BACKFILL_LAST_SEEN_QUERY,
+    BUMP_GRAPH_VERSION_QUERY,
+    CLAIM_AGGREGATE_REBUILD_QUERY,
+    CLEAR_AGGREGATED_FLAGS_QUERY,
+    DELETE_ORPHANS_QUERY,
+    DELETE_SESSION_QUERY,
+    DROP_PATTERN_AGGREGATES_QUERY,
+    FINISH_AGGREGATE_REBUILD_QUERY,
+    GRAPH_LINKS_QUERY,
+    GRAPH_NODES_QUERY,
+    MERGE_SESSION_QUERY,
+    REASONING_PATTERNS_QUERY,
+    RENEW_AGGREGATE_LEASE_QUERY,
+    SESSION_DETAIL_QUERY,
+    SESSION_EXISTS_QUERY,
+    SESSION_OVERVIEW_QUERY,
+    SUCCESSFUL_PATTERNS_QUERY,
+    TOOL_USAGE_PATTERNS_QUERY,
+    UNWIND_FLOWS_QUERY,
+    UNWIND_MENTIONS_QUERY,
+    UNWIND_THOUGHTS_QUERY,
+    UNWIND_TOOLS_QUERY,
+    KnowledgeGraphBuilder,
+    ThinkingAnalyzer,
+    ThinkingResult,
+)
+from schema import ensure_schema_async
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncThinkingAnalyzer(ThinkingAnalyzer):
+    """ThinkingAnalyzer that awaits Gemini instead of blocking a thread"""
+
+    async def analyze_thinking_text(self, thinking_text: str) -> Tuple[Dict[str, Any], str]:
+        """Use Gemini to analyze the thinking text and extract structured data"""
+        if self.mode == 'local':
+            return self._local_analysis(thinking_text)
+
+        cache_key, cached = self._cached_analysis(thinking_text)
+        if cached is not None:
+            return cached
+
+        chunks = self._chunks(thinking_text)
+        if len(chunks) > 1:
+            limit = asyncio.Semaphore(self.chunk_concurrency)
+
+            async def analyze_chunk(chunk):
+                async with limit:
+                    return await self.analyze_thinking_text(chunk.text)
+
+            results = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks))
+            return self._merge_chunks(chunks, list(results), cache_key)
+
+        prompt = ANALYSIS_PROMPT.format(thinking_text=thinking_text)
+
+        try:
+            response = await self.model.generate_content_async(prompt)
+            return await self._parse_response_async(response.text, cache_key, thinking_text)
+        except ModelUnavailable as e:
+            logger.warning("Gemini unavailable, using local extraction: %s", e)
+            return self._degraded_analysis(thinking_text)
+        except Exception as e:
+            logger.warning("Error analyzing with Gemini, using fallback analysis: %s", e)
+            self.path_stats.record('fallback')
+            return self._fallback_analysis(thinking_text), ""
+
+    async def _parse_response_async(self, raw_text: str, cache_key: Optional[str] = None,
+                                    thinking_text: Optional[str] = None):
+        """_parse_response, awaiting the model for the tail of a truncated response"""
+        parsed = parse_analysis(raw_text)
+        analyzed_data, raw_text = parsed.analysis, raw_text.strip()
+        chunks, path = self._retry_plan(parsed, thinking_text)
+        if chunks:
+            try:
+                self.path_stats.record_retry_call()
+                response = await self.model.generate_content_async(
+                    ANALYSIS_PROMPT.format(thinking_text=chunks[1].text)
+                )
+                analyzed_data, raw_text = self._merge_tail(chunks, analyzed_data, raw_text, response.text)
+            except Exception as e:
+                logger.warning("Re-analyzing truncated tail failed, keeping partial analysis: %s", e)
+                path = 'partial'
+        return self._accept(analyzed_data, raw_text, path, cache_key)
+
+
+class AsyncKnowledgeGraphBuilder:
+    """Async counterpart of KnowledgeGraphBuilder on neo4j.AsyncGraphDatabase"""
+
+    def __init__(self, uri: str, user: str, password: str, max_connection_pool_size: int = 100,
+                 read_uri: Optional[str] = None):
+        self.uri = uri
+        settings = PoolSettings.from_env().driver_kwargs()
+        settings['max_connection_pool_size'] = max_connection_pool_size
+        self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password), **settings)
+        # Reads may go to a replica; it lags the primary, so writes never do
+        read_uri = read_uri or os.getenv('NEO4J_READ_URI')
+        if read_uri:
+            self.read_driver = AsyncGraphDatabase.driver(read_uri, auth=(user, password), **settings)
+        else:
+            self.read_driver = self.driver
+
+    async def create_constraints(self):
+        """Create necessary constraints and indexes (checked once per process)"""
+        created = await ensure_schema_async(self.driver, self.uri)
+        if created:
+            logger.info("Created schema: %s", ', '.join(created))
+        if {'entity_last_seen_name', 'tool_last_seen_name'} & set(created):
+            await self._backfill_last_seen()
+
+    async def _backfill_last_seen(self, batch_size: int = 10000):
+        """Give entities and tools without last_seen the epoch, so graph pages include them"""
+        async def backfill(tx):
+            result = await tx.run(BACKFILL_LAST_SEEN_QUERY, batch_size=batch_size)
+            return (await result.consume()).counters.properties_set
+
+        async with self.driver.session() as session:
+            while await session.execute_write(backfill):
+                pass
+
+    async def ensure_pattern_aggregates(self, batch_size: int = 500, poll_seconds: float = 1.0) -> bool:
+        """Build the pattern aggregates once for graphs that predate them
+
+        Claims the rebuild like KnowledgeGraphBuilder.rebuild_pattern_aggregates,
+        so concurrent callers (in this or other processes) wait for the one
+        rebuild instead of running their own. Returns True if this call rebuilt.
+        """
+        async def claim(tx):
+            result = await tx.run(CLAIM_AGGREGATE_REBUILD_QUERY, if_needed=True,
+                                  lease_seconds=AGGREGATE_REBUILD_LEASE_SECONDS)
+            state = (await result.single()).data()
+            if state['claimed']:
+                await (await tx.run(CLEAR_AGGREGATED_FLAGS_QUERY)).consume()
+                await (await tx.run(DROP_PATTERN_AGGREGATES_QUERY)).consume()
+            return state
+
+        async def apply_batch(tx, batch, generation):
+            result = await tx.run(RENEW_AGGREGATE_LEASE_QUERY, generation=generation,
+                                  lease_seconds=AGGREGATE_REBUILD_LEASE_SECONDS)
+            if await result.single() is None:
+                return False
+            for session_id in batch:
+                await tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+            return True
+
+        async def finish(tx, generation):
+            await (await tx.run(FINISH_AGGREGATE_REBUILD_QUERY, generation=generation)).consume()
+
+        async with self.driver.session() as session:
+            result = await session.run(AGGREGATES_READY_QUERY)
+            if (await result.single())['ready']:
+                return False
+            while True:
+                state = await session.execute_write(claim)
+                if state['claimed']:
+                    break
+                if state['ready']:
+                    return False
+                await asyncio.sleep(poll_seconds)
+
+            generation = state['generation']
+            logger.info("Rebuilding pattern aggregates (generation %s)", generation)
+            result = await session.run("MATCH (s:Session) RETURN s.id as id")
+            session_ids = [record['id'] async for record in result]
+            for start in range(0, len(session_ids), batch_size):
+                if not await session.execute_write(apply_batch, session_ids[start:start + batch_size], generation):
+                    logger.warning("Pattern aggregate rebuild %s was taken over", generation)
+                    return False
+            await session.execute_write(finish, generation)
+        await self._mark_graph_changed()
+        return True
+
+    async def add_thinking_session(self, session_id: str, thinking_text: str,
+                                   analyzed_data: Dict[str, Any], overwrite: bool = True) -> str:
+        """Add a complete thinking session to the knowledge graph in one write transaction"""
+        async with self.driver.session() as session:
+            await session.execute_write(self._write_session_batched, session_id,
+                                        thinking_text, analyzed_data, overwrite)
+        await self._mark_graph_changed()
+        return session_id
+
+    async def _mark_graph_changed(self):
+        """Bump the shared graph version so pattern caches in other processes recompute"""
+        async def bump(tx):
+            await (await tx.run(BUMP_GRAPH_VERSION_QUERY)).consume()
+
+        try:
+            async with self.driver.session() as session:
+                await session.execute_write(bump)
+        except Exception as e:
+            logger.warning("Could not bump the shared graph version: %s", e)
+
+    @staticmethod
+    async def _write_session_batched(tx, session_id: str, thinking_text: str,
+                                     analyzed_data: Dict[str, Any], overwrite: bool = True) -> bool:
+        """Async mirror of KnowledgeGraphBuilder._write_session_batched"""
+        result = await tx.run(SESSION_EXISTS_QUERY, session_id=session_id)
+        existing_session = await result.single()
+
+        if existing_session and not overwrite:
+            logger.info("Session %s already exists. Use overwrite=True to replace it.", session_id)
+            return False
+        elif existing_session and overwrite:
+            logger.debug("Overwriting existing session: %s", session_id)
+            await tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=-1)
+            result = await tx.run(DELETE_SESSION_QUERY, session_id=session_id)
+            orphan_candidates = (await result.single())['orphan_candidates']
+        else:
+            orphan_candidates = []
+
+        rows = KnowledgeGraphBuilder._session_rows(session_id, analyzed_data)
+
+        await tx.run(MERGE_SESSION_QUERY, session_id=session_id, thinking_text=thinking_text,
+                     strategy=analyzed_data.get('reasoning_strategy', 'unknown'),
+                     domain=analyzed_data.get('domain', 'general'),
+                     success_indicators=analyzed_data.get('success_indicators', []))
+
+        for query, key in ((UNWIND_THOUGHTS_QUERY, 'thoughts'),
+                           (UNWIND_MENTIONS_QUERY, 'mentions'),
+                           (UNWIND_TOOLS_QUERY, 'tools'),
+                           (UNWIND_FLOWS_QUERY, 'flows')):
+            if rows[key]:
+                await tx.run(query, session_id=session_id, rows=rows[key])
+
+        await tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+
+        if orphan_candidates:
+            await tx.run(DELETE_ORPHANS_QUERY, ids=orphan_candidates)
+        return True
+
+    async def _fetch(self, query: str, **params) -> List[Dict[str, Any]]:
+        """Run a read query in a managed (retried) read transaction"""
+        async def work(tx):
+            result = await tx.run(query, **params)
+            return [record.data() async for record in result]
+
+        async with self.read_driver.session(default_access_mode=READ_ACCESS) as session:
+            return await session.execute_read(work)
+
+    async def query_reasoning_patterns(self) -> List[Dict[str, Any]]:
+        """Query for common reasoning patterns"""
+        return await self._fetch(REASONING_PATTERNS_QUERY)
+
+    async def find_successful_patterns(self) -> List[Dict[str, Any]]:
+        """Find patterns that led to successful reasoning"""
+        return await self._fetch(SUCCESSFUL_PATTERNS_QUERY)
+
+    async def get_tool_usage_patterns(self) -> List[Dict[str, Any]]:
+        """Analyze tool usage patterns in reasoning"""
+        return await self._fetch(TOOL_USAGE_PATTERNS_QUERY)
+
+    async def close(self):
+        """Close the database connections"""
+        if self.read_driver is not self.driver:
+            await self.read_driver.close()
+        await self.driver.close()
+
+
+class AsyncAgentThinkingKG:
+    """asyncio-native counterpart of AgentThinkingKG.
+
+    Gemini calls and Neo4j queries are awaited, so one event loop can keep
+    many ingests in flight. Use it as an async context manager, or call
+    ``initialize()`` once before the first ingest and ``close()`` at the end:
+
+        async with AsyncAgentThinkingKG() as kg:
+            await asyncio.gather(*(kg.process_thinking(t) for t in traces))
+    """
+
+    def __init__(self, neo4j_uri: str = None, neo4j_user: str = None,
+                 neo4j_password: str = None, max_connection_pool_size: int = 100,
+                 neo4j_read_uri: str = None):
+        # Use provided credentials or environment variables
+        self.neo4j_uri = neo4j_uri or os.getenv('NEO4J_URI')
+        self.neo4j_user = neo4j_user or os.getenv('NEO4J_USER')
+        self.neo4j_password = neo4j_password or os.getenv('NEO4J_PASSWORD')
+
+        if not all([self.neo4j_uri, self.neo4j_user, self.neo4j_password]):
+            raise ValueError("Neo4j credentials must be provided either through parameters or environment variables")
+
+        self.analyzer = AsyncThinkingAnalyzer(cache=AnalysisCache.from_env())
+        self.kg_builder = AsyncKnowledgeGraphBuilder(
+            self.neo4j_uri, self.neo4j_user, self.neo4j_password,
+            max_connection_pool_size=max_connection_pool_size,
+            read_uri=neo4j_read_uri
+        )
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def initialize(self):
+        """Create the graph constraints and pattern aggregates (the sync class does this in its constructor)"""
+        await self.kg_builder.create_constraints()
+        await self.kg_builder.ensure_pattern_aggregates()
+
+    async def process_thinking(self, thinking_text: str, session_id: Optional[str] = None,
+                               overwrite: bool = True) -> ThinkingResult:
+        """Process agent thinking text and add to knowledge graph"""
+        if not session_id:
+            session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        start = time.perf_counter()
+        analyzed_data, raw_llm_response = await self.analyzer.analyze_thinking_text(thinking_text)
+        analyzed = time.perf_counter()
+
+        result_session_id = await self.kg_builder.add_thinking_session(
+            session_id, thinking_text, analyzed_data, overwrite
+        )
+        return ThinkingResult(
+            result_session_id, analyzed_data, raw_llm_response, thinking_text,
+            analyze_seconds=analyzed - start, write_seconds=time.perf_counter() - analyzed
+        )
+
+    async def analyze_patterns(self) -> Dict[str, Any]:
+        """Analyze reasoning patterns in the knowledge graph (queries run concurrently)"""
+        reasoning, successful, tools = await asyncio.gather(
+            self.kg_builder.query_reasoning_patterns(),
+            self.kg_builder.find_successful_patterns(),
+            self.kg_builder.get_tool_usage_patterns()
+        )
+        return {
+            'reasoning_patterns': reasoning,
+            'successful_patterns': successful,
+            'tool_usage_patterns': tools
+        }
+
+    async def get_session_info(self, session_id: str = None) -> List[Dict[str, Any]]:
+        """Get information about sessions in the database"""
+        if session_id:
+            return await self.kg_builder._fetch(SESSION_DETAIL_QUERY, session_id=session_id)
+        return await self.kg_builder._fetch(SESSION_OVERVIEW_QUERY)
+
+    async def get_full_graph_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get all nodes and relationships for the knowledge graph visualization"""
+        async def work(tx):
+            nodes_result = await tx.run(GRAPH_NODES_QUERY)
+            nodes = [record.data() async for record in nodes_result]
+
+            relationships_result = await tx.run(GRAPH_LINKS_QUERY)
+            links = [record.data() async for record in relationships_result]
+            return nodes, links
+
+        # One read transaction, so nodes and links come from the same snapshot
+        async with self.kg_builder.read_driver.session(default_access_mode=READ_ACCESS) as session:
+            nodes, links = await session.execute_read(work)
+
+        return {
+            'nodes': nodes,
+            'links': links
+        }
+
+    async def close(self):
+        """Close database connections"""
+        await self.kg_builder.close()
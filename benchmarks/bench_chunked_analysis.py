@@ -0,0 +1,85 @@
+"""Compare single-prompt and chunked analysis of one very long thinking trace.
+
+Replaces the Gemini model with a stand-in whose latency grows with prompt
+length (no API calls are made) and answers with the regex fallback's
+analysis of the text it was sent. Reports wall time of both modes and the
+size of the merged result.
+
+    python benchmarks/bench_chunked_analysis.py --chars 200000 --ms-per-kchar 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+
+from main import ANALYSIS_PROMPT, ThinkingAnalyzer  # noqa: E402
+
+PROMPT_PREFIX, PROMPT_SUFFIX = ANALYSIS_PROMPT.format(thinking_text='\x00').split('\x00')
+
+
+class SlowModel:
+    """Model stand-in that sleeps ``ms_per_kchar`` per 1000 prompt characters"""
+
+    def __init__(self, analyzer: ThinkingAnalyzer, ms_per_kchar: float):
+        self.analyzer = analyzer
+        self.ms_per_kchar = ms_per_kchar
+
+    def generate_content(self, prompt: str):
+        time.sleep(len(prompt) / 1000 * self.ms_per_kchar / 1000)
+        text = prompt[len(PROMPT_PREFIX):len(prompt) - len(PROMPT_SUFFIX)]
+        analysis = self.analyzer._fallback_analysis(text)
+        return type('Response', (), {'text': json.dumps(analysis)})()
+
+
+def synthetic_trace(chars: int) -> str:
+    paragraphs = []
+    i = 0
+    while sum(len(p) + 2 for p in paragraphs) < chars:
+        paragraphs.append(
+            f"I notice the request in step {i} needs the weather for city_{i}. "
+            f"I will call the WeatherAPI with location='city_{i}'. "
+            f"Then I analyze the response and determine whether step {i} succeeded."
+        )
+        i += 1
+    return "\n\n".join(paragraphs)
+
+
+def timed(analyzer: ThinkingAnalyzer, trace: str):
+    start = time.perf_counter()
+    analysis, _ = analyzer.analyze_thinking_text(trace)
+    return time.perf_counter() - start, analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chars', type=int, default=200000)
+    parser.add_argument('--ms-per-kchar', type=float, default=20.0)
+    parser.add_argument('--chunk-chars', type=int, default=12000)
+    parser.add_argument('--overlap', type=int, default=800)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    trace = synthetic_trace(args.chars)
+
+    single = ThinkingAnalyzer(chunk_chars=0)
+    single.model = SlowModel(single, args.ms_per_kchar)
+    chunked = ThinkingAnalyzer(chunk_chars=args.chunk_chars, chunk_overlap=args.overlap,
+                               chunk_concurrency=args.concurrency)
+    chunked.model = SlowModel(chunked, args.ms_per_kchar)
+
+    single_time, single_analysis = timed(single, trace)
+    chunked_time, chunked_analysis = timed(chunked, trace)
+    chunks = len(chunked._chunks(trace))
+
+    print(f"{len(trace)} chars, {chunks} chunks of <= {args.chunk_chars} chars")
+    print(f"single prompt : {single_time:6.2f}s, {len(single_analysis['thoughts'])} thoughts")
+    print(f"chunked       : {chunked_time:6.2f}s, {len(chunked_analysis['thoughts'])} thoughts, "
+          f"{len(chunked_analysis['relationships'])} relationships ({single_time / chunked_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Compare per-statement and batched UNWIND ingestion of a thinking session.
+
+Writes synthetic sessions straight into the Neo4j instance configured in .env
+(no Gemini calls are made) and reports Bolt round trips and wall time per
+session for both write paths. Benchmark sessions are removed afterwards.
+
+    python benchmarks/bench_ingest.py --sessions 20 --thoughts 60 --entities 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+
+from main import KnowledgeGraphBuilder  # noqa: E402
+
+
+class CountingTransaction:
+    """Transaction proxy that counts statements sent to the server"""
+
+    def __init__(self, tx, counter):
+        self._tx = tx
+        self._counter = counter
+
+    def run(self, *args, **kwargs):
+        self._counter['round_trips'] += 1
+        return self._tx.run(*args, **kwargs)
+
+
+class CountingSession:
+    """Session proxy that counts auto-commit statements and transaction commits"""
+
+    def __init__(self, session, counter):
+        self._session = session
+        self._counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def run(self, *args, **kwargs):
+        self._counter['round_trips'] += 1
+        return self._session.run(*args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        def counted(tx, *a, **kw):
+            return fn(CountingTransaction(tx, self._counter), *a, **kw)
+
+        result = self._session.execute_write(counted, *args, **kwargs)
+        self._counter['round_trips'] += 1  # COMMIT
+        return result
+
+
+class CountingDriver:
+    """Driver proxy handing out counting sessions"""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.counter = {'round_trips': 0}
+
+    def session(self, **kwargs):
+        return CountingSession(self._driver.session(**kwargs), self.counter)
+
+    def close(self):
+        self._driver.close()
+
+
+def synthetic_analysis(n_thoughts: int, n_entities: int, tool_every: int = 4) -> dict:
+    """Build an analyzer-shaped result with a fixed fan-out per thought"""
+    types = ['observation', 'analysis', 'decision', 'action', 'reflection']
+    thoughts = []
+    for i in range(n_thoughts):
+        thoughts.append({
+            'content': f"Step {i}: check the forecast for city_{i % 7}",
+            'type': types[i % len(types)],
+            'entities': [f"bench_entity_{(i + j) % 50}" for j in range(n_entities)],
+            'tools_mentioned': [f"bench_tool_{i % 3}"] if i % tool_every == 0 else [],
+            'confidence': 0.8
+        })
+    relationships = [{
+        'source_thought': i,
+        'target_thought': i + 1,
+        'relationship': 'leads_to',
+        'strength': 0.9
+    } for i in range(n_thoughts - 1)]
+    return {
+        'thoughts': thoughts,
+        'relationships': relationships,
+        'reasoning_strategy': 'step_by_step',
+        'domain': 'weather',
+        'success_indicators': ['answered']
+    }
+
+
+def run_path(builder, analysis, sessions: int, bulk: bool) -> dict:
+    label = 'bulk' if bulk else 'legacy'
+    builder.driver.counter['round_trips'] = 0
+    start = time.perf_counter()
+    for i in range(sessions):
+        builder.add_thinking_session(f"bench_{label}_{i}", "synthetic benchmark trace",
+                                     analysis, overwrite=True, bulk=bulk)
+    elapsed = time.perf_counter() - start
+    return {
+        'path': label,
+        'round_trips_per_session': builder.driver.counter['round_trips'] / sessions,
+        'ms_per_session': elapsed * 1000 / sessions
+    }
+
+
+def cleanup(builder):
+    """Delete the benchmark sessions through delete_session
+
+    A raw DETACH DELETE would skip the pattern-aggregate decrement and leave
+    StrategyStats/SuccessPatternStats counts and bench_tool_* ToolUsageStats
+    behind; delete_session also collects the orphaned entities and tools.
+    """
+    with builder.driver.session() as session:
+        session_ids = [record['id'] for record in session.run(
+            "MATCH (s:Session) WHERE s.id STARTS WITH 'bench_' RETURN s.id AS id"
+        )]
+    for session_id in session_ids:
+        builder.delete_session(session_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--thoughts', type=int, default=60)
+    parser.add_argument('--entities', type=int, default=5)
+    args = parser.parse_args()
+
+    builder = KnowledgeGraphBuilder(os.getenv('NEO4J_URI'), os.getenv('NEO4J_USER'),
+                                    os.getenv('NEO4J_PASSWORD'))
+    builder.driver = CountingDriver(builder.driver)
+    analysis = synthetic_analysis(args.thoughts, args.entities)
+
+    try:
+        cleanup(builder)
+        for bulk in (False, True):
+            stats = run_path(builder, analysis, args.sessions, bulk)
+            print(f"{stats['path']:>6}: {stats['round_trips_per_session']:.0f} round trips/session, "
+                  f"{stats['ms_per_session']:.1f} ms/session")
+    finally:
+        cleanup(builder)
+        builder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare the regex fallback analysis with the local extraction engine.
+
+Builds a synthetic corpus of short agent traces and analyzes every trace
+with ``ThinkingAnalyzer._fallback_analysis`` and with ``LocalExtractor``
+on one core, reporting traces/sec and average entities per thought.
+
+    python benchmarks/bench_local_extraction.py --traces 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+
+from local_extraction import LocalExtractor, ToolLexicon  # noqa: E402
+from main import ThinkingAnalyzer  # noqa: E402
+
+SENTENCES = [
+    "The user wants the weather in {city}",
+    "I notice the request has no date, so I will assume today",
+    "I should call the WeatherAPI with location='{city}'",
+    "Maybe the default_api is the better choice here",
+    "The response from get_forecast() shows {n} degrees and light rain",
+    "Let me verify the units with the ConversionService",
+    "Actually, that was wrong; the value is in Fahrenheit",
+    "I will run grep over the logs to identify the failing request_id",
+    "Clearly the parse_config step succeeded and the cache.lookup call returned {n} rows",
+    "Next I decide whether to retry the SearchTool or stop",
+]
+
+CITIES = ['Paris', 'New York', 'Tokyo', 'Buenos Aires', 'Lagos', 'Oslo']
+
+
+def synthetic_traces(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    traces = []
+    for _ in range(count):
+        sentences = rng.choices(SENTENCES, k=rng.randint(4, 12))
+        traces.append(". ".join(s.format(city=rng.choice(CITIES), n=rng.randint(0, 40))
+                                for s in sentences) + ".")
+    return traces
+
+
+def run(name, analyze, traces):
+    start = time.perf_counter()
+    results = [analyze(trace) for trace in traces]
+    elapsed = time.perf_counter() - start
+    thoughts = sum(len(r['thoughts']) for r in results)
+    entities = sum(len(t['entities']) for r in results for t in r['thoughts'])
+    print(f"{name:<18}: {elapsed:6.3f}s, {len(traces) / elapsed:8.0f} traces/s, "
+          f"{entities / max(thoughts, 1):.1f} entities/thought")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--traces', type=int, default=5000)
+    args = parser.parse_args()
+
+    traces = synthetic_traces(args.traces)
+    analyzer = ThinkingAnalyzer(chunk_chars=0)
+    extractor = LocalExtractor(ToolLexicon(names=['grep']))
+
+    print(f"{len(traces)} traces, {sum(len(t) for t in traces) / len(traces):.0f} chars on average")
+    fallback = run("_fallback_analysis", analyzer._fallback_analysis, traces)
+    local = run("LocalExtractor", extractor.analyze, traces)
+    print(f"LocalExtractor is {fallback / local:.1f}x the fallback")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Bulk analysis through a flaky model, with and without the model client layer.
+
+``FakeModel`` answers with the local extractor's analysis after a fixed
+latency, fails a share of calls with 429s, and between ``--outage-start``
+and ``--outage-start + --outage-seconds`` hangs for ``--hang-seconds``
+before failing with 503. The same traces are analyzed on ``--workers``
+threads, arriving at ``--rate`` per second, by a ThinkingAnalyzer calling
+the fake directly (as before) and one calling it through ModelClient,
+reporting wall time, per-trace p50/p99 latency, model attempts and how
+each analysis was produced.
+
+    python benchmarks/bench_model_client.py --traces 1500 --workers 16
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from google.api_core import exceptions as google_exceptions  # noqa: E402
+
+from bench_local_extraction import synthetic_traces  # noqa: E402
+from local_extraction import LocalExtractor  # noqa: E402
+from log_config import configure_logging  # noqa: E402
+from main import ANALYSIS_PROMPT, ThinkingAnalyzer  # noqa: E402
+from model_client import ModelClient, ModelClientSettings  # noqa: E402
+
+PROMPT_PREFIX, PROMPT_SUFFIX = ANALYSIS_PROMPT.format(thinking_text='\x00').split('\x00')
+
+
+class FakeModel:
+    """Model stand-in with injected latency, 429s and a timed outage"""
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.05, outage_start: float = 1.0,
+                 outage_seconds: float = 3.0, hang_seconds: float = 5.0, seed: int = 7):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.outage_start = outage_start
+        self.outage_seconds = outage_seconds
+        self.hang_seconds = hang_seconds
+        self.extractor = LocalExtractor()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.calls = 0
+
+    def start(self):
+        self.started = time.monotonic()
+
+    def _fault(self):
+        with self.lock:
+            self.calls += 1
+            roll = self.rng.random()
+        elapsed = time.monotonic() - self.started
+        if self.outage_start <= elapsed < self.outage_start + self.outage_seconds:
+            return 'outage'
+        return '429' if roll < self.error_rate else None
+
+    def _respond(self, prompt: str):
+        text = prompt[len(PROMPT_PREFIX):len(prompt) - len(PROMPT_SUFFIX)]
+        return type('Response', (), {'text': json.dumps(self.extractor.analyze(text))})()
+
+    def generate_content(self, prompt: str):
+        fault = self._fault()
+        if fault == 'outage':
+            time.sleep(self.hang_seconds)
+            raise google_exceptions.ServiceUnavailable("model overloaded")
+        time.sleep(self.latency)
+        if fault == '429':
+            raise google_exceptions.ResourceExhausted("quota exceeded")
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str):
+        import asyncio
+
+        fault = self._fault()
+        if fault == 'outage':
+            await asyncio.sleep(self.hang_seconds)
+            raise google_exceptions.ServiceUnavailable("model overloaded")
+        await asyncio.sleep(self.latency)
+        if fault == '429':
+            raise google_exceptions.ResourceExhausted("quota exceeded")
+        return self._respond(prompt)
+
+
+def run(name, analyzer, model, traces, workers, rate):
+    def timed(index_trace):
+        index, trace = index_trace
+        # Arrivals are paced; a trace waiting for a free thread counts as latency
+        arrival = start + index / rate
+        time.sleep(max(0.0, arrival - time.perf_counter()))
+        analyzer.analyze_thinking_text(trace)
+        return time.perf_counter() - arrival
+
+    model.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = sorted(pool.map(timed, enumerate(traces)))
+    elapsed = time.perf_counter() - start
+
+    paths = analyzer.path_stats.as_dict()
+    print(f"{name:<7}: {elapsed:6.2f}s, {len(traces) / elapsed:6.1f} traces/s, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:6.0f}ms, "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:6.0f}ms, "
+          f"{model.calls} model calls")
+    print("         " + ", ".join(f"{path} {paths[path]}" for path in ('valid', 'degraded', 'fallback')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--traces', type=int, default=1500)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=200.0, help="traces arriving per second")
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--outage-start', type=float, default=0.5)
+    parser.add_argument('--outage-seconds', type=float, default=3.0)
+    parser.add_argument('--hang-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    configure_logging()
+
+    traces = synthetic_traces(args.traces, seed=13)
+
+    def fake():
+        return FakeModel(args.latency_ms / 1000, args.error_rate, args.outage_start,
+                         args.outage_seconds, args.hang_seconds)
+
+    print(f"{len(traces)} traces at {args.rate:.0f}/s on {args.workers} threads; {args.error_rate:.0%} 429s, outage "
+          f"from {args.outage_start}s for {args.outage_seconds}s with {args.hang_seconds}s hangs")
+
+    direct = ThinkingAnalyzer(chunk_chars=0)
+    direct.model = fake()
+    run("direct", direct, direct.model, traces, args.workers, args.rate)
+
+    model = fake()
+    client = ThinkingAnalyzer(chunk_chars=0)
+    client.model = ModelClient(model, ModelClientSettings(
+        timeout_seconds=1.0, max_attempts=3, backoff_seconds=0.05, backoff_max_seconds=0.5,
+        max_concurrency=args.workers, breaker_threshold=5, breaker_reset_seconds=1.0
+    ))
+    run("client", client, model, traces, args.workers, args.rate)
+    print("         " + json.dumps(client.model.stats()))
+
+
+if __name__ == "__main__":
+    main()
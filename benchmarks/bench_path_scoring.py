@@ -0,0 +1,77 @@
+"""Compare scalar score_path calls with score_paths_batch over a synthetic corpus.
+
+Builds random per-thought features for many sessions, scores them once per
+session with ``score_path`` and once with the vectorized batch scorer, checks
+the scores are equal and reports timings.
+
+    python benchmarks/bench_path_scoring.py --sessions 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from path_scoring import PathFeatures, ScoringWeights, score_path, score_paths_batch  # noqa: E402
+
+
+def synthetic_features(sessions: int, seed: int = 11) -> PathFeatures:
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 40, size=sessions)
+    offsets = np.zeros(sessions + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    thoughts = int(offsets[-1])
+    return PathFeatures(
+        session_ids=[f"session_{i}" for i in range(sessions)],
+        offsets=offsets,
+        confidences=rng.random(thoughts),
+        mistake_flags=rng.random(thoughts) < 0.1,
+        backtrack_cues=rng.random(thoughts) < 0.05,
+        implicit_issue_counts=rng.integers(0, 3, size=thoughts) * (rng.random(thoughts) < 0.1),
+        efficiency_scores=rng.random(sessions),
+        success_counts=rng.integers(0, 4, size=sessions),
+        tool_counts=rng.integers(0, 6, size=sessions)
+    )
+
+
+def scalar_scores(features: PathFeatures, weights: ScoringWeights) -> list:
+    mistakes = features.mistake_counts()
+    backtracks = features.backtrack_counts()
+    implicit = features.implicit_issue_totals()
+    scores = []
+    for i in range(len(features.session_ids)):
+        start, end = features.offsets[i], features.offsets[i + 1]
+        scores.append(score_path(features.confidences[start:end].tolist(), int(mistakes[i]),
+                                 int(backtracks[i]), int(features.success_counts[i]),
+                                 int(features.tool_counts[i]), int(implicit[i]),
+                                 float(features.efficiency_scores[i]), weights))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100000)
+    args = parser.parse_args()
+
+    features = synthetic_features(args.sessions)
+    weights = ScoringWeights(mistake_penalty=0.25, implicit_penalty=0.05)
+
+    start = time.perf_counter()
+    scalar = scalar_scores(features, weights)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_paths_batch(features, weights)
+    batch_time = time.perf_counter() - start
+
+    assert np.array_equal(np.asarray(scalar), batch), "batch scores differ from score_path"
+    print(f"{args.sessions} sessions, {len(features.confidences)} thoughts, scores identical")
+    print(f"score_path loop   : {scalar_time:6.3f}s")
+    print(f"score_paths_batch : {batch_time:6.3f}s ({scalar_time / batch_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Time reasoning-path record extraction: per-session tool queries vs one aggregated pass.
+
+Seeds synthetic sessions (ids prefixed ``bench_path_``) into the Neo4j instance
+configured in .env, then measures the old N+1 pattern (session query plus one
+``_get_session_tools`` query per session) against
+``OptimalReasoningAnalyzer.fetch_session_records``, the read
+``extract_reasoning_paths`` runs. Run it against an otherwise
+empty database so the session counts are exact. Seeded data is removed at the
+end.
+
+    python benchmarks/bench_reasoning_paths.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+
+from analyzer import OptimalReasoningAnalyzer  # noqa: E402
+
+SEED_BATCH = 2000
+THOUGHTS_PER_SESSION = 6
+
+
+def seed_sessions(driver, start: int, stop: int):
+    """Create sessions [start, stop) with a few thoughts and tools each"""
+    types = ['observation', 'analysis', 'decision', 'action', 'reflection']
+    for batch_start in range(start, stop, SEED_BATCH):
+        rows = [{
+            'id': f"bench_path_{i}",
+            'thoughts': [{
+                'id': f"bench_path_{i}_thought_{j}",
+                'content': f"Maybe I should call weather_api for city {j}",
+                'type': types[j % len(types)],
+                'order': j,
+                'tool': f"bench_tool_{(i + j) % 5}" if j % 2 == 0 else None
+            } for j in range(THOUGHTS_PER_SESSION)]
+        } for i in range(batch_start, min(batch_start + SEED_BATCH, stop))]
+
+        with driver.session() as session:
+            session.run("""
+                UNWIND $rows AS row
+                CREATE (s:Session {id: row.id, reasoning_strategy: 'step_by_step',
+                                   domain: 'weather', success_indicators: ['done']})
+                WITH s, row
+                UNWIND row.thoughts AS tr
+                CREATE (s)-[:CONTAINS]->(t:Thought {id: tr.id, content: tr.content, type: tr.type,
+                                                    confidence: 0.8, sequence_order: tr.order,
+                                                    session_id: row.id})
+                WITH t, tr WHERE tr.tool IS NOT NULL
+                MERGE (tool:Tool {name: tr.tool})
+                CREATE (t)-[:USES_TOOL]->(tool)
+            """, rows=rows).consume()
+
+
+def legacy_records(analyzer):
+    """The pre-aggregation access pattern: one query for sessions, one per session for tools"""
+    with analyzer.driver.session() as session:
+        result = session.run("""
+            MATCH (s:Session)-[:CONTAINS]->(t:Thought)
+            WITH s, t ORDER BY t.sequence_order
+            RETURN s.id as session_id,
+                   collect(t.content) as thoughts,
+                   collect(t.type) as thought_types,
+                   collect(t.confidence) as confidences
+        """)
+        for record in result:
+            data = record.data()
+            data['tools'] = analyzer._get_session_tools(data['session_id'])
+            yield data
+
+
+def timed(records) -> tuple:
+    start = time.perf_counter()
+    count = sum(1 for _ in records)
+    return count, time.perf_counter() - start
+
+
+def cleanup(driver):
+    with driver.session() as session:
+        session.run("""
+            MATCH (s:Session) WHERE s.id STARTS WITH 'bench_path_'
+            CALL {
+                WITH s
+                OPTIONAL MATCH (s)-[:CONTAINS]->(t:Thought)
+                DETACH DELETE s, t
+            } IN TRANSACTIONS OF 1000 ROWS
+        """).consume()
+        session.run("MATCH (tool:Tool) WHERE tool.name STARTS WITH 'bench_tool_' DETACH DELETE tool").consume()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help="skip the N+1 path above this many sessions")
+    args = parser.parse_args()
+
+    analyzer = OptimalReasoningAnalyzer()
+    seeded = 0
+    try:
+        cleanup(analyzer.driver)
+        for size in sorted(args.sizes):
+            seed_sessions(analyzer.driver, seeded, size)
+            seeded = size
+
+            count, aggregated = timed(analyzer.fetch_session_records())
+            line = f"{count:>7} sessions: aggregated {aggregated:8.2f}s"
+            if size <= args.legacy_limit:
+                _, legacy = timed(legacy_records(analyzer))
+                line += f" | N+1 {legacy:8.2f}s ({legacy / aggregated:.1f}x)"
+            print(line)
+    finally:
+        cleanup(analyzer.driver)
+        analyzer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Per-request CPU time of /process_message's response building, before and after ThinkingResult.
+
+The knowledge graph is replaced by a stand-in whose process_thinking parses
+a canned fenced Gemini response with ``ThinkingAnalyzer._parse_response``
+(or runs ``_fallback_analysis``) and skips the Neo4j write. ``server.run_message``
+then builds the response body from the parsed analysis. The "legacy" path
+is the previous server code, which stripped the fences from the raw text and
+parsed it a second time; on the fallback path there is no JSON to parse, so
+every legacy request fails.
+
+    python benchmarks/bench_request_parsing.py --requests 2000 --thoughts 20 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import main as kg_main  # noqa: E402
+from bench_local_extraction import synthetic_traces  # noqa: E402
+from local_extraction import LocalExtractor  # noqa: E402
+
+
+class ParsingKG:
+    """process_thinking without the model call or the graph write"""
+
+    def __init__(self, raw_llm_response: str, fallback: bool = False):
+        self.analyzer = kg_main.ThinkingAnalyzer(chunk_chars=0)
+        self.raw_llm_response = raw_llm_response
+        self.fallback = fallback
+
+    def process_thinking(self, thinking_text: str, session_id: str = None, overwrite: bool = True):
+        if self.fallback:
+            analysis, raw = self.analyzer._fallback_analysis(thinking_text), ""
+        else:
+            analysis, raw = self.analyzer._parse_response(self.raw_llm_response)
+        return kg_main.ThinkingResult(session_id or "bench", analysis, raw, thinking_text)
+
+
+def legacy_run_message(kg, message: str) -> dict:
+    """The response building server.run_message did before ThinkingResult"""
+    session_id, raw_llm_response, thinking_text = kg.process_thinking(message)
+
+    cleaned_llm_response = raw_llm_response.strip()
+    if cleaned_llm_response.startswith('```json'):
+        cleaned_llm_response = cleaned_llm_response[7:-3].strip()
+    elif cleaned_llm_response.startswith('```'):
+        cleaned_llm_response = cleaned_llm_response[3:-3].strip()
+    llm_thinking_data = json.loads(cleaned_llm_response)
+
+    llm_response_content = "No response generated"
+    if 'thoughts' in llm_thinking_data and llm_thinking_data['thoughts']:
+        llm_response_content = llm_thinking_data['thoughts'][-1].get('content', "No response content found")
+    return {'response': llm_response_content, 'session_id': session_id, 'thinking_trace': raw_llm_response}
+
+
+def measure(run, message: str, requests: int):
+    """(mean CPU microseconds per request, failed requests)"""
+    failures = 0
+    start = time.thread_time()
+    for _ in range(requests):
+        try:
+            run(message)
+        except Exception:
+            failures += 1
+    return (time.thread_time() - start) / requests * 1e6, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--thoughts', type=int, nargs='+', default=[20, 200])
+    args = parser.parse_args()
+
+    # server.py builds an AgentThinkingKG at import; hand it the stand-in instead
+    real = kg_main.AgentThinkingKG
+    kg_main.AgentThinkingKG = lambda: None
+    try:
+        import server
+    finally:
+        kg_main.AgentThinkingKG = real
+
+    extractor = LocalExtractor()
+    for thoughts in args.thoughts:
+        # Roughly `thoughts` sentences, analyzed into the shape Gemini returns
+        trace = " ".join(synthetic_traces(max(1, thoughts // 8), seed=thoughts))
+        analysis = extractor.analyze(trace)
+        raw = "```json\n" + json.dumps(analysis, indent=2) + "\n```"
+        print(f"{len(analysis['thoughts'])} thoughts, {len(raw)} byte response")
+
+        for path, kg in (("llm", ParsingKG(raw)), ("fallback", ParsingKG(raw, fallback=True))):
+            server.kg_system = kg
+            legacy, legacy_failed = measure(lambda m: legacy_run_message(kg, m), trace, args.requests)
+            current, current_failed = measure(server.run_message, trace, args.requests)
+            print(f"  {path:<8}: legacy {legacy:8.1f}us/request ({legacy_failed} failed), "
+                  f"ThinkingResult {current:8.1f}us/request ({current_failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compare how often malformed model responses fall back, before and after validation and repair.
+
+A stand-in model answers with the local extractor's analysis of the prompt
+text, damaged at the given rates the way Gemini responses go wrong: prose
+around the fence, trailing commas, missing fields, truncation part way
+through, and (rarely) no JSON at all. Each trace is analyzed with
+``ThinkingAnalyzer`` and with the previous strip-and-json.loads parser,
+reporting the path every response took, fallbacks, retry calls and the
+share of thoughts recovered.
+
+    python benchmarks/bench_response_repair.py --traces 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from bench_local_extraction import synthetic_traces  # noqa: E402
+from local_extraction import LocalExtractor  # noqa: E402
+from log_config import configure_logging  # noqa: E402
+from main import ANALYSIS_PROMPT, ThinkingAnalyzer  # noqa: E402
+
+PROMPT_PREFIX, PROMPT_SUFFIX = ANALYSIS_PROMPT.format(thinking_text='\x00').split('\x00')
+
+DAMAGE_RATES = {
+    'prose': 0.10,
+    'trailing_commas': 0.05,
+    'missing_fields': 0.05,
+    'truncated': 0.08,
+    'garbage': 0.01,
+}
+
+
+class DamagingModel:
+    """Model stand-in returning the local analysis as fenced JSON, damaged at random"""
+
+    def __init__(self, rates, seed: int = 3):
+        self.rates = rates
+        self.extractor = LocalExtractor()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def damage(self):
+        with self.lock:
+            self.calls += 1
+            roll = self.rng.random()
+            cut = self.rng.random()
+        for kind, rate in self.rates.items():
+            if roll < rate:
+                return kind, cut
+            roll -= rate
+        return None, cut
+
+    def generate_content(self, prompt: str):
+        text = prompt[len(PROMPT_PREFIX):len(prompt) - len(PROMPT_SUFFIX)]
+        analysis = self.extractor.analyze(text)
+        kind, cut = self.damage()
+        body = json.dumps(analysis, indent=2)
+        if kind == 'prose':
+            body = "Here is the analysis:\n```json\n" + body + "\n```\nLet me know if you need more."
+        elif kind == 'trailing_commas':
+            body = body.replace('\n  ]', ',\n  ]')
+        elif kind == 'missing_fields':
+            for thought in analysis['thoughts']:
+                thought.pop('tools_mentioned', None)
+                thought['confidence'] = str(thought['confidence'])
+            body = json.dumps(analysis, indent=2)
+        elif kind == 'truncated':
+            body = body[:int(len(body) * (0.3 + 0.6 * cut))]
+        elif kind == 'garbage':
+            body = "I'm sorry, I can't produce that."
+        if kind != 'prose':
+            body = "```json\n" + body + ("\n```" if kind != 'truncated' else "")
+        return type('Response', (), {'text': body})()
+
+
+def legacy_parse(raw_text: str):
+    """The parser before validation: strip a leading fence and json.loads"""
+    response_text = raw_text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text[7:-3]
+    elif response_text.startswith('```'):
+        response_text = response_text[3:-3]
+    analysis = json.loads(response_text)
+    # Missing fields used to pass parsing and fail later in the graph write
+    for thought in analysis['thoughts']:
+        for key in ('content', 'type', 'entities', 'tools_mentioned', 'confidence'):
+            thought[key]
+    return analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--traces', type=int, default=2000)
+    args = parser.parse_args()
+    configure_logging()
+
+    traces = synthetic_traces(args.traces, seed=11)
+    extractor = LocalExtractor()
+    expected = sum(len(extractor.analyze(trace)['thoughts']) for trace in traces)
+
+    legacy_model = DamagingModel(DAMAGE_RATES)
+    legacy_fallbacks, legacy_thoughts = 0, 0
+    start = time.perf_counter()
+    for trace in traces:
+        try:
+            legacy_thoughts += len(legacy_parse(legacy_model.generate_content(
+                ANALYSIS_PROMPT.format(thinking_text=trace)).text)['thoughts'])
+        except Exception:
+            legacy_fallbacks += 1
+    legacy_elapsed = time.perf_counter() - start
+
+    analyzer = ThinkingAnalyzer(chunk_chars=0)
+    analyzer.model = DamagingModel(DAMAGE_RATES)
+    recovered = 0
+    start = time.perf_counter()
+    for trace in traces:
+        analysis, raw = analyzer.analyze_thinking_text(trace)
+        if raw:
+            recovered += len(analysis['thoughts'])
+    elapsed = time.perf_counter() - start
+
+    stats = analyzer.path_stats.as_dict()
+    print(f"{len(traces)} traces, damage rates {DAMAGE_RATES}")
+    print(f"legacy   : {legacy_fallbacks} fallbacks ({legacy_fallbacks / len(traces):.1%}), "
+          f"{legacy_thoughts / expected:.1%} of thoughts from the model, "
+          f"{legacy_model.calls} model calls, {legacy_elapsed * 1e6 / len(traces):.0f}us/trace")
+    print(f"validated: {stats['fallback']} fallbacks ({stats['fallback_rate']:.1%}), "
+          f"{recovered / expected:.1%} of thoughts from the model, "
+          f"{analyzer.model.calls} model calls ({stats['retry_calls']} tail retries), "
+          f"{elapsed * 1e6 / len(traces):.0f}us/trace")
+    print("paths    : " + ", ".join(f"{path} {stats[path]}" for path in
+                                    ('valid', 'repaired', 'retried', 'partial', 'fallback')))
+
+
+if __name__ == "__main__":
+    main()
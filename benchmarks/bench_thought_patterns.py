@@ -0,0 +1,126 @@
+"""Micro-benchmark: per-pattern re.search loops vs the single-pass pattern engine.
+
+Builds a synthetic corpus of agent thoughts, counts every phrase category with
+the original loops (one ``re.search`` per pattern, plus three ``re.findall``
+passes for the efficiency words) and with ``PatternSetMatcher`` /
+``WordGroupCounter``, checks the counts are identical, and reports timings.
+"cold" disables the per-text memo, "warm" is a second pass over the same
+corpus, which is what re-scoring the stored sessions looks like.
+
+    python benchmarks/bench_thought_patterns.py --thoughts 100000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from reasoning_patterns import (  # noqa: E402
+    ANALYSIS_PARALYSIS_PATTERNS,
+    CIRCULAR_REASONING_PATTERNS,
+    CONFIDENCE_PATTERNS,
+    EFFICIENCY_WORD_GROUPS,
+    MISTAKE_PATTERNS,
+    OVERTHINKING_PATTERNS,
+    UNCERTAINTY_PATTERNS,
+    PatternSetMatcher,
+    WordGroupCounter,
+)
+
+PATTERN_SETS = {
+    'mistake': MISTAKE_PATTERNS,
+    'uncertainty': UNCERTAINTY_PATTERNS,
+    'confidence': CONFIDENCE_PATTERNS,
+    'overthinking': OVERTHINKING_PATTERNS,
+    'circular_reasoning': CIRCULAR_REASONING_PATTERNS,
+    'analysis_paralysis': ANALYSIS_PARALYSIS_PATTERNS
+}
+
+SUBJECTS = ["the user", "default_api", "the weather service", "the forecast for London",
+            "get_current_weather", "the temperature in Paris", "the city parameter"]
+VERBS = ["needs", "returns", "should call", "will check", "might use", "could be asking about",
+         "is missing", "has to validate", "was already queried for"]
+PHRASES = ["Actually,", "Wait,", "No, ", "Maybe", "Perhaps", "I think", "Clearly", "However,",
+           "On the other hand,", "But then again,", "Just to make sure,", "To be safe,",
+           "Back to the question,", "I should first", "Oops,", "Alternatively,", "Let me reconsider:",
+           "It might just be that", "I'm not sure, but", "Obviously", "Again,", "unless I've missed it"]
+ENDINGS = [".", "?", "!", " again.", " to be safe.", "", " - that's not right.", " if needed."]
+
+
+def legacy_counts(thought: str) -> dict:
+    """The original per-pattern loop from analyze_thought_quality"""
+    content_lower = thought.lower()
+    return {category: sum(1 for pattern in patterns if re.search(pattern, content_lower))
+            for category, patterns in PATTERN_SETS.items()}
+
+
+def legacy_word_counts(text: str) -> dict:
+    """The original three findall passes from analyze_reasoning_efficiency"""
+    return {
+        'decision': len(re.findall(r'\b(will|should|must|need to|going to|decide)\b', text.lower())),
+        'analysis': len(re.findall(r'\b(consider|maybe|perhaps|might|could|possibly|alternatively)\b',
+                                   text.lower())),
+        'conditional': len(re.findall(r'\b(if|unless|although|however|but)\b', text.lower()))
+    }
+
+
+def make_corpus(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        parts = []
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.5:
+                parts.append(rng.choice(PHRASES))
+            parts.append(f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(SUBJECTS)}")
+        corpus.append(" ".join(parts) + rng.choice(ENDINGS))
+    # Edge cases: overlapping phrases, mixed case and unusual whitespace
+    corpus += ["MIGHT JUST BE again", "piano\tkeys, no\nmore", "but then again but what if",
+               "That's not right, I was wrong", "or maybe I should first wait"]
+    return corpus
+
+
+def timed(fn, items) -> tuple:
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--thoughts', type=int, default=100000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.thoughts)
+
+    legacy, legacy_time = timed(legacy_counts, corpus)
+
+    cold_matcher = PatternSetMatcher(PATTERN_SETS, cache_size=0)
+    cold, cold_time = timed(lambda t: cold_matcher.count(t.lower()), corpus)
+
+    warm_matcher = PatternSetMatcher(PATTERN_SETS, cache_size=len(corpus))
+    timed(lambda t: warm_matcher.count(t.lower()), corpus)
+    warm, warm_time = timed(lambda t: warm_matcher.count(t.lower()), corpus)
+
+    sessions = [" ".join(corpus[i:i + 20]) for i in range(0, len(corpus), 20)]
+    counter = WordGroupCounter(EFFICIENCY_WORD_GROUPS)
+    legacy_words, legacy_words_time = timed(legacy_word_counts, sessions)
+    words, words_time = timed(lambda t: counter.count(t.lower()), sessions)
+
+    assert cold == legacy, "single-pass counts differ from the per-pattern loop"
+    assert warm == legacy, "memoized counts differ from the per-pattern loop"
+    assert words == legacy_words, "efficiency word counts differ from the findall passes"
+
+    print(f"{len(corpus)} thoughts, results identical")
+    print(f"per-pattern loop : {legacy_time:6.2f}s")
+    print(f"single pass cold : {cold_time:6.2f}s ({legacy_time / cold_time:.1f}x)")
+    print(f"single pass warm : {warm_time:6.2f}s ({legacy_time / warm_time:.1f}x)")
+    print(f"efficiency words : {legacy_words_time:6.2f}s -> {words_time:6.2f}s "
+          f"({legacy_words_time / words_time:.1f}x) over {len(sessions)} sessions")
+
+
+if __name__ == "__main__":
+    main()
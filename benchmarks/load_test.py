@@ -0,0 +1,151 @@
+"""Load-test POST /process_message and report latency percentiles and requests/sec.
+
+By default server.py is served in-process by a threaded Werkzeug server with
+the knowledge graph replaced by a mock: each request sleeps for the model
+latency, runs the local extractor, then sleeps for the Neo4j write. Point
+--url at a running server to measure it instead, e.g. gunicorn serving the
+same mock:
+
+    python benchmarks/load_test.py --requests 2000 --concurrency 32
+    MOCK_LLM_MS=200 gunicorn -c gunicorn.conf.py --chdir benchmarks 'load_test:mock_app()'
+    python benchmarks/load_test.py --url http://127.0.0.1:6969 --requests 2000 --concurrency 32
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-benchmark')
+os.environ.setdefault('NEO4J_URI', 'bolt://127.0.0.1:7687')
+os.environ.setdefault('NEO4J_USER', 'neo4j')
+os.environ.setdefault('NEO4J_PASSWORD', 'unused-by-benchmark')
+
+from local_extraction import LocalExtractor  # noqa: E402
+from main import ThinkingResult  # noqa: E402
+
+MESSAGE = (
+    "The user wants the weather in Paris. I should call the WeatherAPI with location='Paris'. "
+    "The response shows 18 degrees and light rain. Let me verify the units with the ConversionService. "
+    "The default_api returns metric units, so the answer is consistent."
+)
+
+
+class MockKG:
+    """Stands in for AgentThinkingKG.process_thinking with fixed model and Neo4j latencies"""
+
+    def __init__(self, llm_seconds: float, neo4j_seconds: float):
+        self.llm_seconds = llm_seconds
+        self.neo4j_seconds = neo4j_seconds
+        self.extractor = LocalExtractor()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def process_thinking(self, thinking_text: str, session_id: str = None, overwrite: bool = True):
+        with self._lock:
+            self._count += 1
+            session_id = session_id or f"load_{self._count}"
+        time.sleep(self.llm_seconds)
+        analysis = self.extractor.analyze(thinking_text)
+        raw_llm_response = json.dumps(analysis)
+        time.sleep(self.neo4j_seconds)
+        return ThinkingResult(session_id, analysis, raw_llm_response, thinking_text,
+                              analyze_seconds=self.llm_seconds, write_seconds=self.neo4j_seconds)
+
+
+def mock_app(llm_ms: float = None, neo4j_ms: float = None):
+    """server.app backed by MockKG; latencies default to MOCK_LLM_MS and MOCK_NEO4J_MS"""
+    import main
+
+    llm_ms = float(os.getenv('MOCK_LLM_MS', 200)) if llm_ms is None else llm_ms
+    neo4j_ms = float(os.getenv('MOCK_NEO4J_MS', 20)) if neo4j_ms is None else neo4j_ms
+    mock = MockKG(llm_ms / 1000, neo4j_ms / 1000)
+
+    # server.py builds its AgentThinkingKG at import, which would connect to Neo4j
+    real = main.AgentThinkingKG
+    main.AgentThinkingKG = lambda: mock
+    try:
+        import server
+    finally:
+        main.AgentThinkingKG = real
+    server.kg_system = mock
+    return server.app
+
+
+def serve_in_thread(app, port: int = 0):
+    """Threaded Werkzeug server on a daemon thread; returns it with its base URL"""
+    from werkzeug.serving import make_server
+
+    httpd = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_port}"
+
+
+def run_load(url: str, total: int, concurrency: int, message: str = MESSAGE):
+    """Send ``total`` requests from ``concurrency`` threads; returns (latencies, errors, elapsed)"""
+    local = threading.local()
+
+    def one(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = local.session.post(f"{url}/process_message", json={'message': message}, timeout=60)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, ok in results if ok)
+    return latencies, sum(1 for _, ok in results if not ok), elapsed
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="base URL of a running server (default: in-process mock)")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--llm-ms', type=float, default=200.0, help="mock model latency")
+    parser.add_argument('--neo4j-ms', type=float, default=20.0, help="mock Neo4j write latency")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        app = mock_app(args.llm_ms, args.neo4j_ms)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        httpd, url = serve_in_thread(app)
+        print(f"In-process mock server on {url} (model {args.llm_ms:.0f}ms, Neo4j {args.neo4j_ms:.0f}ms)")
+
+    run_load(url, min(args.concurrency, args.requests), args.concurrency)  # warm up connections
+    latencies, errors, elapsed = run_load(url, args.requests, args.concurrency)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: "
+          f"{args.requests / elapsed:.1f} req/s, {errors} errors")
+    if latencies:
+        print(f"latency ms: p50 {percentile(latencies, 0.50) * 1000:.1f}, "
+              f"p90 {percentile(latencies, 0.90) * 1000:.1f}, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f}, "
+              f"mean {statistics.fmean(latencies) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Serve a canned reasoning trace as a streaming chat completion.
+
+Speaks the OpenAI-style server-sent events that streaming.py consumes, one
+``data:`` event per token with a fixed delay, so streaming ingestion can be
+tried without an inference endpoint:
+
+    python benchmarks/mock_sse_server.py --port 8765 --delay-ms 30
+    FRIENDLI_URL=http://127.0.0.1:8765/v1/chat/completions python streaming.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TRACE = (
+    "<think>The user wants the weather in Paris. I notice the request names a city but no date. "
+    "I will assume they mean today. I should call the WeatherAPI with location='Paris'. "
+    "The response reports 18 degrees and light rain. Let me verify the units are Celsius. "
+    "The default_api returns metric units, so the answer is consistent.</think>\n\n"
+    "It is currently 18°C with light rain in Paris."
+)
+
+
+def tokenize(text: str):
+    """Word-ish pieces with their trailing whitespace, like streamed tokens"""
+    return re.findall(r'\S+\s*|\s+', text)
+
+
+def make_handler(trace: str, delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for token in tokenize(trace):
+                event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve_in_thread(trace: str = DEFAULT_TRACE, port: int = 0, delay: float = 0.03) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread; ``server.server_address`` has the port"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(trace, delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay-ms', type=float, default=30.0)
+    parser.add_argument('--trace-file', help="serve this file instead of the built-in trace")
+    args = parser.parse_args()
+
+    trace = DEFAULT_TRACE
+    if args.trace_file:
+        with open(args.trace_file) as f:
+            trace = f.read()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(trace, args.delay_ms / 1000))
+    print(f"Streaming {len(tokenize(trace))} tokens per request on "
+          f"http://127.0.0.1:{args.port}/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
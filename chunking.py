@@ -0,0 +1,215 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Paragraphs are separated by blank lines; sentences end in . ! or ? plus whitespace
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Once a chunk's first thought is matched to the previous chunk, each
+# following thought is looked for this many positions further on
+OVERLAP_SKIP = 3
+DUPLICATE_SIMILARITY = 0.8
+
+WORD = re.compile(r'\w+')
+
+
+@dataclass
+class TraceChunk:
+    """A slice ``text[start:end]`` of a trace; the first ``overlap`` characters repeat the previous chunk"""
+    index: int
+    start: int
+    end: int
+    overlap: int
+    text: str
+
+
+def _spans(text: str, pattern: re.Pattern, start: int, end: int) -> List[Tuple[int, int]]:
+    """Split text[start:end] on ``pattern`` into non-empty (start, end) spans"""
+    spans = []
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if text[position:match.start()].strip():
+            spans.append((position, match.start()))
+        position = match.end()
+    if text[position:end].strip():
+        spans.append((position, end))
+    return spans
+
+
+def _units(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """Paragraph spans, with paragraphs over ``max_chars`` broken into sentences
+    and sentences over ``max_chars`` cut into fixed-size pieces"""
+    units = []
+    for p_start, p_end in _spans(text, PARAGRAPH_BREAK, 0, len(text)):
+        if p_end - p_start <= max_chars:
+            units.append((p_start, p_end))
+            continue
+        for s_start, s_end in _spans(text, SENTENCE_END, p_start, p_end):
+            while s_end - s_start > max_chars:
+                units.append((s_start, s_start + max_chars))
+                s_start += max_chars
+            units.append((s_start, s_end))
+    return units
+
+
+def split_trace(text: str, max_chars: int = 12000, overlap_chars: int = 800) -> List[TraceChunk]:
+    """Split a trace into chunks of at most ``max_chars`` on paragraph or sentence boundaries
+
+    Each chunk after the first starts with the trailing units of the
+    previous one, up to ``overlap_chars``, so a thought that straddles a
+    boundary is seen whole by at least one chunk.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    overlap_chars = max(0, min(overlap_chars, max_chars // 2))
+    units = _units(text, max_chars)
+    if not units:
+        return []
+
+    chunks = []
+    first = 0
+    previous_first = 0
+    while first < len(units):
+        # Carry over trailing units of the previous chunk as overlap, never
+        # the whole previous chunk and never pushing the next unit past max_chars
+        carried = first
+        if chunks:
+            while (carried > previous_first + 1
+                   and units[first - 1][1] - units[carried - 1][0] <= overlap_chars
+                   and units[first][1] - units[carried - 1][0] <= max_chars):
+                carried -= 1
+        start = units[carried][0]
+
+        last = first
+        while last + 1 < len(units) and units[last + 1][1] - start <= max_chars:
+            last += 1
+        end = units[last][1]
+        overlap = units[first][0] - start if carried < first else 0
+
+        chunks.append(TraceChunk(index=len(chunks), start=start, end=end, overlap=overlap,
+                                 text=text[start:end]))
+        previous_first = carried
+        first = last + 1
+    return chunks
+
+
+def _words(text: str) -> set:
+    return set(WORD.findall(text.lower()))
+
+
+def _similar(a: str, b: str) -> bool:
+    words_a, words_b = _words(a), _words(b)
+    if not words_a or not words_b:
+        return a.strip().lower() == b.strip().lower()
+    return len(words_a & words_b) / len(words_a | words_b) >= DUPLICATE_SIMILARITY
+
+
+def _position_of(thought: Dict[str, Any], previous: Sequence[Dict[str, Any]], positions: Iterable[int]) -> Optional[int]:
+    """First position in ``positions`` whose thought in ``previous`` has the same content"""
+    content = thought.get('content', '')
+    for position in positions:
+        if _similar(content, previous[position].get('content', '')):
+            return position
+    return None
+
+
+def _majority(values: List[Tuple[str, int]], default: str) -> str:
+    """Most common value weighted by thought count; ties go to the earliest chunk"""
+    weights = Counter()
+    for value, weight in values:
+        if value:
+            weights[value] += max(weight, 1)
+    if not weights:
+        return default
+    best = max(weights.values())
+    return next(value for value, _ in values if weights.get(value) == best)
+
+
+def merge_chunk_analyses(chunks: Sequence[TraceChunk], analyses: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-chunk analyses into one analysis with global thought indices
+
+    Leading thoughts of a chunk that repeat a trailing thought of the
+    previous chunk (the overlap) are folded into it, so relationships the
+    model found from them become links across the chunk boundary. Where a
+    chunk has no such link, a ``leads_to`` edge joins the last thought of
+    the previous chunk to its first new thought.
+    """
+    thoughts: List[Dict[str, Any]] = []
+    relationships: List[Dict[str, Any]] = []
+    seen_edges = set()
+    strategies, domains = [], []
+    success_indicators: List[str] = []
+
+    def add_edge(source, target, relationship, strength):
+        key = (source, target, relationship)
+        if source == target or key in seen_edges:
+            return
+        seen_edges.add(key)
+        relationships.append({
+            "source_thought": source,
+            "target_thought": target,
+            "relationship": relationship,
+            "strength": strength
+        })
+
+    # Global indices and thoughts of the previous chunk, in chunk order
+    previous_indices: List[int] = []
+    previous_thoughts: List[Dict[str, Any]] = []
+    for chunk, analysis in zip(chunks, analyses):
+        chunk_thoughts = analysis.get('thoughts') or []
+        index_map: Dict[int, int] = {}
+        folded = set()
+
+        # Leading thoughts are matched in order: the first one from the end
+        # of the previous chunk backwards, each later one a little past the last match
+        position = None
+        for local_index, thought in enumerate(chunk_thoughts):
+            match = None
+            if chunk.overlap and previous_thoughts and len(folded) == local_index:
+                if position is None:
+                    candidates = range(len(previous_thoughts) - 1, -1, -1)
+                else:
+                    candidates = range(position + 1, min(position + 1 + OVERLAP_SKIP, len(previous_thoughts)))
+                match = _position_of(thought, previous_thoughts, candidates)
+            if match is not None:
+                position = match
+                index_map[local_index] = previous_indices[match]
+                folded.add(local_index)
+            else:
+                index_map[local_index] = len(thoughts)
+                thoughts.append(thought)
+
+        crosses_boundary = False
+        for relationship in analysis.get('relationships') or []:
+            source = index_map.get(relationship.get('source_thought'))
+            target = index_map.get(relationship.get('target_thought'))
+            if source is None or target is None:
+                continue
+            if (relationship.get('source_thought') in folded) != (relationship.get('target_thought') in folded):
+                crosses_boundary = True
+            add_edge(source, target, relationship.get('relationship', 'leads_to'),
+                     relationship.get('strength', 0.8))
+
+        new_indices = [index_map[i] for i in range(len(chunk_thoughts)) if i not in folded]
+        if previous_indices and new_indices and not crosses_boundary:
+            add_edge(previous_indices[-1], new_indices[0], 'leads_to', 0.8)
+
+        if chunk_thoughts:
+            previous_indices = [index_map[i] for i in range(len(chunk_thoughts))]
+            previous_thoughts = chunk_thoughts
+
+        strategies.append((analysis.get('reasoning_strategy'), len(new_indices)))
+        domains.append((analysis.get('domain'), len(new_indices)))
+        for indicator in analysis.get('success_indicators') or []:
+            if indicator not in success_indicators:
+                success_indicators.append(indicator)
+
+    return {
+        "thoughts": thoughts,
+        "relationships": relationships,
+        "reasoning_strategy": _majority(strategies, 'sequential'),
+        "domain": _majority(domains, 'general'),
+        "success_indicators": success_indicators
+    }
@@ -0,0 +1,181 @@
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from neo4j import GraphDatabase
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return float(value) if value else None
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection-pool options passed to GraphDatabase.driver"""
+    max_connection_pool_size: int = 100
+    connection_acquisition_timeout: float = 60.0
+    connection_timeout: float = 30.0
+    max_connection_lifetime: float = 3600.0
+    # Connections idle longer than this are pinged before being handed out
+    liveness_check_timeout: Optional[float] = 30.0
+    keep_alive: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        """Settings from NEO4J_* variables, falling back to the defaults above"""
+        defaults = cls()
+        return cls(
+            max_connection_pool_size=int(os.getenv('NEO4J_MAX_POOL_SIZE', defaults.max_connection_pool_size)),
+            connection_acquisition_timeout=_env_float('NEO4J_ACQUISITION_TIMEOUT',
+                                                      defaults.connection_acquisition_timeout),
+            connection_timeout=_env_float('NEO4J_CONNECTION_TIMEOUT', defaults.connection_timeout),
+            max_connection_lifetime=_env_float('NEO4J_MAX_CONNECTION_LIFETIME', defaults.max_connection_lifetime),
+            liveness_check_timeout=_env_float('NEO4J_LIVENESS_CHECK_TIMEOUT', defaults.liveness_check_timeout),
+            keep_alive=os.getenv('NEO4J_KEEP_ALIVE', 'true').lower() not in ('0', 'false', 'no')
+        )
+
+    def driver_kwargs(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TrackedSession:
+    """Session proxy that keeps its driver's session counters up to date"""
+
+    def __init__(self, session, owner: "SharedDriver"):
+        self._session = session
+        self._owner = owner
+        self._open = True
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self._session.__exit__(*exc)
+        finally:
+            self._release()
+
+    def close(self):
+        try:
+            self._session.close()
+        finally:
+            self._release()
+
+    def _release(self):
+        if self._open:
+            self._open = False
+            self._owner._session_closed()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class SharedDriver:
+    """A registry-owned neo4j driver.
+
+    ``close()`` drops one reference; the underlying driver is closed when
+    the last holder closes it. ``session()`` hands out tracked sessions so
+    ``stats()`` can report how the pool is being used. Everything else is
+    forwarded to the wrapped driver.
+    """
+
+    def __init__(self, driver, key: Tuple, settings: PoolSettings):
+        self._driver = driver
+        self._key = key
+        self.settings = settings
+        self.references = 0
+        self._lock = threading.Lock()
+        self._sessions_opened = 0
+        self._sessions_active = 0
+        self._sessions_peak = 0
+
+    def session(self, **kwargs) -> TrackedSession:
+        with self._lock:
+            self._sessions_opened += 1
+            self._sessions_active += 1
+            self._sessions_peak = max(self._sessions_peak, self._sessions_active)
+        return TrackedSession(self._driver.session(**kwargs), self)
+
+    def _session_closed(self):
+        with self._lock:
+            self._sessions_active -= 1
+
+    def close(self):
+        release_driver(self)
+
+    def stats(self) -> Dict[str, Any]:
+        """Session counters plus per-server connection counts of the pool"""
+        with self._lock:
+            stats = {
+                'uri': self._key[0],
+                'references': self.references,
+                'sessions_opened': self._sessions_opened,
+                'sessions_active': self._sessions_active,
+                'sessions_peak': self._sessions_peak,
+                'max_connection_pool_size': self.settings.max_connection_pool_size,
+            }
+        stats['pool'] = self._pool_stats()
+        return stats
+
+    def _pool_stats(self) -> Dict[str, Dict[str, int]]:
+        # The driver has no public pool API; read its internals best effort
+        try:
+            pool = self._driver._pool
+            return {
+                str(address): {
+                    'connections': len(connections),
+                    'in_use': pool.in_use_connection_count(address)
+                }
+                for address, connections in list(pool.connections.items())
+            }
+        except Exception:
+            return {}
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+_drivers: Dict[Tuple, SharedDriver] = {}
+_lock = threading.Lock()
+
+
+def get_driver(uri: str, user: str, password: str,
+               settings: Optional[PoolSettings] = None) -> SharedDriver:
+    """Process-wide driver for these credentials and settings, created on first use
+
+    Every call takes a reference; call ``close()`` on the returned driver
+    once per call.
+    """
+    settings = settings or PoolSettings.from_env()
+    key = (uri, user, password, settings)
+    with _lock:
+        shared = _drivers.get(key)
+        if shared is None:
+            driver = GraphDatabase.driver(uri, auth=(user, password), **settings.driver_kwargs())
+            shared = _drivers[key] = SharedDriver(driver, key, settings)
+        shared.references += 1
+        return shared
+
+
+def release_driver(shared: SharedDriver):
+    """Drop one reference, closing the driver when none are left"""
+    with _lock:
+        if shared.references <= 0:
+            return
+        shared.references -= 1
+        if shared.references:
+            return
+        _drivers.pop(shared._key, None)
+    shared._driver.close()
+
+
+def driver_stats() -> List[Dict[str, Any]]:
+    """stats() of every open shared driver"""
+    with _lock:
+        drivers = list(_drivers.values())
+    return [shared.stats() for shared in drivers]
@@ -0,0 +1,37 @@
+"""Gunicorn settings for serving server.py in production.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+Each worker process imports server.py after the fork, so it gets its own
+Neo4j driver pool, analysis cache and job queue. Background jobs and
+socket.io connections live in the worker that created them: with more than
+one worker, /jobs/<id> polling and socket.io need sticky sessions in front
+of gunicorn. Starting more than one worker is refused unless
+STICKY_SESSIONS=1 says such a proxy is in place; otherwise keep
+WEB_CONCURRENCY=1 and scale with GUNICORN_THREADS.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 6969)}")
+
+# Requests mostly wait on Gemini and Neo4j, so threads give most of the
+# concurrency and extra processes add CPU for local analysis and JSON work
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+if workers > 1 and os.getenv('STICKY_SESSIONS', '').lower() not in ('1', 'true', 'yes'):
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers} needs sticky sessions for /jobs/<id> and socket.io; "
+        "route each client to one worker and set STICKY_SESSIONS=1, or use one worker"
+    )
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+worker_class = 'gthread'
+
+# Synchronous /process_message calls wait for the model
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# server.py logs each request itself (sampled, with duration); gunicorn's
+# own access log stays off unless asked for
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
@@ -0,0 +1,211 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# A trace is either raw thinking text or a (session_id, thinking_text) pair
+Trace = Union[str, Tuple[str, str]]
+
+_END = object()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a single trace in a bulk ingest"""
+    index: int
+    session_id: str
+    success: bool
+    stage: str  # 'analyze' or 'write' (where it failed, or 'write' when done)
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineStats:
+    """Throughput counters for a bulk ingest run"""
+    submitted: int = 0
+    analyzed: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return max(end - self.started_at, 1e-9)
+
+    @property
+    def traces_per_sec(self) -> float:
+        return self.written / self.elapsed
+
+    @property
+    def analyzed_per_sec(self) -> float:
+        return self.analyzed / self.elapsed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'submitted': self.submitted,
+            'analyzed': self.analyzed,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'elapsed_seconds': self.elapsed,
+            'traces_per_sec': self.traces_per_sec,
+            'analyzed_per_sec': self.analyzed_per_sec
+        }
+
+
+@dataclass
+class IngestReport:
+    """Per-item results and final counters of a bulk ingest"""
+    results: List[IngestResult]
+    stats: PipelineStats
+
+    @property
+    def failures(self) -> List[IngestResult]:
+        return [r for r in self.results if not r.success]
+
+
+class IngestPipeline:
+    """Bounded producer/consumer pipeline for bulk trace ingestion.
+
+    Traces are analyzed by up to ``concurrency`` worker threads. Finished
+    analyses are handed to a single writer thread through a bounded queue and
+    written ``batch_size`` sessions per Neo4j transaction. When the writer
+    falls behind, analysis workers block on the queue and the producer stops
+    pulling new traces, so memory stays bounded by ``max_pending``.
+    """
+
+    def __init__(self, analyzer, kg_builder, concurrency: int = 4, batch_size: int = 25,
+                 max_pending: Optional[int] = None, overwrite: bool = True,
+                 flush_interval: float = 0.5,
+                 progress: Optional[Callable[[PipelineStats], None]] = None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.analyzer = analyzer
+        self.kg_builder = kg_builder
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_pending = max_pending or concurrency * 2
+        self.overwrite = overwrite
+        self.flush_interval = flush_interval
+        self.progress = progress
+
+    def run(self, traces: Iterable[Trace]) -> IngestReport:
+        """Analyze and write every trace, returning per-item results in input order"""
+        stats = PipelineStats()
+        results: Dict[int, IngestResult] = {}
+        lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.max_pending)
+        analyzed_queue = queue.Queue(maxsize=self.batch_size * 2)
+
+        def record(result: IngestResult):
+            with lock:
+                results[result.index] = result
+                if result.success:
+                    stats.written += 1
+                else:
+                    stats.failed += 1
+
+        def analyze(index: int, session_id: str, thinking_text: str):
+            try:
+                analyzed_data, _ = self.analyzer.analyze_thinking_text(thinking_text)
+                with lock:
+                    stats.analyzed += 1
+                # Blocks while the writer is behind, which is the backpressure point
+                analyzed_queue.put((index, session_id, thinking_text, analyzed_data))
+            except Exception as e:
+                record(IngestResult(index, session_id, False, 'analyze', str(e)))
+                in_flight.release()
+
+        writer = threading.Thread(target=self._write_loop,
+                                  args=(analyzed_queue, in_flight, record, stats, lock),
+                                  name="ingest-writer", daemon=True)
+        writer.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency,
+                                    thread_name_prefix="ingest-analyze") as pool:
+                for index, trace in enumerate(traces):
+                    session_id, thinking_text = self._normalize_trace(index, trace)
+                    in_flight.acquire()
+                    with lock:
+                        stats.submitted += 1
+                    pool.submit(analyze, index, session_id, thinking_text)
+        finally:
+            analyzed_queue.put(_END)
+            writer.join()
+            stats.finished_at = time.perf_counter()
+
+        return IngestReport([results[i] for i in sorted(results)], stats)
+
+    def _write_loop(self, analyzed_queue: queue.Queue, in_flight: threading.BoundedSemaphore,
+                    record: Callable[[IngestResult], None], stats: PipelineStats,
+                    lock: threading.Lock):
+        """Drain the analysis queue and write multi-session transactions"""
+        done = False
+        while not done:
+            batch = []
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = analyzed_queue.get(timeout=max(timeout, 0)) if batch else analyzed_queue.get()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    done = True
+                    break
+                batch.append(item)
+
+            if not batch:
+                continue
+
+            for result in self._write_batch(batch):
+                record(result)
+                in_flight.release()
+
+            with lock:
+                stats.batches += 1
+            if self.progress:
+                # A failing callback must not kill the writer, or producers block forever
+                try:
+                    self.progress(stats)
+                except Exception as e:
+                    logger.warning("Ingest progress callback failed: %s", e)
+
+    def _write_batch(self, batch: List[Tuple[int, str, str, Dict[str, Any]]]) -> List[IngestResult]:
+        """Write a batch in one transaction, isolating failures item by item if it aborts"""
+        try:
+            self.kg_builder.add_thinking_sessions(
+                [(session_id, text, data) for _, session_id, text, data in batch],
+                overwrite=self.overwrite
+            )
+            return [IngestResult(index, session_id, True, 'write')
+                    for index, session_id, _, _ in batch]
+        except Exception as e:
+            if len(batch) == 1:
+                index, session_id, _, _ = batch[0]
+                return [IngestResult(index, session_id, False, 'write', str(e))]
+
+        results = []
+        for item in batch:
+            results.extend(self._write_batch([item]))
+        return results
+
+    @staticmethod
+    def _normalize_trace(index: int, trace: Trace) -> Tuple[str, str]:
+        if isinstance(trace, str):
+            return f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{index}", trace
+        session_id, thinking_text = trace
+        return session_id, thinking_text
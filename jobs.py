@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already waiting or running"""
+
+
+@dataclass
+class Job:
+    """One unit of background work and its outcome"""
+    id: str
+    status: str = 'queued'  # 'queued', 'running', 'succeeded' or 'failed'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('succeeded', 'failed')
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Runs submitted work on a bounded thread pool and remembers the outcome.
+
+    At most ``max_pending`` jobs are queued or running at once; beyond that
+    ``submit`` raises QueueFull so callers can shed load instead of piling up
+    threads. Finished jobs are kept for ``result_ttl_seconds`` (and at most
+    ``max_finished`` of them) for status polling. ``on_update`` is called
+    with each job when it starts and when it finishes.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100,
+                 result_ttl_seconds: Optional[float] = 3600, max_finished: int = 10000,
+                 on_update: Optional[Callable[[Job], None]] = None):
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_finished = max_finished
+        self.on_update = on_update
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, on_update: Optional[Callable[[Job], None]] = None) -> "JobQueue":
+        """Build the queue from JOB_WORKERS, JOB_QUEUE_SIZE and JOB_RESULT_TTL_SECONDS"""
+        ttl = os.getenv('JOB_RESULT_TTL_SECONDS', '3600')
+        return cls(
+            max_workers=int(os.getenv('JOB_WORKERS', 4)),
+            max_pending=int(os.getenv('JOB_QUEUE_SIZE', 100)),
+            result_ttl_seconds=float(ttl) if ttl else None,
+            on_update=on_update
+        )
+
+    def submit(self, work: Callable[[], Dict[str, Any]]) -> Job:
+        """Queue ``work``; its return value becomes the job result
+
+        Like ``get``, returns a snapshot of the job taken under the lock.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+            self.submitted += 1
+            job = Job(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._evict(time.time())
+            snapshot = replace(job)
+        self._executor.submit(self._run, job, work)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A consistent copy of the job, or None if it is unknown or evicted"""
+        with self._lock:
+            self._evict(time.time())
+            job = self._jobs.get(job_id)
+            return replace(job) if job is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'jobs': statuses
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, work: Callable[[], Dict[str, Any]]):
+        with self._lock:
+            job.status = 'running'
+            job.started_at = time.time()
+        self._notify(job)
+        result, error = None, None
+        try:
+            result = work()
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            error = str(e)
+        finally:
+            # Outcome, status and finish time change together so pollers never see half of them
+            with self._lock:
+                job.result, job.error = result, error
+                job.status = 'failed' if error is not None else 'succeeded'
+                job.finished_at = time.time()
+                self._pending -= 1
+            self._notify(job)
+
+    def _notify(self, job: Job):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception as e:
+            logger.warning("Job notification for %s failed: %s", job.id, e)
+
+    def _evict(self, now: float):
+        # Oldest submissions first; queued and running jobs are never evicted
+        finished = [job for job in self._jobs.values() if job.done and job.finished_at is not None]
+        overflow = len(finished) - self.max_finished
+        for job in finished:
+            expired = (self.result_ttl_seconds is not None
+                       and now - job.finished_at > self.result_ttl_seconds)
+            if not expired and overflow <= 0:
+                break
+            del self._jobs[job.id]
+            overflow -= 1
@@ -0,0 +1,282 @@
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Sentences end in a run of . ! ? followed by whitespace or the end of the
+# text, so dotted names (os.path, v1.2) stay inside one sentence
+SENTENCE_END = re.compile(r'[.!?]+(?:\s+|$)')
+
+# Thought types in priority order; the first type with a keyword in the
+# sentence wins, as in ThinkingAnalyzer._classify_sentence
+THOUGHT_TYPE_KEYWORDS = {
+    'observation': ['observe', 'observed', 'observes', 'see', 'sees', 'saw', 'notice', 'noticed',
+                    'notices', 'found', 'find', 'shows', 'returned', 'returns'],
+    'analysis': ['analyze', 'analyzing', 'analysis', 'determine', 'determining', 'identify',
+                 'identifying', 'compare', 'evaluate', 'means', 'implies', 'because'],
+    'decision': ['decide', 'decided', 'choose', 'chose', 'will', "i'll", 'going to', 'should', 'must'],
+    'action': ['call', 'calling', 'execute', 'executing', 'run', 'running', 'invoke', 'invoking',
+               'query', 'fetch', 'send', 'use', 'using'],
+}
+
+CONFIDENT_WORDS = ['clearly', 'obviously', 'definitely', 'certainly', 'confident', 'confirmed',
+                   'sure that', 'determined that', 'without doubt']
+UNCERTAIN_WORDS = ['maybe', 'perhaps', 'might', 'could be', 'not sure', 'uncertain', 'possibly',
+                   'i think', 'probably', 'unclear']
+
+# Reasoning strategy cues, checked in this order; 'sequential' otherwise
+STRATEGY_KEYWORDS = {
+    'verification': ['verify', 'verified', 'double-check', 'double check', 'confirm', 'validate',
+                     'sanity check'],
+    'problem_decomposition': ['break down', 'break it down', 'subproblem', 'sub-problem', 'subtask',
+                              'split into', 'decompose'],
+    'step_by_step': ['first', 'then', 'next', 'finally', 'step'],
+}
+
+SUCCESS_WORDS = ['success', 'successful', 'successfully', 'works', 'worked', 'solved', 'confirmed',
+                 'correct', 'completed', 'done', 'resolved']
+
+DOMAIN_KEYWORDS = {
+    'weather': ['weather', 'temperature', 'forecast', 'rain', 'humidity', 'celsius', 'fahrenheit', 'wind'],
+}
+
+# Identifiers ending in one of these (case-insensitively) are tools, the
+# shapes ThinkingAnalyzer._extract_tools looks for (WeatherAPI, default_api, SearchTool)
+DEFAULT_TOOL_SUFFIXES = ('api', 'tool', 'service')
+
+STOP_WORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before
+    being below between both but by can could did do does doing done down during each either
+    else even every few for from further get gets got had has have having he her here hers
+    herself him himself his how however i if in into is it its itself just know let lets like
+    make may me might more most much must my myself need needs no nor not now of off on once
+    only or other our ours ourselves out over own perhaps probably really right same say says
+    see seems shall she should since so some something such than that the their theirs them
+    themselves then there these they thing things think this those though through thus to too
+    try under until up upon us use used uses using very want was way we well were what when
+    where whether which while who whom why will with within without would yes yet you your
+    yours yourself okay ok hmm wait maybe actually first next finally also still already
+    going gonna let's i'm i'll i've i'd it's that's there's don't doesn't isn't can't won't
+    wants wanted look looks looked give gives gave take takes took tell tells told ask asks
+    asked seem seemed work works good better best bad new old sure able likely wrong
+    check checks checked keep go goes went come comes came put puts mean great fine
+""".split())
+
+# One scan yields quoted strings (groups 1-3) and identifier-like words
+# (group 4: plain words, dotted names, snake_case, camelCase, calls)
+# A single quote only opens a string when it does not follow a letter (I'm)
+TOKEN_PATTERN = re.compile(r"""(?<!\w)'([^'\n]{1,80})'|"([^"\n]{1,80})"|`([^`\n]{1,80})`|([A-Za-z_][\w.-]*\w(?:\(\))?|[A-Za-z_])""")
+
+# How scan() treats a word, decided once per distinct word
+SKIP, TOOL, NAME, ENTITY = range(4)
+
+
+def _keyword_regex(groups: Dict[str, Sequence[str]]) -> "re.Pattern":
+    """One regex with a named group per key, matching whole words/phrases"""
+    return re.compile(r'\b(?:' + '|'.join(
+        f"(?P<{name}>" + '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)) + ')'
+        for name, words in groups.items()
+    ) + r')\b')
+
+
+class ToolLexicon:
+    """Known tool names plus the identifier suffixes that mark a tool.
+
+    ``names`` match whole words regardless of case and are reported in the
+    spelling given here; other identifiers ending in one of ``suffixes`` are
+    reported as written in the text.
+    """
+
+    def __init__(self, names: Iterable[str] = (), suffixes: Sequence[str] = DEFAULT_TOOL_SUFFIXES):
+        self.names = {name.lower(): name for name in names if name}
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+
+    @classmethod
+    def from_env(cls) -> "ToolLexicon":
+        """Default suffixes plus the comma-separated LOCAL_EXTRACTION_TOOLS names"""
+        names = [name.strip() for name in os.getenv('LOCAL_EXTRACTION_TOOLS', '').split(',')]
+        return cls(names=names)
+
+    def match(self, word: str, lowered: str) -> Optional[str]:
+        """The tool ``word`` names, or None"""
+        name = self.names.get(lowered)
+        if name is not None:
+            return name
+        if lowered.endswith(self.suffixes) and lowered not in self.suffixes:
+            return word
+        return None
+
+
+class LocalExtractor:
+    """Rule-based thought extraction that never calls a model.
+
+    Produces the same structure as the Gemini analysis. Every matcher is
+    compiled once here, so analyzing a sentence is a handful of regex scans:
+
+        extractor = LocalExtractor(ToolLexicon(names=['WeatherAPI', 'grep']))
+        analysis = extractor.analyze(thinking_text)
+    """
+
+    def __init__(self, tools: Optional[ToolLexicon] = None, stop_words: Iterable[str] = STOP_WORDS,
+                 base_confidence: float = 0.7, max_cached_words: int = 200_000):
+        self.tools = tools if tools is not None else ToolLexicon.from_env()
+        self.max_cached_words = max_cached_words
+        self._word_kinds: Dict[str, Tuple[int, str]] = {}
+        # Cue words that drive classification are never entities either
+        cues = [word for groups in (THOUGHT_TYPE_KEYWORDS, STRATEGY_KEYWORDS)
+                for words in groups.values() for word in words]
+        cues += CONFIDENT_WORDS + UNCERTAIN_WORDS + SUCCESS_WORDS
+        self.stop_words = frozenset(word.lower() for word in list(stop_words) + cues)
+        self.base_confidence = base_confidence
+        # Thought-type and certainty cues share one regex pass per sentence
+        self._cues = _keyword_regex({**THOUGHT_TYPE_KEYWORDS,
+                                     'confident': CONFIDENT_WORDS, 'uncertain': UNCERTAIN_WORDS})
+        self._type_rank = {name: rank for rank, name in enumerate(THOUGHT_TYPE_KEYWORDS)}
+        self._type_names = list(THOUGHT_TYPE_KEYWORDS)
+        self._strategies = [(name, _keyword_regex({name: words})) for name, words in STRATEGY_KEYWORDS.items()]
+        self._success = _keyword_regex({'success': SUCCESS_WORDS})
+        self._domains = _keyword_regex(DOMAIN_KEYWORDS)
+
+    def split_sentences(self, text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+    def classify(self, lowered: str) -> Tuple[str, float]:
+        """(thought type, confidence) from the cue words in a lowercased sentence"""
+        best = None
+        score = self.base_confidence
+        for match in self._cues.finditer(lowered):
+            cue = match.lastgroup
+            if cue == 'confident':
+                score += 0.1
+            elif cue == 'uncertain':
+                score -= 0.15
+            else:
+                rank = self._type_rank[cue]
+                if best is None or rank < best:
+                    best = rank
+        thought_type = 'reflection' if best is None else self._type_names[best]
+        return thought_type, round(min(0.95, max(0.1, score)), 2)
+
+    def scan(self, sentence: str) -> Tuple[List[str], List[str]]:
+        """(entities, tools) of a sentence from a single token scan
+
+        Entities are quoted strings, identifiers (dotted, snake_case,
+        camelCase, calls), runs of capitalized words and other words that
+        are not stop words. Tools come from the lexicon and are not repeated
+        as entities.
+        """
+        entities: List[str] = []
+        tools: List[str] = []
+        name: List[str] = []
+        name_end = -1
+        for match in TOKEN_PATTERN.finditer(sentence):
+            word = match.group(4)
+            if word is None:
+                value = (match.group(1) or match.group(2) or match.group(3)).strip()
+                if value and value not in entities:
+                    entities.append(value)
+                continue
+
+            kind, value = self._word_kinds.get(word) or self._word_kind(word)
+            if kind == NAME:
+                if match.start() == 0:
+                    # Capitalized only because it starts the sentence
+                    kind, value = self._word_kinds.get(value) or self._word_kind(value)
+                else:
+                    # Adjacent capitalized words form one name ("New York")
+                    if name and sentence[name_end:match.start()] == ' ':
+                        name.append(word)
+                    else:
+                        self._add_name(name, entities)
+                        name = [word]
+                    name_end = match.end()
+                    continue
+
+            if kind == ENTITY:
+                if value not in entities:
+                    entities.append(value)
+            elif kind == TOOL:
+                if value not in tools:
+                    tools.append(value)
+        self._add_name(name, entities)
+        return entities, tools
+
+    def _word_kind(self, word: str) -> Tuple[int, str]:
+        """Classify a word for scan(), remembering the answer"""
+        lowered = word.lower()
+        tool = self.tools.match(word, lowered)
+        first, rest = word[0], word[1:]
+        if tool is not None:
+            kind = (TOOL, tool)
+        elif first.isupper() and (not rest or rest.islower()):
+            kind = (NAME, lowered)
+        elif not rest or rest.islower():
+            kind = (SKIP, word) if len(word) <= 3 or word in self.stop_words else (ENTITY, word)
+        else:
+            # Mixed case, digits, dots, underscores or a call: an identifier
+            kind = (ENTITY, word)
+        if len(self._word_kinds) < self.max_cached_words:
+            self._word_kinds[word] = kind
+        return kind
+
+    def _add_name(self, words: List[str], entities: List[str]):
+        if not words:
+            return
+        name = ' '.join(words)
+        if (len(words) > 1 or name.lower() not in self.stop_words) and name not in entities:
+            entities.append(name)
+
+    def thought(self, sentence: str) -> Dict[str, Any]:
+        thought_type, confidence = self.classify(sentence.lower())
+        entities, tools = self.scan(sentence)
+        return {
+            "content": sentence,
+            "type": thought_type,
+            "entities": entities,
+            "tools_mentioned": tools,
+            "confidence": confidence
+        }
+
+    def analyze(self, thinking_text: str) -> Dict[str, Any]:
+        """Analysis of a whole trace in the shape ANALYSIS_PROMPT asks the model for"""
+        thoughts = [self.thought(sentence) for sentence in self.split_sentences(thinking_text)]
+
+        relationships = [{
+            "source_thought": i,
+            "target_thought": i + 1,
+            "relationship": "leads_to",
+            "strength": 0.8
+        } for i in range(len(thoughts) - 1)]
+
+        lowered = thinking_text.lower()
+        uses_tools = any(thought['tools_mentioned'] for thought in thoughts)
+        return {
+            "thoughts": thoughts,
+            "relationships": relationships,
+            "reasoning_strategy": self._strategy(lowered, uses_tools),
+            "domain": self._domain(lowered, uses_tools),
+            "success_indicators": self._success_indicators(lowered)
+        }
+
+    def analyze_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        return [self.analyze(text) for text in texts]
+
+    def _strategy(self, lowered: str, uses_tools: bool) -> str:
+        found = [name for name, regex in self._strategies if regex.search(lowered)]
+        if found and found[0] != 'step_by_step':
+            return found[0]
+        if uses_tools:
+            return 'tool_selection'
+        return 'step_by_step' if found else 'sequential'
+
+    def _domain(self, lowered: str, uses_tools: bool) -> str:
+        match = self._domains.search(lowered)
+        if match:
+            return match.lastgroup
+        return 'api' if uses_tools else 'general'
+
+    def _success_indicators(self, lowered: str) -> List[str]:
+        indicators = []
+        for match in self._success.finditer(lowered):
+            if match.group() not in indicators:
+                indicators.append(match.group())
+        return indicators
@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import random
+from typing import Optional
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through a ``rate`` fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """Set up root logging from LOG_LEVEL (default INFO) and LOG_FORMAT ('json' or 'text')
+
+    Safe to call more than once; later calls replace the handler installed
+    by earlier ones.
+    """
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+
+    handler = logging.StreamHandler()
+    handler._thoughtflow = True
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if getattr(h, '_thoughtflow', False)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def sampled_logger(name: str, rate: Optional[float] = None) -> logging.Logger:
+    """Logger whose records below WARNING are kept at ``rate`` (LOG_SAMPLE_RATE, default 1)"""
+    logger = logging.getLogger(name)
+    if rate is None:
+        rate = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+    for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+        logger.removeFilter(existing)
+    logger.addFilter(SamplingFilter(rate))
+    return logger
@@ -1,16 +1,31 @@
+import base64
 import os
 import re
 import json
-from typing import Dict, List, Any, Optional
+import logging
+import time
+from typing import Callable, Dict, List, Any, Optional, Iterable, Iterator, Tuple
 from dataclasses import dataclass
-from neo4j import GraphDatabase
+from concurrent.futures import ThreadPoolExecutor
+from neo4j import READ_ACCESS
 import google.generativeai as genai
 from datetime import datetime
 from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, PatternsCache, make_cache_key
+from analysis_validation import AnalysisPathStats, ParsedAnalysis, parse_analysis
+from chunking import TraceChunk, merge_chunk_analyses, split_trace
+from local_extraction import LocalExtractor
+from model_client import ModelUnavailable, get_model_client
+from drivers import get_driver
+from ingest_pipeline import IngestPipeline, IngestReport, Trace
+from schema import SCHEMA, QueryPlan, ensure_schema, explain_queries
+from log_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configure Gemini API
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 if not gemini_api_key:
@@ -39,16 +54,39 @@ class ReasoningEdge:
     strength: float
 
 
-class ThinkingAnalyzer:
-    """Analyzes agent thinking text and extracts structured information"""
+@dataclass
+class ThinkingResult:
+    """What AgentThinkingKG.process_thinking produced for one trace
+
+    ``analysis`` is the parsed thoughts/relationships dict that was written to
+    the graph; ``raw_llm_response`` is the model text it came from, empty when
+    the regex fallback or local extraction produced it. Iterating yields
+    (session_id, raw_llm_response, thinking_text), the tuple process_thinking
+    used to return.
+    """
+    session_id: str
+    analysis: Dict[str, Any]
+    raw_llm_response: str
+    thinking_text: str
+    analyze_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    def __iter__(self):
+        return iter((self.session_id, self.raw_llm_response, self.thinking_text))
+
+    @property
+    def fallback(self) -> bool:
+        return not self.raw_llm_response
 
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
 
-    def analyze_thinking_text(self, thinking_text: str) -> Dict[str, Any]:
-        """Use Gemini to analyze the thinking text and extract structured data"""
+ANALYSIS_MODEL_NAME = 'gemini-2.0-flash'
 
-        prompt = f"""
+ANALYSIS_MODES = ('llm', 'local')
+
+# Bump whenever ANALYSIS_PROMPT changes so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = '1'
+
+ANALYSIS_PROMPT = """
         Analyze this agent thinking process and extract structured information:
 
         Text: "{thinking_text}"
@@ -86,38 +124,195 @@ class ThinkingAnalyzer:
         - Classify the overall reasoning strategy
         """
 
+
+class ThinkingAnalyzer:
+    """Analyzes agent thinking text and extracts structured information"""
+
+    def __init__(self, cache: Optional[AnalysisCache] = None, chunk_chars: Optional[int] = None,
+                 chunk_overlap: Optional[int] = None, chunk_concurrency: Optional[int] = None,
+                 mode: Optional[str] = None, local_extractor: Optional[LocalExtractor] = None):
+        self.model_name = ANALYSIS_MODEL_NAME
+        # Shared per model: rate limit, deadlines, retries and circuit breaker
+        self.model = get_model_client(self.model_name)
+        self.cache = cache
+        # 'llm' asks Gemini; 'local' uses the rule-based extractor and never calls a model
+        self.mode = (mode or os.getenv('ANALYSIS_MODE', 'llm')).lower()
+        if self.mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode {self.mode!r}; expected one of {', '.join(ANALYSIS_MODES)}")
+        self.local_extractor = local_extractor or (LocalExtractor() if self.mode == 'local' else None)
+        # How each model response became an analysis (valid, repaired, retried, ...)
+        self.path_stats = AnalysisPathStats()
+        # Traces longer than chunk_chars are analyzed as overlapping chunks
+        # in parallel; 0 always sends the whole trace in one prompt
+        self.chunk_chars = chunk_chars if chunk_chars is not None else int(os.getenv('ANALYSIS_CHUNK_CHARS', 12000))
+        self.chunk_overlap = (chunk_overlap if chunk_overlap is not None
+                              else int(os.getenv('ANALYSIS_CHUNK_OVERLAP', 800)))
+        self.chunk_concurrency = max(1, chunk_concurrency if chunk_concurrency is not None
+                                     else int(os.getenv('ANALYSIS_CHUNK_CONCURRENCY', 8)))
+
+    def analyze_thinking_text(self, thinking_text: str) -> Tuple[Dict[str, Any], str]:
+        """Use Gemini to analyze the thinking text and extract structured data
+
+        Returns (analysis, raw model text); the raw text is empty when the
+        analysis came from the regex fallback or the local extractor.
+        """
+
+        if self.mode == 'local':
+            return self._local_analysis(thinking_text)
+
+        cache_key, cached = self._cached_analysis(thinking_text)
+        if cached is not None:
+            return cached
+
+        chunks = self._chunks(thinking_text)
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.chunk_concurrency, len(chunks))) as pool:
+                results = list(pool.map(self.analyze_thinking_text, (chunk.text for chunk in chunks)))
+            return self._merge_chunks(chunks, results, cache_key)
+
+        prompt = ANALYSIS_PROMPT.format(thinking_text=thinking_text)
+
         try:
             response = self.model.generate_content(prompt)
-            # Clean the response to extract JSON
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:-3]
-            elif response_text.startswith('```'):
-                response_text = response_text[3:-3]
-
-            return json.loads(response_text), response.text.strip()
+            return self._parse_response(response.text, cache_key, thinking_text)
+        except ModelUnavailable as e:
+            logger.warning("Gemini unavailable, using local extraction: %s", e)
+            return self._degraded_analysis(thinking_text)
         except Exception as e:
-            print(f"Error analyzing with Gemini: {e}")
-            return self._fallback_analysis(thinking_text)
+            logger.warning("Error analyzing with Gemini, using fallback analysis: %s", e)
+            self.path_stats.record('fallback')
+            return self._fallback_analysis(thinking_text), ""
+
+    def _local_analysis(self, thinking_text: str):
+        """Rule-based analysis; cheaper than a cache lookup, so it is never cached"""
+        return self.local_extractor.analyze(thinking_text), ""
+
+    def _degraded_analysis(self, thinking_text: str):
+        """Local extraction while the model is unavailable; not cached, so the model is asked again later"""
+        if self.local_extractor is None:
+            self.local_extractor = LocalExtractor()
+        self.path_stats.record('degraded')
+        return self._local_analysis(thinking_text)
+
+    def _cached_analysis(self, thinking_text: str):
+        """Return (cache_key, cached result or None); the key is None without a cache"""
+        if self.cache is None:
+            return None, None
+        cache_key = make_cache_key(thinking_text, ANALYSIS_PROMPT_VERSION, self.model_name)
+        return cache_key, self.cache.get(cache_key)
+
+    def _chunks(self, thinking_text: str) -> List[TraceChunk]:
+        """Chunks for a trace over chunk_chars, else an empty list"""
+        if not self.chunk_chars or len(thinking_text) <= self.chunk_chars:
+            return []
+        return split_trace(thinking_text, self.chunk_chars, self.chunk_overlap)
+
+    def _merge_chunks(self, chunks: List[TraceChunk], results: List[Tuple[Dict[str, Any], str]],
+                      cache_key: Optional[str] = None):
+        """Merge per-chunk results into (analysis, raw responses), caching it if no chunk fell back"""
+        analyzed_data = merge_chunk_analyses(chunks, [data for data, _ in results])
+        raw_text = "\n\n".join(raw for _, raw in results if raw)
+        # A chunk that fell back has no raw text
+        if cache_key is not None and all(raw for _, raw in results):
+            self.cache.set(cache_key, analyzed_data, raw_text)
+        return analyzed_data, raw_text
+
+    def _parse_response(self, raw_text: str, cache_key: Optional[str] = None,
+                        thinking_text: Optional[str] = None):
+        """Parse and validate a model response, repairing it if needed, and cache the result
+
+        Given ``thinking_text``, a response cut off inside its thoughts has
+        only the text after the last complete thought sent back to the model.
+        Raises AnalysisParseError when nothing usable can be recovered.
+        """
+        parsed = parse_analysis(raw_text)
+        analyzed_data, raw_text = parsed.analysis, raw_text.strip()
+        chunks, path = self._retry_plan(parsed, thinking_text)
+        if chunks:
+            try:
+                self.path_stats.record_retry_call()
+                response = self.model.generate_content(ANALYSIS_PROMPT.format(thinking_text=chunks[1].text))
+                analyzed_data, raw_text = self._merge_tail(chunks, analyzed_data, raw_text, response.text)
+            except Exception as e:
+                logger.warning("Re-analyzing truncated tail failed, keeping partial analysis: %s", e)
+                path = 'partial'
+        return self._accept(analyzed_data, raw_text, path, cache_key)
+
+    def _retry_plan(self, parsed: ParsedAnalysis,
+                    thinking_text: Optional[str]) -> Tuple[Optional[List[TraceChunk]], str]:
+        """(chunks whose tail should be re-analyzed or None, path the response takes)"""
+        if parsed.complete:
+            return None, parsed.path
+        chunks = self._tail_chunks(thinking_text, parsed.analysis) if thinking_text else None
+        if chunks == []:
+            # Cut off after the last thought; nothing is missing
+            return None, parsed.path
+        if chunks is None:
+            return None, 'partial'
+        return chunks, 'retried'
+
+    @staticmethod
+    def _tail_chunks(thinking_text: str, analyzed_data: Dict[str, Any]) -> Optional[List[TraceChunk]]:
+        """Split a trace at the last analyzed thought for re-analyzing what follows it
+
+        Thoughts are located in order, each after the previous one found, so
+        a phrase repeated earlier in the trace cannot split it too early.
+        Returns [analyzed part, rest] with the last thought repeated as the
+        overlap, [] when only punctuation follows it, or None when the last
+        thought cannot be placed: the model paraphrased it, or only its
+        opening words match and they occur more than once.
+        """
+        def phrase(words):
+            return re.compile(r'\W+'.join(map(re.escape, words)), re.IGNORECASE)
+
+        thoughts = analyzed_data['thoughts']
+        position = 0
+        for thought in thoughts[:-1]:
+            words = re.findall(r'\w+', thought['content'])
+            found = phrase(words).search(thinking_text, position) if words else None
+            if found:
+                position = found.end()
+
+        words = re.findall(r'\w+', thoughts[-1]['content'])
+        if not words:
+            return None
+        match = phrase(words).search(thinking_text, position)
+        if match is None and len(words) > 6:
+            matches = phrase(words[:6]).finditer(thinking_text, position)
+            match = next(matches, None)
+            if next(matches, None) is not None:
+                return None
+        if match is None:
+            return None
+        if not re.search(r'\w', thinking_text[match.end():]):
+            return []
+        return [
+            TraceChunk(0, 0, match.end(), 0, thinking_text[:match.end()]),
+            TraceChunk(1, match.start(), len(thinking_text), match.end() - match.start(),
+                       thinking_text[match.start():])
+        ]
+
+    @staticmethod
+    def _merge_tail(chunks: List[TraceChunk], analyzed_data: Dict[str, Any], raw_text: str,
+                    tail_raw_text: str) -> Tuple[Dict[str, Any], str]:
+        """Merge the re-analyzed tail into a truncated analysis; a truncated tail is kept as is"""
+        tail = parse_analysis(tail_raw_text).analysis
+        merged = merge_chunk_analyses(chunks, [analyzed_data, tail])
+        return merged, raw_text + "\n\n" + tail_raw_text.strip()
+
+    def _accept(self, analyzed_data: Dict[str, Any], raw_text: str, path: str,
+                cache_key: Optional[str] = None):
+        """Count the path and cache the analysis unless thoughts are missing from it"""
+        self.path_stats.record(path)
+        if cache_key is not None and path != 'partial':
+            self.cache.set(cache_key, analyzed_data, raw_text)
+        return analyzed_data, raw_text
 
     def _fallback_analysis(self, thinking_text: str) -> Dict[str, Any]:
         """Fallback analysis using regex patterns"""
         sentences = re.split(r'[.!?]+', thinking_text)
 
-        thoughts = []
-        for i, sentence in enumerate(sentences):
-            if sentence.strip():
-                thought_type = self._classify_sentence(sentence)
-                entities = self._extract_entities(sentence)
-                tools = self._extract_tools(sentence)
-
-                thoughts.append({
-                    "content": sentence.strip(),
-                    "type": thought_type,
-                    "entities": entities,
-                    "tools_mentioned": tools,
-                    "confidence": 0.7
-                })
+        thoughts = [self._fallback_thought(sentence) for sentence in sentences if sentence.strip()]
 
         # Simple sequential relationships
         relationships = []
@@ -137,6 +332,16 @@ class ThinkingAnalyzer:
             "success_indicators": []
         }
 
+    def _fallback_thought(self, sentence: str) -> Dict[str, Any]:
+        """Regex analysis of a single sentence, shaped like a thought from the model"""
+        return {
+            "content": sentence.strip(),
+            "type": self._classify_sentence(sentence),
+            "entities": self._extract_entities(sentence),
+            "tools_mentioned": self._extract_tools(sentence),
+            "confidence": 0.7
+        }
+
     def _classify_sentence(self, sentence: str) -> str:
         """Simple classification of sentence type"""
         sentence_lower = sentence.lower()
@@ -185,34 +390,609 @@ class ThinkingAnalyzer:
         return list(set(tools))
 
 
+# Kept for callers that create the schema themselves; see schema.SCHEMA
+CONSTRAINTS = [statement for _, statement in SCHEMA]
+
+# Cypher used by the batched ingest path. Each UNWIND statement writes one
+# kind of row for a whole session, so a session costs a fixed number of
+# round trips regardless of how many thoughts, entities or tools it has.
+SESSION_EXISTS_QUERY = """
+    MATCH (s:Session {id: $session_id})
+    RETURN s.id as id
+"""
+
+# Thoughts are found through the Thought.session_id index. The entities and
+# tools they referenced are returned so orphans can be collected afterwards.
+DELETE_SESSION_QUERY = """
+    MATCH (s:Session {id: $session_id})
+    OPTIONAL MATCH (:Thought {session_id: $session_id})-[:MENTIONS|USES_TOOL]->(x)
+    WITH s, collect(DISTINCT elementId(x)) as orphan_candidates
+    CALL {
+        WITH s
+        MATCH (t:Thought {session_id: s.id})
+        DETACH DELETE t
+    }
+    DETACH DELETE s
+    RETURN orphan_candidates
+"""
+
+# Entity/Tool nodes among $ids that nothing references any more
+DELETE_ORPHANS_QUERY = """
+    UNWIND $ids AS id
+    MATCH (x)
+    WHERE elementId(x) = id AND (x:Entity OR x:Tool) AND NOT (x)--()
+    DELETE x
+"""
+
+# Statements behind the batched KnowledgeGraphBuilder.delete_session
+ORPHAN_CANDIDATES_QUERY = """
+    MATCH (:Thought {session_id: $session_id})-[:MENTIONS|USES_TOOL]->(x)
+    RETURN collect(DISTINCT elementId(x)) as ids
+"""
+
+DELETE_SESSION_NODE_QUERY = """
+    MATCH (s:Session {id: $session_id})
+    DETACH DELETE s
+"""
+
+DELETE_THOUGHT_BATCH_QUERY = """
+    MATCH (t:Thought {session_id: $session_id})
+    WITH t LIMIT $batch_size
+    DETACH DELETE t
+"""
+
+MERGE_SESSION_QUERY = """
+    MERGE (s:Session {id: $session_id})
+    SET s.raw_text = $thinking_text,
+        s.reasoning_strategy = $strategy,
+        s.domain = $domain,
+        s.timestamp = datetime(),
+        s.success_indicators = $success_indicators
+"""
+
+# Provisional session for streamed thoughts; the refined analysis overwrites it
+APPEND_SESSION_QUERY = """
+    MERGE (s:Session {id: $session_id})
+    ON CREATE SET s.reasoning_strategy = 'streaming',
+                  s.domain = 'general',
+                  s.success_indicators = []
+    SET s.raw_text = $thinking_text,
+        s.timestamp = datetime()
+"""
+
+UNWIND_THOUGHTS_QUERY = """
+    MATCH (s:Session {id: $session_id})
+    UNWIND $rows AS row
+    MERGE (t:Thought {id: row.id})
+    SET t.content = row.content,
+        t.type = row.type,
+        t.confidence = row.confidence,
+        t.session_id = $session_id,
+        t.sequence_order = row.order,
+        t.timestamp = datetime()
+    MERGE (s)-[:CONTAINS]->(t)
+"""
+
+UNWIND_MENTIONS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (e:Entity {name: row.name})
+    SET e.last_seen = datetime()
+    WITH e, row
+    MATCH (t:Thought {id: row.thought_id})
+    MERGE (t)-[:MENTIONS]->(e)
+"""
+
+UNWIND_TOOLS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (tool:Tool {name: row.name})
+    SET tool.last_seen = datetime()
+    WITH tool, row
+    MATCH (t:Thought {id: row.thought_id})
+    MERGE (t)-[:USES_TOOL]->(tool)
+"""
+
+UNWIND_FLOWS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (source:Thought {id: row.source_id})
+    MATCH (target:Thought {id: row.target_id})
+    MERGE (source)-[r:REASONING_FLOW {type: row.type}]->(target)
+    SET r.strength = row.strength
+"""
+
+# Aggregate nodes behind the pattern queries. A session's contribution is
+# added after it is written ($sign = 1) and removed before it is deleted
+# ($sign = -1), in the same transaction, so the pattern queries read a few
+# summary nodes instead of scanning every session and thought. Aggregates
+# that drop to zero are deleted. Keys join the grouping values with \u001f.
+# s.pattern_aggregated records whether the session is counted; it is read
+# under the session's write lock, so an ingest racing a rebuild cannot count
+# a session twice or retract one that was never counted.
+APPLY_PATTERN_AGGREGATES_QUERY = """
+    MATCH (s:Session {id: $session_id})
+    SET s.aggregate_lock = true
+    REMOVE s.aggregate_lock
+    WITH s WHERE (s.pattern_aggregated IS NULL) = ($sign = 1)
+    SET s.pattern_aggregated = CASE WHEN $sign = 1 THEN true END
+    WITH s,
+         coalesce(s.reasoning_strategy, 'unknown') as strategy,
+         coalesce(s.domain, 'general') as domain
+    MERGE (st:StrategyStats {key: strategy + '\\u001f' + domain})
+    ON CREATE SET st.strategy = strategy, st.domain = domain, st.frequency = 0
+    SET st.frequency = st.frequency + $sign
+    WITH s, strategy, st
+    CALL {
+        WITH s
+        MATCH (s)-[:CONTAINS]->(t:Thought)-[:USES_TOOL]->(tool:Tool)
+        WITH tool.name as tool_name, coalesce(t.type, 'unknown') as thought_type, count(*) as uses
+        MERGE (u:ToolUsageStats {key: tool_name + '\\u001f' + thought_type})
+        ON CREATE SET u.tool = tool_name, u.thought_type = thought_type, u.count = 0
+        SET u.count = u.count + $sign * uses
+        WITH u WHERE u.count <= 0
+        DELETE u
+    }
+    CALL {
+        WITH s, strategy
+        WITH s, strategy WHERE size(coalesce(s.success_indicators, [])) > 0
+        MATCH (s)-[:CONTAINS]->(t:Thought)
+        WITH s, strategy, t ORDER BY t.sequence_order
+        WITH s, strategy, collect(coalesce(t.type, 'unknown')) as thought_sequence
+        WITH strategy, thought_sequence, s.success_indicators as indicators,
+             reduce(acc = strategy, part IN thought_sequence | acc + '\\u001f' + part) +
+             '\\u001f\\u001f' + reduce(acc = '', part IN s.success_indicators | acc + '\\u001f' + part) as key
+        MERGE (p:SuccessPatternStats {key: key})
+        ON CREATE SET p.strategy = strategy, p.thought_sequence = thought_sequence,
+                      p.indicators = indicators, p.frequency = 0
+        SET p.frequency = p.frequency + $sign
+        WITH p WHERE p.frequency <= 0
+        DELETE p
+    }
+    WITH st WHERE st.frequency <= 0
+    DELETE st
+"""
+
+# Read-side Cypher shared by the sync and async graph classes
+REASONING_PATTERNS_QUERY = """
+    MATCH (st:StrategyStats)
+    RETURN st.strategy as strategy,
+           st.domain as domain,
+           st.frequency as frequency
+    ORDER BY frequency DESC
+"""
+
+SUCCESSFUL_PATTERNS_QUERY = """
+    MATCH (p:SuccessPatternStats)
+    RETURN p.strategy as strategy, p.thought_sequence as thought_sequence,
+           p.indicators as indicators, p.frequency as frequency
+    ORDER BY frequency DESC
+"""
+
+TOOL_USAGE_PATTERNS_QUERY = """
+    MATCH (u:ToolUsageStats)
+    WITH u ORDER BY u.count DESC
+    WITH u.tool as tool_name,
+         collect(u.thought_type) as thought_types,
+         collect({thought_type: u.thought_type, count: u.count}) as thought_type_counts,
+         sum(u.count) as usage_count
+    RETURN tool_name, thought_types, thought_type_counts, usage_count
+    ORDER BY usage_count DESC
+"""
+
+# Graph version shared by every process writing to the database, so caches
+# in other gunicorn workers see writes made here. The epoch changes if the
+# node is deleted (clear_database), so versions never repeat.
+GRAPH_VERSION_QUERY = """
+    OPTIONAL MATCH (v:GraphVersion {id: 'default'})
+    RETURN coalesce(v.epoch + ':' + toString(v.version), '') as version
+"""
+
+BUMP_GRAPH_VERSION_QUERY = """
+    MERGE (v:GraphVersion {id: 'default'})
+    ON CREATE SET v.epoch = randomUUID(), v.version = 0
+    SET v.version = v.version + 1
+"""
+
+# Full rebuild of the aggregates, for graphs written before they existed.
+# The PatternAggregateState node is 'building' while one process holds the
+# rebuild lease and 'ready' once the aggregates are complete.
+AGGREGATES_READY_QUERY = """
+    OPTIONAL MATCH (m:PatternAggregateState {id: 'default'})
+    RETURN coalesce(m.status = 'ready', false) as ready
+"""
+
+# Compare-and-set on the state node: lock it, then claim the rebuild unless
+# another process holds an unexpired lease (or, with $if_needed, it is ready)
+CLAIM_AGGREGATE_REBUILD_QUERY = """
+    MERGE (m:PatternAggregateState {id: 'default'})
+    SET m.claim_lock = true
+    REMOVE m.claim_lock
+    WITH m,
+         coalesce(m.status = 'building' AND m.lease_until > datetime(), false) as busy,
+         coalesce(m.status = 'ready', false) as ready
+    WITH m, ready, busy OR ($if_needed AND ready) as skip
+    FOREACH (claim IN CASE WHEN skip THEN [] ELSE [1] END |
+        SET m.status = 'building',
+            m.generation = coalesce(m.generation, 0) + 1,
+            m.lease_until = datetime() + duration({seconds: $lease_seconds}))
+    RETURN NOT skip as claimed, ready, m.generation as generation
+"""
+
+# Run in the claiming transaction, so no ingest sees the flags cleared but
+# the old aggregates still in place
+CLEAR_AGGREGATED_FLAGS_QUERY = """
+    MATCH (s:Session) WHERE s.pattern_aggregated IS NOT NULL
+    REMOVE s.pattern_aggregated
+"""
+
+DROP_PATTERN_AGGREGATES_QUERY = """
+    MATCH (n)
+    WHERE n:StrategyStats OR n:ToolUsageStats OR n:SuccessPatternStats
+    DELETE n
+"""
+
+RENEW_AGGREGATE_LEASE_QUERY = """
+    MATCH (m:PatternAggregateState {id: 'default'})
+    WHERE m.generation = $generation AND m.status = 'building'
+    SET m.lease_until = datetime() + duration({seconds: $lease_seconds})
+    RETURN m.generation as generation
+"""
+
+FINISH_AGGREGATE_REBUILD_QUERY = """
+    MATCH (m:PatternAggregateState {id: 'default'})
+    WHERE m.generation = $generation AND m.status = 'building'
+    SET m.status = 'ready', m.built_at = datetime()
+    REMOVE m.lease_until
+    RETURN m.generation as generation
+"""
+
+# After clear_database there is nothing to aggregate; any running rebuild is fenced off
+MARK_AGGREGATES_READY_QUERY = """
+    MERGE (m:PatternAggregateState {id: 'default'})
+    SET m.status = 'ready', m.built_at = datetime(),
+        m.generation = coalesce(m.generation, 0) + 1
+    REMOVE m.lease_until
+"""
+
+# Seconds a rebuild may go without progress before another process takes it over
+AGGREGATE_REBUILD_LEASE_SECONDS = 300
+
+SESSION_DETAIL_QUERY = """
+    MATCH (s:Session {id: $session_id})-[:CONTAINS]->(t:Thought)
+    RETURN s.id as session_id, s.reasoning_strategy as strategy,
+           collect(t.content) as thoughts
+"""
+
+SESSION_OVERVIEW_QUERY = """
+    MATCH (s:Session)
+    OPTIONAL MATCH (s)-[:CONTAINS]->(t:Thought)
+    WITH s, count(t) as thought_count
+    RETURN s.id as session_id, s.reasoning_strategy as strategy,
+           thought_count, s.timestamp as timestamp
+    ORDER BY timestamp DESC
+"""
+
+# Queries checked by KnowledgeGraphBuilder.explain_standard_queries, with
+# placeholder parameters
+STANDARD_READ_QUERIES = {
+    'session_exists': (SESSION_EXISTS_QUERY, {'session_id': 'explain_probe'}),
+    'session_detail': (SESSION_DETAIL_QUERY, {'session_id': 'explain_probe'}),
+    'session_overview': (SESSION_OVERVIEW_QUERY, {}),
+    'orphan_candidates': (ORPHAN_CANDIDATES_QUERY, {'session_id': 'explain_probe'}),
+    'reasoning_patterns': (REASONING_PATTERNS_QUERY, {}),
+    'successful_patterns': (SUCCESSFUL_PATTERNS_QUERY, {}),
+    'tool_usage_patterns': (TOOL_USAGE_PATTERNS_QUERY, {}),
+}
+
+STANDARD_WRITE_QUERIES = {
+    'delete_session': (DELETE_SESSION_QUERY, {'session_id': 'explain_probe'}),
+    'delete_thought_batch': (DELETE_THOUGHT_BATCH_QUERY, {'session_id': 'explain_probe', 'batch_size': 1}),
+    'apply_pattern_aggregates': (APPLY_PATTERN_AGGREGATES_QUERY, {'session_id': 'explain_probe', 'sign': 1}),
+    'unwind_thoughts': (UNWIND_THOUGHTS_QUERY, {'session_id': 'explain_probe', 'rows': []}),
+    'unwind_flows': (UNWIND_FLOWS_QUERY, {'rows': []}),
+}
+
+
+# Labels written by this project; graph views are limited to these
+GRAPH_LABELS = ['Session', 'Thought', 'Entity', 'Tool']
+
+# (write time, unique key) each graph label is paged by; schema version 5
+# indexes both together so pages come straight off the index in order
+GRAPH_PAGE_KEYS = {
+    'Session': ('timestamp', 'id'),
+    'Thought': ('timestamp', 'id'),
+    'Entity': ('last_seen', 'name'),
+    'Tool': ('last_seen', 'name'),
+}
+
+# A delta ``version`` is this far behind the read, so nodes whose write
+# transaction started before the read but committed after it are not missed
+GRAPH_DELTA_OVERLAP_SECONDS = 60
+
+# Entities and tools written before they carried last_seen would never be paged
+BACKFILL_LAST_SEEN_QUERY = """
+    MATCH (n) WHERE (n:Entity OR n:Tool) AND n.last_seen IS NULL
+    WITH n LIMIT $batch_size
+    SET n.last_seen = datetime({epochMillis: 0})
+"""
+
+# Everything this project owns, in the order clear_database deletes it
+OWNED_LABELS = ['Thought', 'Session', 'Entity', 'Tool', 'StrategyStats',
+                'ToolUsageStats', 'SuccessPatternStats', 'PatternAggregateState']
+
+# Graph visualization rows carry only element ids and the displayed
+# properties, never whole node objects
+GRAPH_NODE_FIELDS = """
+    elementId(n) as id,
+    coalesce(n.name, n.content, elementId(n)) as label,
+    coalesce(labels(n)[0], 'unknown') as type
+"""
+
+GRAPH_LABEL_FILTER = "(" + " OR ".join(f"n:{label}" for label in GRAPH_LABELS) + ")"
+
+GRAPH_NODES_QUERY = f"MATCH (n) WHERE {GRAPH_LABEL_FILTER} RETURN" + GRAPH_NODE_FIELDS
+
+GRAPH_LINKS_QUERY = """
+    MATCH (n)-[r]->(m)
+    RETURN elementId(n) as source, elementId(m) as target,
+           type(r) as type, coalesce(r.strength, 1.0) as strength
+"""
+
+GRAPH_PAGE_LINKS_QUERY = """
+    UNWIND $ids AS id
+    MATCH (n)-[r]->(m)
+    WHERE elementId(n) = id
+      AND ($labels IS NULL OR any(label IN labels(m) WHERE label IN $labels))
+    RETURN id as source, elementId(m) as target,
+           type(r) as type, coalesce(r.strength, 1.0) as strength
+"""
+
+# Nodes of one session: the session, its thoughts and what they mention/use
+SESSION_SUBGRAPH_MATCH = """
+    MATCH (s:Session {id: $session_id})
+    CALL {
+        WITH s
+        RETURN s AS n
+        UNION
+        WITH s
+        MATCH (s)-[:CONTAINS]->(n:Thought)
+        RETURN n
+        UNION
+        WITH s
+        MATCH (s)-[:CONTAINS]->(:Thought)-[:MENTIONS|USES_TOOL]->(n)
+        RETURN n
+    }
+"""
+
+
+def graph_page_query(label: str, session_id: Optional[str] = None, after: bool = False,
+                     since: Optional[str] = None, until: Optional[str] = None) -> str:
+    """Build the keyset-paginated node query of one label for get_graph_page's filters
+
+    Nodes come in (write time, key) order, which the label's composite index
+    returns without sorting, and ``after`` seeks past $after_time/$after_key.
+    """
+    time_key, key = GRAPH_PAGE_KEYS[label]
+    # Predicates on both properties let the planner use the composite index
+    conditions = [f"n.{time_key} IS NOT NULL", f"n.{key} IS NOT NULL"]
+    if after:
+        # The range seeks the index; the rest only skips nodes written at the cursor's time
+        conditions.append(f"n.{time_key} >= datetime($after_time)")
+        conditions.append(f"(n.{time_key} > datetime($after_time) OR n.{key} > $after_key)")
+    if since:
+        conditions.append(f"n.{time_key} > datetime($since)")
+    if until:
+        conditions.append(f"n.{time_key} <= datetime($until)")
+
+    match = f"{SESSION_SUBGRAPH_MATCH} WITH n WHERE n:{label} AND" if session_id else f"MATCH (n:{label}) WHERE"
+    return f"""
+        {match} {" AND ".join(conditions)}
+        RETURN {GRAPH_NODE_FIELDS},
+               toString(n.{time_key}) as cursor_time, n.{key} as cursor_key
+        ORDER BY n.{time_key}, n.{key}
+        LIMIT $limit
+    """
+
+
+def encode_graph_cursor(label: str, time: str, key: str) -> str:
+    """Opaque next_cursor for the node after (time, key) of ``label``"""
+    return base64.urlsafe_b64encode(json.dumps([label, time, key]).encode()).decode()
+
+
+def decode_graph_cursor(cursor: str) -> Tuple[str, str, str]:
+    """(label, time, key) of a next_cursor; ValueError if it is not one"""
+    try:
+        label, time, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid graph cursor: {cursor!r}") from e
+    if label not in GRAPH_PAGE_KEYS or not isinstance(time, str) or not isinstance(key, str):
+        raise ValueError(f"Invalid graph cursor: {cursor!r}")
+    return label, time, key
+
+
+# Deep pages must stay index seeks, so explain_standard_queries checks them too
+STANDARD_READ_QUERIES.update({
+    f"graph_page_{label.lower()}": (graph_page_query(label, after=True),
+                                    {'after_time': '1970-01-01T00:00:00Z', 'after_key': '', 'limit': 1})
+    for label in GRAPH_PAGE_KEYS
+})
+
+
+@dataclass
+class SessionDeleteReport:
+    """What KnowledgeGraphBuilder.delete_session removed (nodes_deleted includes orphans)"""
+    session_id: str
+    nodes_deleted: int = 0
+    relationships_deleted: int = 0
+    orphans_deleted: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def found(self) -> bool:
+        return self.nodes_deleted > 0
+
+    def add(self, counters):
+        """Accumulate the summary counters of one write transaction"""
+        self.nodes_deleted += counters.nodes_deleted
+        self.relationships_deleted += counters.relationships_deleted
+        self.batches += 1
+
+
 class KnowledgeGraphBuilder:
     """Builds and manages the Neo4j knowledge graph"""
 
-    def __init__(self, uri: str, user: str, password: str):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri: str, user: str, password: str, bulk_writes: bool = True,
+                 driver=None, read_uri: Optional[str] = None, read_driver=None):
+        self.uri = uri
+        # An injected driver stays owned by the caller; otherwise take a
+        # reference to the process-wide driver for these credentials
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else get_driver(uri, user, password)
+        # Reads go to a replica when one is configured, otherwise to the same driver
+        read_uri = read_uri or os.getenv('NEO4J_READ_URI')
+        self._owns_read_driver = read_driver is None and bool(read_uri)
+        if read_driver is not None:
+            self.read_driver = read_driver
+        elif read_uri:
+            self.read_driver = get_driver(read_uri, user, password)
+        else:
+            self.read_driver = self.driver
+        self.bulk_writes = bulk_writes
         self._create_constraints()
+        self._ensure_pattern_aggregates()
 
     def _create_constraints(self):
-        """Create necessary constraints and indexes"""
+        """Create necessary constraints and indexes (checked once per process)"""
+        created = ensure_schema(self.driver, self.uri or f"driver-{id(self.driver)}")
+        if created:
+            logger.info("Created schema: %s", ', '.join(created))
+        if {'entity_last_seen_name', 'tool_last_seen_name'} & set(created):
+            self._backfill_last_seen()
+
+    def _backfill_last_seen(self, batch_size: int = 10000):
+        """Give entities and tools without last_seen the epoch, so graph pages include them"""
+        while self.write(BACKFILL_LAST_SEEN_QUERY, batch_size=batch_size).properties_set:
+            pass
+
+    def explain_standard_queries(self, profile: bool = False) -> List[QueryPlan]:
+        """EXPLAIN the standard queries to check which indexes they use
+
+        With ``profile`` the read queries are PROFILEd against the live data
+        (write queries are only ever EXPLAINed).
+        """
+        plans = explain_queries(self.driver, STANDARD_READ_QUERIES, profile=profile)
+        plans += explain_queries(self.driver, STANDARD_WRITE_QUERIES)
+        for plan in plans:
+            logger.info("%s", plan)
+        return plans
+
+    def read(self, query: str, primary: bool = False, **params) -> List[Dict[str, Any]]:
+        """Run a read query in a managed read transaction, retried on transient errors
+
+        Reads go to ``read_driver`` (a replica, when configured) unless
+        ``primary`` asks for the write driver's view.
+        """
+        def work(tx):
+            return [record.data() for record in tx.run(query, **params)]
+
+        driver = self.driver if primary else self.read_driver
+        with driver.session() as session:
+            return session.execute_read(work)
+
+    def write(self, query: str, **params):
+        """Run a write query in a managed write transaction and return its counters"""
+        def work(tx):
+            return tx.run(query, **params).consume().counters
+
+        with self.driver.session() as session:
+            return session.execute_write(work)
+
+    def _ensure_pattern_aggregates(self):
+        """Build the pattern aggregates once for graphs that predate them"""
+        if self.read(AGGREGATES_READY_QUERY, primary=True)[0]['ready']:
+            return
+        self.rebuild_pattern_aggregates(if_needed=True)
+
+    def rebuild_pattern_aggregates(self, batch_size: int = 500, if_needed: bool = False,
+                                   poll_seconds: float = 1.0) -> bool:
+        """Recompute the pattern aggregate nodes from every stored session
+
+        Only one process rebuilds at a time: the rebuild is claimed on the
+        PatternAggregateState node in the same transaction that drops the old
+        aggregates, and other callers wait for it to finish instead of
+        rebuilding in parallel (taking over if its lease expires). Sessions
+        ingested meanwhile count themselves and are skipped by the rebuild.
+        With ``if_needed`` nothing is done if the aggregates are already
+        ready. Returns True if this call did the rebuild.
+        """
+        def claim(tx, if_needed):
+            state = tx.run(CLAIM_AGGREGATE_REBUILD_QUERY, if_needed=if_needed,
+                           lease_seconds=AGGREGATE_REBUILD_LEASE_SECONDS).single().data()
+            if state['claimed']:
+                tx.run(CLEAR_AGGREGATED_FLAGS_QUERY).consume()
+                tx.run(DROP_PATTERN_AGGREGATES_QUERY).consume()
+            return state
+
+        def apply_batch(tx, batch, generation):
+            if tx.run(RENEW_AGGREGATE_LEASE_QUERY, generation=generation,
+                      lease_seconds=AGGREGATE_REBUILD_LEASE_SECONDS).single() is None:
+                return False
+            for session_id in batch:
+                tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+            return True
+
         with self.driver.session() as session:
-            # Create constraints
-            constraints = [
-                "CREATE CONSTRAINT thought_id IF NOT EXISTS FOR (t:Thought) REQUIRE t.id IS UNIQUE",
-                "CREATE CONSTRAINT session_id IF NOT EXISTS FOR (s:Session) REQUIRE s.id IS UNIQUE",
-                "CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
-                "CREATE CONSTRAINT tool_name IF NOT EXISTS FOR (t:Tool) REQUIRE t.name IS UNIQUE"
-            ]
-
-            for constraint in constraints:
-                try:
-                    session.run(constraint)
-                except Exception as e:
-                    print(f"Constraint creation note: {e}")
+            while True:
+                state = session.execute_write(claim, if_needed)
+                if state['claimed']:
+                    break
+                if state['ready']:
+                    # Another process finished the rebuild this call was waiting for
+                    return False
+                # Wait for the other rebuild, then reuse its result
+                if_needed = True
+                time.sleep(poll_seconds)
+
+            generation = state['generation']
+            logger.info("Rebuilding pattern aggregates (generation %s)", generation)
+            session_ids = [record['id'] for record in
+                           self.read("MATCH (s:Session) RETURN s.id as id", primary=True)]
+            try:
+                for start in range(0, len(session_ids), batch_size):
+                    if not session.execute_write(apply_batch, session_ids[start:start + batch_size], generation):
+                        logger.warning("Pattern aggregate rebuild %s was taken over", generation)
+                        return False
+                session.execute_write(lambda tx: tx.run(FINISH_AGGREGATE_REBUILD_QUERY,
+                                                        generation=generation).consume())
+            finally:
+                self._mark_graph_changed()
+        return True
 
     def add_thinking_session(self, session_id: str, thinking_text: str,
-                             analyzed_data: Dict[str, Any], overwrite: bool = True) -> str:
-        """Add a complete thinking session to the knowledge graph"""
+                             analyzed_data: Dict[str, Any], overwrite: bool = True,
+                             bulk: Optional[bool] = None) -> str:
+        """Add a complete thinking session to the knowledge graph
 
+        With bulk writes (the default) the whole session is sent as a handful of
+        UNWIND statements inside one write transaction; otherwise every node and
+        relationship is written with its own statement.
+        """
+        if bulk is None:
+            bulk = self.bulk_writes
+
+        try:
+            if bulk:
+                with self.driver.session() as session:
+                    session.execute_write(self._write_session_batched, session_id,
+                                          thinking_text, analyzed_data, overwrite)
+            else:
+                self._write_session_per_statement(session_id, thinking_text, analyzed_data, overwrite)
+        finally:
+            self._mark_graph_changed()
+        return session_id
+
+    def _write_session_per_statement(self, session_id: str, thinking_text: str,
+                                     analyzed_data: Dict[str, Any], overwrite: bool = True):
+        """Write a session with one auto-commit statement per node and relationship"""
         with self.driver.session() as session:
             # Check if session already exists and handle accordingly
             existing_session = session.run("""
@@ -221,17 +1001,17 @@ class KnowledgeGraphBuilder:
             """, session_id=session_id).single()
 
             if existing_session and not overwrite:
-                print(f"Session {session_id} already exists. Use overwrite=True to replace it.")
-                return session_id
+                logger.info("Session %s already exists. Use overwrite=True to replace it.", session_id)
+                return
             elif existing_session and overwrite:
                 # Delete existing session and all related nodes
-                print(f"Overwriting existing session: {session_id}")
-                session.run("""
-                    MATCH (s:Session {id: $session_id})
-                    OPTIONAL MATCH (s)-[:CONTAINS]->(t:Thought)
-                    OPTIONAL MATCH (t)-[r1:MENTIONS|USES_TOOL|REASONING_FLOW]-()
-                    DELETE r1, t, s
-                """, session_id=session_id)
+                logger.debug("Overwriting existing session: %s", session_id)
+                session.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=-1)
+                orphan_candidates = session.run(
+                    DELETE_SESSION_QUERY, session_id=session_id
+                ).single()['orphan_candidates']
+            else:
+                orphan_candidates = []
 
             # Create session node
             session.run("""
@@ -275,6 +1055,7 @@ class KnowledgeGraphBuilder:
                 for entity in thought['entities']:
                     session.run("""
                         MERGE (e:Entity {name: $entity})
+                        SET e.last_seen = datetime()
                         WITH e
                         MATCH (t:Thought {id: $thought_id})
                         MERGE (t)-[:MENTIONS]->(e)
@@ -284,6 +1065,7 @@ class KnowledgeGraphBuilder:
                 for tool in thought['tools_mentioned']:
                     session.run("""
                         MERGE (tool:Tool {name: $tool})
+                        SET tool.last_seen = datetime()
                         WITH tool
                         MATCH (t:Thought {id: $thought_id})
                         MERGE (t)-[:USES_TOOL]->(tool)
@@ -302,119 +1084,367 @@ class KnowledgeGraphBuilder:
                 """, source_id=source_id, target_id=target_id,
                             rel_type=rel['relationship'], strength=rel['strength'])
 
-        return session_id
+            session.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+
+            if orphan_candidates:
+                session.run(DELETE_ORPHANS_QUERY, ids=orphan_candidates)
+
+    def add_thinking_sessions(self, sessions: List[Tuple[str, str, Dict[str, Any]]],
+                              overwrite: bool = True) -> List[str]:
+        """Write several (session_id, thinking_text, analyzed_data) sessions in one transaction"""
+
+        def write_all(tx):
+            for session_id, thinking_text, analyzed_data in sessions:
+                self._write_session_batched(tx, session_id, thinking_text, analyzed_data, overwrite)
+
+        try:
+            with self.driver.session() as session:
+                session.execute_write(write_all)
+        finally:
+            self._mark_graph_changed()
+        return [session_id for session_id, _, _ in sessions]
+
+    def append_thoughts(self, session_id: str, thoughts: List[Dict[str, Any]], first_index: int,
+                        thinking_text: str) -> int:
+        """Append thoughts to a live session in one write transaction
+
+        The session is created on the first append. Thoughts are numbered from
+        ``first_index`` and chained with ``leads_to`` flows, including one from
+        thought ``first_index - 1``. ``thinking_text`` is the text received so
+        far. Pattern aggregates are re-applied, so they stay correct while the
+        session grows. Returns the index after the last appended thought.
+        """
+        if not thoughts:
+            return first_index
+
+        rows = self._session_rows(session_id, {'thoughts': thoughts, 'relationships': [
+            {'source_thought': i, 'target_thought': i + 1, 'relationship': 'leads_to', 'strength': 0.8}
+            for i in range(len(thoughts) - 1)
+        ]}, first_index)
+        if first_index > 0:
+            rows['flows'].insert(0, {
+                'source_id': f"{session_id}_thought_{first_index - 1}",
+                'target_id': rows['thoughts'][0]['id'],
+                'type': 'leads_to',
+                'strength': 0.8
+            })
+
+        def append(tx):
+            tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=-1)
+            tx.run(APPEND_SESSION_QUERY, session_id=session_id, thinking_text=thinking_text)
+            for query, key in ((UNWIND_THOUGHTS_QUERY, 'thoughts'),
+                               (UNWIND_MENTIONS_QUERY, 'mentions'),
+                               (UNWIND_TOOLS_QUERY, 'tools'),
+                               (UNWIND_FLOWS_QUERY, 'flows')):
+                if rows[key]:
+                    tx.run(query, session_id=session_id, rows=rows[key])
+            tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+
+        try:
+            with self.driver.session() as session:
+                session.execute_write(append)
+        finally:
+            self._mark_graph_changed()
+        return first_index + len(thoughts)
+
+    def delete_session(self, session_id: str, batch_size: int = 1000,
+                       collect_orphans: bool = True) -> "SessionDeleteReport":
+        """Delete a session and its thoughts in bounded batches
+
+        The session node and its pattern-aggregate contribution are removed
+        first, then thoughts are found through the Thought.session_id index
+        and deleted ``batch_size`` at a time, each batch in its own short
+        transaction. With ``collect_orphans`` the entities and tools that no
+        longer have any relationship are deleted as well. If a batch fails,
+        calling again finishes the remaining thoughts.
+        """
+        report = SessionDeleteReport(session_id)
+        started = time.perf_counter()
+
+        def delete_session_node(tx):
+            candidates = tx.run(ORPHAN_CANDIDATES_QUERY, session_id=session_id).single()['ids']
+            tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=-1)
+            return candidates, tx.run(DELETE_SESSION_NODE_QUERY, session_id=session_id).consume().counters
+
+        def run_counted(tx, query, **params):
+            return tx.run(query, **params).consume().counters
+
+        try:
+            with self.driver.session() as session:
+                candidates, counters = session.execute_write(delete_session_node)
+                report.add(counters)
+
+                while True:
+                    counters = session.execute_write(run_counted, DELETE_THOUGHT_BATCH_QUERY,
+                                                     session_id=session_id, batch_size=batch_size)
+                    if not counters.nodes_deleted:
+                        break
+                    report.add(counters)
+
+                if collect_orphans:
+                    for start in range(0, len(candidates), batch_size):
+                        counters = session.execute_write(run_counted, DELETE_ORPHANS_QUERY,
+                                                         ids=candidates[start:start + batch_size])
+                        report.add(counters)
+                        report.orphans_deleted += counters.nodes_deleted
+        finally:
+            self._mark_graph_changed()
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _mark_graph_changed(self):
+        """Bump the shared graph version so results cached against the old graph are dropped
+
+        The version lives in Neo4j, so every process sees the bump. Failing
+        to bump it only leaves caches stale until the TTL.
+        """
+        try:
+            self.write(BUMP_GRAPH_VERSION_QUERY)
+        except Exception as e:
+            logger.warning("Could not bump the shared graph version: %s", e)
+
+    def shared_graph_version(self) -> str:
+        """The graph version every process sees, read from the primary"""
+        return self.read(GRAPH_VERSION_QUERY, primary=True)[0]['version']
+
+    @staticmethod
+    def _session_rows(session_id: str, analyzed_data: Dict[str, Any],
+                      first_index: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+        """Flatten analyzed data into the row lists consumed by the UNWIND statements
+
+        ``first_index`` numbers the thoughts from that position, for thoughts
+        appended to a session that already has some.
+        """
+        thought_ids = [f"{session_id}_thought_{first_index + i}" for i in range(len(analyzed_data['thoughts']))]
+
+        thoughts, mentions, tools = [], [], []
+        for i, thought in enumerate(analyzed_data['thoughts']):
+            thoughts.append({
+                'id': thought_ids[i],
+                'content': thought['content'],
+                'type': thought['type'],
+                'confidence': thought['confidence'],
+                'order': first_index + i
+            })
+            mentions.extend({'thought_id': thought_ids[i], 'name': entity}
+                            for entity in thought['entities'])
+            tools.extend({'thought_id': thought_ids[i], 'name': tool}
+                         for tool in thought['tools_mentioned'])
+
+        flows = [{
+            'source_id': thought_ids[rel['source_thought']],
+            'target_id': thought_ids[rel['target_thought']],
+            'type': rel['relationship'],
+            'strength': rel['strength']
+        } for rel in analyzed_data.get('relationships', [])]
+
+        return {'thoughts': thoughts, 'mentions': mentions, 'tools': tools, 'flows': flows}
+
+    @classmethod
+    def _write_session_batched(cls, tx, session_id: str, thinking_text: str,
+                               analyzed_data: Dict[str, Any], overwrite: bool = True) -> bool:
+        """Write a thinking session inside an open transaction using UNWIND batches.
+
+        Returns False when the session already exists and overwrite is disabled.
+        """
+        existing_session = tx.run(SESSION_EXISTS_QUERY, session_id=session_id).single()
+
+        if existing_session and not overwrite:
+            logger.info("Session %s already exists. Use overwrite=True to replace it.", session_id)
+            return False
+        elif existing_session and overwrite:
+            logger.debug("Overwriting existing session: %s", session_id)
+            tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=-1)
+            orphan_candidates = tx.run(DELETE_SESSION_QUERY, session_id=session_id).single()['orphan_candidates']
+        else:
+            orphan_candidates = []
+
+        rows = cls._session_rows(session_id, analyzed_data)
+
+        tx.run(MERGE_SESSION_QUERY, session_id=session_id, thinking_text=thinking_text,
+               strategy=analyzed_data.get('reasoning_strategy', 'unknown'),
+               domain=analyzed_data.get('domain', 'general'),
+               success_indicators=analyzed_data.get('success_indicators', []))
+
+        # Empty batches are skipped so they do not cost a round trip
+        for query, key in ((UNWIND_THOUGHTS_QUERY, 'thoughts'),
+                           (UNWIND_MENTIONS_QUERY, 'mentions'),
+                           (UNWIND_TOOLS_QUERY, 'tools'),
+                           (UNWIND_FLOWS_QUERY, 'flows')):
+            if rows[key]:
+                tx.run(query, session_id=session_id, rows=rows[key])
+
+        tx.run(APPLY_PATTERN_AGGREGATES_QUERY, session_id=session_id, sign=1)
+
+        # Entities/tools only the replaced version referenced
+        if orphan_candidates:
+            tx.run(DELETE_ORPHANS_QUERY, ids=orphan_candidates)
+        return True
 
     def query_reasoning_patterns(self) -> List[Dict[str, Any]]:
         """Query for common reasoning patterns"""
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (s:Session)
-                RETURN s.reasoning_strategy as strategy, 
-                       s.domain as domain,
-                       count(s) as frequency
-                ORDER BY frequency DESC
-            """)
-            return [record.data() for record in result]
+        return self.read(REASONING_PATTERNS_QUERY)
 
     def find_successful_patterns(self) -> List[Dict[str, Any]]:
         """Find patterns that led to successful reasoning"""
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (s:Session)-[:CONTAINS]->(t:Thought)
-                WHERE size(s.success_indicators) > 0
-                WITH s.reasoning_strategy as strategy, s.success_indicators as indicators,
-                     collect(t.type) as thought_sequence
-                RETURN strategy, thought_sequence, indicators, count(*) as frequency
-                ORDER BY frequency DESC
-            """)
-            return [record.data() for record in result]
+        return self.read(SUCCESSFUL_PATTERNS_QUERY)
 
     def get_tool_usage_patterns(self) -> List[Dict[str, Any]]:
         """Analyze tool usage patterns in reasoning"""
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (t:Thought)-[:USES_TOOL]->(tool:Tool)
-                WITH tool.name as tool_name, 
-                     collect(t.type) as thought_types,
-                     count(t) as usage_count
-                RETURN tool_name, thought_types, usage_count
-                ORDER BY usage_count DESC
-            """)
-            return [record.data() for record in result]
+        return self.read(TOOL_USAGE_PATTERNS_QUERY)
 
     def close(self):
-        """Close the database connection"""
-        self.driver.close()
+        """Close the database connection (a shared driver closes with its last user)"""
+        if self._owns_read_driver:
+            self.read_driver.close()
+        if self._owns_driver:
+            self.driver.close()
 
 
 class AgentThinkingKG:
     """Main class that orchestrates the thinking-to-KG conversion"""
 
     def __init__(self, neo4j_uri: str = None, neo4j_user: str = None,
-                 neo4j_password: str = None):
+                 neo4j_password: str = None, driver=None, neo4j_read_uri: str = None):
         # Use provided credentials or environment variables
         self.neo4j_uri = neo4j_uri or os.getenv('NEO4J_URI')
         self.neo4j_user = neo4j_user or os.getenv('NEO4J_USER')
         self.neo4j_password = neo4j_password or os.getenv('NEO4J_PASSWORD')
         
-        if not all([self.neo4j_uri, self.neo4j_user, self.neo4j_password]):
+        if driver is None and not all([self.neo4j_uri, self.neo4j_user, self.neo4j_password]):
             raise ValueError("Neo4j credentials must be provided either through parameters or environment variables")
 
-        self.analyzer = ThinkingAnalyzer()
+        self.analyzer = ThinkingAnalyzer(cache=AnalysisCache.from_env())
         self.kg_builder = KnowledgeGraphBuilder(
-            self.neo4j_uri, self.neo4j_user, self.neo4j_password
+            self.neo4j_uri, self.neo4j_user, self.neo4j_password, driver=driver,
+            read_uri=neo4j_read_uri
         )
+        self.patterns_cache = PatternsCache.from_env()
 
     def process_thinking(self, thinking_text: str, session_id: str = None,
-                         overwrite: bool = True) -> str:
+                         overwrite: bool = True) -> ThinkingResult:
         """Process agent thinking text and add to knowledge graph"""
         if not session_id:
             session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        print(f"Analyzing thinking text...")
+        logger.debug("Analyzing thinking text for %s (%d chars)", session_id, len(thinking_text))
+        start = time.perf_counter()
         analyzed_data, raw_llm_response = self.analyzer.analyze_thinking_text(thinking_text)
+        analyzed = time.perf_counter()
 
-        print(f"Adding to knowledge graph...")
+        logger.debug("Adding %s to knowledge graph", session_id)
         result_session_id = self.kg_builder.add_thinking_session(
             session_id, thinking_text, analyzed_data, overwrite
         )
 
-        print(f"Successfully processed thinking session: {result_session_id}")
-        return result_session_id, raw_llm_response, thinking_text
-
-    def analyze_patterns(self) -> Dict[str, Any]:
+        result = ThinkingResult(
+            result_session_id, analyzed_data, raw_llm_response, thinking_text,
+            analyze_seconds=analyzed - start, write_seconds=time.perf_counter() - analyzed
+        )
+        logger.info("Processed thinking session %s", result_session_id,
+                    extra={'analyze_ms': round(result.analyze_seconds * 1000, 1),
+                           'write_ms': round(result.write_seconds * 1000, 1),
+                           'fallback': result.fallback})
+        return result
+
+    def process_many(self, traces: Iterable[Trace], concurrency: int = 4,
+                     batch_size: int = 25, overwrite: bool = True,
+                     progress=None) -> IngestReport:
+        """Bulk-ingest many traces through the pipelined analyze/write stages
+
+        Each trace is either the thinking text or a (session_id, thinking_text)
+        pair. Analyses run on ``concurrency`` threads and are written
+        ``batch_size`` sessions per transaction; failures are reported per item
+        in the returned report instead of aborting the run.
+        """
+        pipeline = IngestPipeline(self.analyzer, self.kg_builder,
+                                  concurrency=concurrency, batch_size=batch_size,
+                                  overwrite=overwrite, progress=progress)
+        report = pipeline.run(traces)
+        logger.info("Ingested %d/%d traces (%.1f traces/sec, %d failed)", report.stats.written,
+                    report.stats.submitted, report.stats.traces_per_sec, report.stats.failed)
+        return report
+
+    def analyze_patterns(self, use_cache: bool = True) -> Dict[str, Any]:
         """Analyze reasoning patterns in the knowledge graph"""
+        if use_cache:
+            return self.analyze_patterns_cached()[0]
+        return self._query_patterns()
+
+    def analyze_patterns_cached(self) -> Tuple[Dict[str, Any], str]:
+        """analyze_patterns results and their ETag, recomputed only after a write by any process"""
+        return self.patterns_cache.get_or_compute(self.kg_builder.shared_graph_version(), self._query_patterns)
+
+    def _query_patterns(self) -> Dict[str, Any]:
         return {
             'reasoning_patterns': self.kg_builder.query_reasoning_patterns(),
             'successful_patterns': self.kg_builder.find_successful_patterns(),
             'tool_usage_patterns': self.kg_builder.get_tool_usage_patterns()
         }
 
-    def clear_database(self):
-        """Clear all data from the knowledge graph (use with caution!)"""
-        with self.kg_builder.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
-            print("Database cleared successfully!")
+    def delete_session(self, session_id: str, batch_size: int = 1000,
+                       collect_orphans: bool = True) -> SessionDeleteReport:
+        """Delete one session from the knowledge graph"""
+        report = self.kg_builder.delete_session(session_id, batch_size, collect_orphans)
+        logger.info("Deleted session %s: %d nodes, %d relationships in %.2fs", session_id,
+                    report.nodes_deleted, report.relationships_deleted, report.elapsed)
+        return report
+
+    def clear_database(self, batch_size: int = 10000,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       owned_labels_only: bool = False) -> int:
+        """Clear data from the knowledge graph (use with caution!)
+
+        Nodes are detach-deleted ``batch_size`` at a time, each batch in its
+        own transaction, so heap use stays bounded and an interrupted clear
+        resumes where it stopped when called again. ``progress(deleted, total)``
+        is called after every batch. With ``owned_labels_only`` only this
+        project's labels are removed, found by label scans instead of scanning
+        every node. Returns the number of nodes deleted.
+        """
+        # Thoughts carry nearly all relationships, so they go first and the
+        # later labels are deleted with few or no edges left to detach
+        scopes = [f":{label}" for label in OWNED_LABELS]
+        if not owned_labels_only:
+            scopes.append("")
+
+        def delete_batch(tx, query):
+            return tx.run(query, batch_size=batch_size).consume().counters.nodes_deleted
+
+        deleted = 0
+        try:
+            with self.kg_builder.driver.session() as session:
+                if owned_labels_only:
+                    total = sum(self.kg_builder.read(f"MATCH (n{scope}) RETURN count(n) as count",
+                                                     primary=True)[0]['count']
+                                for scope in scopes)
+                else:
+                    total = self.kg_builder.read("MATCH (n) RETURN count(n) as count", primary=True)[0]['count']
+
+                for scope in scopes:
+                    query = f"MATCH (n{scope}) WITH n LIMIT $batch_size DETACH DELETE n"
+                    while True:
+                        batch_deleted = session.execute_write(delete_batch, query)
+                        if not batch_deleted:
+                            break
+                        deleted += batch_deleted
+                        if progress:
+                            progress(deleted, total)
+                        else:
+                            logger.debug("Cleared %d/%d nodes", deleted, total)
+
+                session.execute_write(lambda tx: tx.run(MARK_AGGREGATES_READY_QUERY).consume())
+                logger.info("Database cleared: %d nodes deleted", deleted)
+        finally:
+            self.kg_builder._mark_graph_changed()
+        return deleted
 
     def get_session_info(self, session_id: str = None) -> List[Dict[str, Any]]:
         """Get information about sessions in the database"""
-        with self.kg_builder.driver.session() as session:
-            if session_id:
-                result = session.run("""
-                    MATCH (s:Session {id: $session_id})-[:CONTAINS]->(t:Thought)
-                    RETURN s.id as session_id, s.reasoning_strategy as strategy,
-                           collect(t.content) as thoughts
-                """, session_id=session_id)
-            else:
-                result = session.run("""
-                    MATCH (s:Session)
-                    OPTIONAL MATCH (s)-[:CONTAINS]->(t:Thought)
-                    WITH s, count(t) as thought_count
-                    RETURN s.id as session_id, s.reasoning_strategy as strategy,
-                           thought_count, s.timestamp as timestamp
-                    ORDER BY timestamp DESC
-                """)
-            return [record.data() for record in result]
+        if session_id:
+            return self.kg_builder.read(SESSION_DETAIL_QUERY, session_id=session_id)
+        return self.kg_builder.read(SESSION_OVERVIEW_QUERY)
 
     def close(self):
         """Close database connections"""
@@ -422,47 +1452,121 @@ class AgentThinkingKG:
 
     def get_full_graph_data(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get all nodes and relationships for the knowledge graph visualization"""
-        with self.kg_builder.driver.session() as session:
-            # Fetch all nodes
-            nodes_result = session.run("MATCH (n) RETURN n")
-            nodes = []
-            for record in nodes_result:
-                node = record['n']
-                nodes.append({
-                    'id': node.element_id,
-                    'label': node.get('name') or node.get('content') or node.element_id,
-                    'type': list(node.labels)[0] if list(node.labels) else 'unknown'
-                })
-
-            # Fetch all relationships
-            relationships_result = session.run("MATCH (n)-[r]->(m) RETURN n, r, m")
-            links = []
-            for record in relationships_result:
-                start_node = record['n']
-                end_node = record['m']
-                relationship = record['r']
-                links.append({
-                    'source': start_node.element_id,
-                    'target': end_node.element_id,
-                    'type': relationship.type,
-                    'strength': relationship.get('strength', 1.0) # Default strength if not present
-                })
+        def fetch(tx):
+            # Both reads share one transaction, so links match the nodes
+            nodes = [record.data() for record in tx.run(GRAPH_NODES_QUERY)]
+            links = [record.data() for record in tx.run(GRAPH_LINKS_QUERY)]
+            return nodes, links
+
+        with self.kg_builder.read_driver.session() as session:
+            nodes, links = session.execute_read(fetch)
 
         return {
             'nodes': nodes,
             'links': links
         }
 
+    def iter_graph_records(self, fetch_size: int = 1000) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream ('node', row) pairs and then ('link', row) pairs for the whole graph
+
+        Rows are pulled from Neo4j ``fetch_size`` at a time while the caller
+        consumes them, so memory stays flat however large the graph is. The
+        stream is not retried (rows may already be sent), so it runs in an
+        explicit transaction of a READ-mode session rather than a managed
+        one; both reads share it, so links match the nodes already sent.
+        """
+        with self.kg_builder.read_driver.session(fetch_size=fetch_size,
+                                                 default_access_mode=READ_ACCESS) as session:
+            with session.begin_transaction() as tx:
+                for record in tx.run(GRAPH_NODES_QUERY):
+                    yield 'node', record.data()
+
+                for record in tx.run(GRAPH_LINKS_QUERY):
+                    yield 'link', record.data()
+
+    def get_graph_page(self, cursor: Optional[str] = None, limit: int = 500,
+                       session_id: Optional[str] = None, labels: Optional[List[str]] = None,
+                       since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of the graph for incremental loading
+
+        Nodes are paged label by label in order of when they were last
+        written, then by key, with ``cursor`` (the ``next_cursor`` of the
+        previous page); every page is an index seek, however deep. Each page
+        carries the outgoing relationships of its nodes, so the union of all
+        pages is the whole (filtered) graph. ``since``/``until`` are ISO-8601
+        timestamps matched against when a node was last written; passing a
+        previous response's ``version`` as ``since`` returns what changed
+        after it (deletions are not reported). ``version`` trails the read by
+        GRAPH_DELTA_OVERLAP_SECONDS so writes still committing during the
+        read are not missed, and a delta may repeat nodes from that window.
+        Raises ValueError for a malformed cursor or an unknown label.
+        """
+        unknown = set(labels or ()) - set(GRAPH_PAGE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown graph labels: {', '.join(sorted(unknown))}")
+        page_labels = [label for label in GRAPH_LABELS if not labels or label in labels]
+        # LIMIT rejects negative values, and an empty page must not look full
+        limit = max(1, limit)
+
+        after = None
+        if cursor:
+            cursor_label, after_time, after_key = decode_graph_cursor(cursor)
+            if cursor_label not in page_labels:
+                raise ValueError(f"Graph cursor for {cursor_label} does not match the label filter")
+            page_labels = page_labels[page_labels.index(cursor_label):]
+            after = (after_time, after_key)
+
+        def fetch(tx):
+            version = tx.run("RETURN toString(datetime() - duration({seconds: $overlap})) as version",
+                             overlap=GRAPH_DELTA_OVERLAP_SECONDS).single()['version']
+
+            nodes, last_label = [], None
+            for label in page_labels:
+                # Only the cursor's own label resumes mid-way; later labels start at their beginning
+                label_after = after if label == page_labels[0] else None
+                nodes.extend(record.data() for record in tx.run(
+                    graph_page_query(label, session_id, label_after is not None, since, until),
+                    limit=limit - len(nodes), session_id=session_id, since=since, until=until,
+                    after_time=label_after[0] if label_after else None,
+                    after_key=label_after[1] if label_after else None
+                ))
+                last_label = label
+                if len(nodes) == limit:
+                    break
+
+            links = [record.data() for record in tx.run(
+                GRAPH_PAGE_LINKS_QUERY, ids=[node['id'] for node in nodes], labels=labels
+            )] if nodes else []
+            return version, nodes, last_label, links
+
+        with self.kg_builder.read_driver.session() as session:
+            version, nodes, last_label, links = session.execute_read(fetch)
+
+        next_cursor = None
+        if nodes and len(nodes) == limit:
+            next_cursor = encode_graph_cursor(last_label, nodes[-1]['cursor_time'], nodes[-1]['cursor_key'])
+        for node in nodes:
+            del node['cursor_time'], node['cursor_key']
+
+        return {
+            'nodes': nodes,
+            'links': links,
+            'next_cursor': next_cursor,
+            'version': version
+        }
+
 
 # Example usage
 def main():
+    configure_logging()
+
     # Initialize the system
     kg_system = AgentThinkingKG()
 
     try:
         # Clear existing data (optional - comment out to keep existing data)
         print("Clearing existing data...")
-        kg_system.clear_database()
+        kg_system.clear_database(owned_labels_only=True)
 
         # Example thinking process
         thinking_example = input()
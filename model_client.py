@@ -0,0 +1,376 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# HTTP statuses worth retrying: rate limited, server error, unavailable, timeout
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ModelUnavailable(Exception):
+    """The model could not answer in time; callers should degrade rather than wait"""
+
+
+class CircuitOpen(ModelUnavailable):
+    """Raised without calling the model while the circuit breaker is open"""
+
+
+class RateLimited(ModelUnavailable):
+    """No rate-limit token would be free within the call deadline"""
+
+
+class ModelBusy(ModelUnavailable):
+    """No concurrency slot freed up within the call deadline; says nothing about the provider"""
+
+
+class ModelDeadlineExceeded(ModelUnavailable, TimeoutError):
+    """A single model call ran past its deadline"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, dropped connections and 429/5xx responses; not our own fail-fast errors"""
+    if isinstance(error, (CircuitOpen, RateLimited, ModelBusy)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core errors carry the HTTP status as ``code``
+    code = getattr(error, 'code', None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class ModelClientSettings:
+    """Rate limit, deadline, retry and circuit-breaker options for one model"""
+    # Calls per second across the process; 0 disables the limiter
+    rate_per_second: float = 0.0
+    burst: int = 10
+    timeout_seconds: float = 60.0
+    max_attempts: int = 4
+    backoff_seconds: float = 0.5
+    backoff_max_seconds: float = 8.0
+    max_concurrency: int = 16
+    # Consecutive retryable failures that open the breaker, and how long it stays open
+    breaker_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "ModelClientSettings":
+        """Settings from MODEL_* variables, falling back to the defaults above"""
+        defaults = cls()
+        return cls(
+            rate_per_second=_env_float('MODEL_RATE_PER_SECOND', defaults.rate_per_second),
+            burst=int(os.getenv('MODEL_BURST', defaults.burst)),
+            timeout_seconds=_env_float('MODEL_TIMEOUT_SECONDS', defaults.timeout_seconds),
+            max_attempts=max(1, int(os.getenv('MODEL_MAX_ATTEMPTS', defaults.max_attempts))),
+            backoff_seconds=_env_float('MODEL_BACKOFF_SECONDS', defaults.backoff_seconds),
+            backoff_max_seconds=_env_float('MODEL_BACKOFF_MAX_SECONDS', defaults.backoff_max_seconds),
+            max_concurrency=max(1, int(os.getenv('MODEL_MAX_CONCURRENCY', defaults.max_concurrency))),
+            breaker_threshold=max(1, int(os.getenv('MODEL_BREAKER_THRESHOLD', defaults.breaker_threshold))),
+            breaker_reset_seconds=_env_float('MODEL_BREAKER_RESET_SECONDS', defaults.breaker_reset_seconds)
+        )
+
+
+class TokenBucket:
+    """Token-bucket rate limiter refilled at ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token, returning how long to wait before using it
+
+        Returns None, taking nothing, when the wait would exceed ``max_wait``.
+        Waiting callers queue in arrival order because each reservation
+        pushes the balance further below zero.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and rejects calls for ``reset_seconds``
+
+    After that one probe call is let through (half-open): success closes
+    the breaker, failure opens it again for another ``reset_seconds``.
+    """
+
+    def __init__(self, threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing or self._clock() - self._opened_at >= self.reset_seconds:
+                return 'half_open'
+            return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and self._clock() - self._opened_at >= self.reset_seconds:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def abandon_probe(self):
+        """Give up a half-open probe that never reached the provider, so another call can probe"""
+        with self._lock:
+            # While open only the probe gets past allow(); a call admitted just before
+            # the breaker opened may clear it too, which at worst allows a second probe
+            if self._opened_at is not None:
+                self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.threshold):
+                self._opened_at = self._clock()
+                self.times_opened += 1
+            self._probing = False
+
+
+class ModelClient:
+    """Rate-limited, deadline-bound, retrying wrapper around a generative model.
+
+    Exposes the model's ``generate_content`` and ``generate_content_async``,
+    so it can stand in wherever the Gemini model was used. Every attempt
+    takes a token from the shared bucket, runs with a deadline, and is
+    retried with jittered exponential backoff if it fails with a retryable
+    error. Consecutive retryable failures open the circuit breaker, after
+    which calls fail at once with CircuitOpen until the provider recovers.
+    Anything that means "the model is not answering" surfaces as
+    ModelUnavailable; other errors (bad request, auth) propagate unchanged.
+    """
+
+    def __init__(self, model, settings: Optional[ModelClientSettings] = None, name: Optional[str] = None):
+        self.model = model
+        self.settings = settings or ModelClientSettings.from_env()
+        self.name = name or getattr(model, 'model_name', type(model).__name__)
+        self.bucket = TokenBucket(self.settings.rate_per_second, self.settings.burst)
+        self.breaker = CircuitBreaker(self.settings.breaker_threshold, self.settings.breaker_reset_seconds)
+        # Runs blocking calls so they can be abandoned at the deadline. A slot is
+        # held until the call really returns, so a submitted call never queues
+        # behind abandoned ones and its deadline only measures the provider
+        self._executor = ThreadPoolExecutor(max_workers=self.settings.max_concurrency,
+                                            thread_name_prefix='model')
+        self._slots = threading.BoundedSemaphore(self.settings.max_concurrency)
+        self._async_limits: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {name: 0 for name in (
+            'calls', 'attempts', 'succeeded', 'retries', 'timeouts', 'errors',
+            'rate_limited', 'short_circuited', 'saturated', 'unavailable'
+        )}
+
+    def generate_content(self, prompt, **kwargs):
+        self._count('calls')
+        retrying = Retrying(**self._retry_kwargs())
+        try:
+            for attempt in retrying:
+                with attempt:
+                    return self._attempt(prompt, kwargs)
+        except ModelUnavailable:
+            self._count('unavailable')
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            self._count('unavailable')
+            raise ModelUnavailable(f"{self.name} failed {self.settings.max_attempts} attempts: {e}") from e
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self._count('calls')
+        retrying = AsyncRetrying(**self._retry_kwargs())
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    return await self._attempt_async(prompt, kwargs)
+        except ModelUnavailable:
+            self._count('unavailable')
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            self._count('unavailable')
+            raise ModelUnavailable(f"{self.name} failed {self.settings.max_attempts} attempts: {e}") from e
+
+    def _retry_kwargs(self) -> Dict[str, Any]:
+        return {
+            'stop': stop_after_attempt(self.settings.max_attempts),
+            'wait': wait_random_exponential(multiplier=self.settings.backoff_seconds,
+                                            max=self.settings.backoff_max_seconds),
+            'retry': retry_if_exception(is_retryable),
+            'before_sleep': lambda state: self._count('retries'),
+            'reraise': True
+        }
+
+    def _admit(self) -> float:
+        """Check the breaker and take a rate-limit token; returns the wait before calling"""
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise CircuitOpen(f"{self.name} circuit breaker is open")
+        wait = self.bucket.reserve(self.settings.timeout_seconds)
+        if wait is None:
+            # A half-open probe that is never sent must not keep the breaker half-open
+            self.breaker.abandon_probe()
+            self._count('rate_limited')
+            raise RateLimited(f"{self.name} rate limit of {self.settings.rate_per_second}/s exceeded")
+        self._count('attempts')
+        return wait
+
+    def _attempt(self, prompt, kwargs):
+        wait = self._admit()
+        try:
+            time.sleep(wait)
+            # Waiting for a slot is local queueing, not a provider failure: no breaker update
+            if not self._slots.acquire(timeout=self.settings.timeout_seconds):
+                self._count('saturated')
+                raise ModelBusy(f"{self.name} has no free slot of {self.settings.max_concurrency}")
+            try:
+                future = self._executor.submit(self.model.generate_content, prompt, **kwargs)
+            except BaseException:
+                self._slots.release()
+                raise
+        except BaseException:
+            # The call never reached the provider, so if it was the probe another call may probe
+            self.breaker.abandon_probe()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            response = future.result(timeout=self.settings.timeout_seconds)
+        except FutureTimeout:
+            # The worker thread finishes on its own and then frees the slot; its result is dropped
+            self._failed(timeout=True)
+            raise ModelDeadlineExceeded(f"{self.name} call exceeded {self.settings.timeout_seconds}s")
+        except Exception as e:
+            self._failed(e)
+            raise
+        self._succeeded()
+        return response
+
+    async def _attempt_async(self, prompt, kwargs):
+        wait = self._admit()
+        try:
+            await asyncio.sleep(wait)
+            async with self._async_limit():
+                try:
+                    response = await asyncio.wait_for(self.model.generate_content_async(prompt, **kwargs),
+                                                      self.settings.timeout_seconds)
+                except asyncio.TimeoutError:
+                    self._failed(timeout=True)
+                    raise ModelDeadlineExceeded(f"{self.name} call exceeded {self.settings.timeout_seconds}s")
+                except Exception as e:
+                    self._failed(e)
+                    raise
+        except asyncio.CancelledError:
+            # Cancelled before an outcome was recorded: let another call probe
+            self.breaker.abandon_probe()
+            raise
+        self._succeeded()
+        return response
+
+    def _async_limit(self) -> asyncio.Semaphore:
+        # One semaphore per event loop; asyncio primitives cannot be shared between loops
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limit = self._async_limits.get(loop)
+            if limit is None:
+                limit = self._async_limits[loop] = asyncio.Semaphore(self.settings.max_concurrency)
+            return limit
+
+    def _succeeded(self):
+        self._count('succeeded')
+        self.breaker.record_success()
+
+    def _failed(self, error: Optional[BaseException] = None, timeout: bool = False):
+        self._count('timeouts' if timeout else 'errors')
+        if timeout or is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            # The provider answered, even if with an error of ours
+            self.breaker.record_success()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'model': self.name,
+            **counters,
+            'breaker': self.breaker.state,
+            'breaker_opened': self.breaker.times_opened,
+            'rate_per_second': self.settings.rate_per_second,
+            'timeout_seconds': self.settings.timeout_seconds
+        }
+
+    def __getattr__(self, name):
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+_clients: Dict[str, ModelClient] = {}
+_lock = threading.Lock()
+
+
+def get_model_client(model_name: str, settings: Optional[ModelClientSettings] = None) -> ModelClient:
+    """Process-wide client for a Gemini model, so every caller shares its rate limit and breaker"""
+    with _lock:
+        client = _clients.get(model_name)
+        if client is None:
+            import google.generativeai as genai
+
+            client = _clients[model_name] = ModelClient(genai.GenerativeModel(model_name), settings, model_name)
+        return client
+
+
+def model_client_stats() -> List[Dict[str, Any]]:
+    """stats() of every shared model client"""
+    with _lock:
+        clients = list(_clients.values())
+    return [client.stats() for client in clients]
@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Penalty and bonus weights used to score a reasoning path"""
+    mistake_penalty: float = 0.2
+    backtrack_penalty: float = 0.15
+    implicit_penalty: float = 0.1
+    success_bonus: float = 0.1
+    tool_bonus: float = 0.05
+    tool_bonus_cap: float = 0.2
+    efficiency_bonus: float = 0.2
+    length_baseline: int = 3
+    length_penalty: float = 0.02
+
+
+DEFAULT_WEIGHTS = ScoringWeights()
+
+
+def score_path(confidences: Sequence[float], mistake_count: int, backtrack_count: int,
+               success_count: int, tool_count: int, implicit_issue_count: int,
+               efficiency_score: float, weights: ScoringWeights = DEFAULT_WEIGHTS) -> float:
+    """Score a single reasoning path (the scalar reference for score_paths_batch)"""
+    if not confidences:
+        return 0.0
+
+    # Base score from average confidence
+    base_score = sum(confidences) / len(confidences)
+
+    # Enhanced penalties and bonuses
+    mistake_penalty = mistake_count * weights.mistake_penalty
+    backtrack_penalty = backtrack_count * weights.backtrack_penalty
+    implicit_penalty = implicit_issue_count * weights.implicit_penalty
+    success_bonus = success_count * weights.success_bonus
+    tool_efficiency = min(tool_count * weights.tool_bonus, weights.tool_bonus_cap)
+    efficiency_bonus = efficiency_score * weights.efficiency_bonus
+
+    # Length efficiency
+    length_efficiency = max(0, 1 - (len(confidences) - weights.length_baseline) * weights.length_penalty)
+
+    final_score = (base_score + success_bonus + tool_efficiency +
+                   length_efficiency + efficiency_bonus) - \
+                  (mistake_penalty + backtrack_penalty + implicit_penalty)
+
+    return max(0.0, min(1.0, final_score))
+
+
+@dataclass
+class PathFeatures:
+    """Columnar scoring features for many sessions.
+
+    Per-thought arrays are concatenated across sessions; session ``i`` owns
+    the slice ``offsets[i]:offsets[i + 1]``. Per-session arrays have one
+    entry per session. Extracting features runs the text detectors once;
+    scoring afterwards is pure array arithmetic, so the whole corpus can be
+    re-scored cheaply with different weights.
+    """
+    session_ids: List[str]
+    offsets: np.ndarray
+    confidences: np.ndarray
+    mistake_flags: np.ndarray
+    backtrack_cues: np.ndarray
+    implicit_issue_counts: np.ndarray
+    efficiency_scores: np.ndarray
+    success_counts: np.ndarray
+    tool_counts: np.ndarray
+    implicit_issues: List[List[str]] = field(default_factory=list)
+    efficiency_issues: List[List[str]] = field(default_factory=list)
+
+    @classmethod
+    def from_sessions(cls, sessions: Iterable[Dict[str, Any]], detector) -> "PathFeatures":
+        """Build features from session records (session_id, thoughts, confidences,
+        success_indicators, tools) using an EnhancedReasoningMistakeDetector"""
+        session_ids, lengths = [], []
+        confidences, mistake_flags, backtrack_cues, implicit_counts = [], [], [], []
+        efficiency_scores, success_counts, tool_counts = [], [], []
+        implicit_issues, efficiency_issues = [], []
+
+        for session in sessions:
+            thoughts = session['thoughts']
+            # Offsets advance by len(thoughts); a short confidence list would shift every later session
+            if len(session['confidences']) != len(thoughts):
+                raise ValueError(f"Session {session['session_id']} has {len(thoughts)} thoughts "
+                                 f"but {len(session['confidences'])} confidences")
+            session_ids.append(session['session_id'])
+            lengths.append(len(thoughts))
+
+            session_issues = []
+            for thought, confidence in zip(thoughts, session['confidences']):
+                analysis = detector.analyze_thought_quality(thought, confidence)
+                confidences.append(confidence)
+                mistake_flags.append(analysis['is_mistake'])
+                implicit_counts.append(len(analysis['implicit_issues']))
+                session_issues.extend(analysis['implicit_issues'])
+                thought_lower = thought.lower()
+                backtrack_cues.append('reconsider' in thought_lower or 'instead' in thought_lower)
+            implicit_issues.append(list(set(session_issues)))
+
+            efficiency = detector.analyze_reasoning_efficiency(thoughts)
+            efficiency_scores.append(efficiency['efficiency_score'])
+            efficiency_issues.append(efficiency['efficiency_issues'])
+            success_counts.append(len(session.get('success_indicators') or []))
+            tool_counts.append(len(session.get('tools') or []))
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(
+            session_ids=session_ids,
+            offsets=offsets,
+            confidences=np.asarray(confidences, dtype=np.float64),
+            mistake_flags=np.asarray(mistake_flags, dtype=bool),
+            backtrack_cues=np.asarray(backtrack_cues, dtype=bool),
+            implicit_issue_counts=np.asarray(implicit_counts, dtype=np.int64),
+            efficiency_scores=np.asarray(efficiency_scores, dtype=np.float64),
+            success_counts=np.asarray(success_counts, dtype=np.int64),
+            tool_counts=np.asarray(tool_counts, dtype=np.int64),
+            implicit_issues=implicit_issues,
+            efficiency_issues=efficiency_issues
+        )
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def _segment_totals(self, values: np.ndarray) -> np.ndarray:
+        """Exact per-session sums of an integer/bool per-thought array"""
+        totals = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(values, out=totals[1:])
+        return totals[self.offsets[1:]] - totals[self.offsets[:-1]]
+
+    def mistake_counts(self) -> np.ndarray:
+        return self._segment_totals(self.mistake_flags)
+
+    def implicit_issue_totals(self) -> np.ndarray:
+        return self._segment_totals(self.implicit_issue_counts)
+
+    def backtrack_counts(self) -> np.ndarray:
+        """Mistakes followed by a 'reconsider'/'instead' cue within the next two thoughts"""
+        n = len(self.confidences)
+        index = np.arange(n)
+        session_end = np.repeat(self.offsets[1:], self.lengths)
+
+        next1 = np.zeros(n, dtype=bool)
+        next2 = np.zeros(n, dtype=bool)
+        next1[:-1] = self.backtrack_cues[1:]
+        next2[:-2] = self.backtrack_cues[2:]
+        followed = ((index + 1 < session_end) & next1) | ((index + 2 < session_end) & next2)
+        return self._segment_totals(self.mistake_flags & followed)
+
+    def confidence_sums(self) -> np.ndarray:
+        """Per-session confidence sums, added left to right like the scalar sum()"""
+        lengths = self.lengths
+        sums = np.zeros(len(lengths), dtype=np.float64)
+        starts = self.offsets[:-1]
+        for position in range(int(lengths.max(initial=0))):
+            active = lengths > position
+            sums[active] += self.confidences[starts[active] + position]
+        return sums
+
+
+def score_paths_batch(features: PathFeatures, weights: ScoringWeights = DEFAULT_WEIGHTS) -> np.ndarray:
+    """Vectorized score_path over every session in ``features``"""
+    lengths = features.lengths
+    has_thoughts = lengths > 0
+
+    base_score = np.divide(features.confidence_sums(), lengths,
+                           out=np.zeros(len(lengths)), where=has_thoughts)
+
+    mistake_penalty = features.mistake_counts() * weights.mistake_penalty
+    backtrack_penalty = features.backtrack_counts() * weights.backtrack_penalty
+    implicit_penalty = features.implicit_issue_totals() * weights.implicit_penalty
+    success_bonus = features.success_counts * weights.success_bonus
+    tool_efficiency = np.minimum(features.tool_counts * weights.tool_bonus, weights.tool_bonus_cap)
+    efficiency_bonus = features.efficiency_scores * weights.efficiency_bonus
+
+    length_efficiency = np.maximum(0, 1 - (lengths - weights.length_baseline) * weights.length_penalty)
+
+    final_score = (base_score + success_bonus + tool_efficiency +
+                   length_efficiency + efficiency_bonus) - \
+                  (mistake_penalty + backtrack_penalty + implicit_penalty)
+
+    return np.where(has_thoughts, np.clip(final_score, 0.0, 1.0), 0.0)
@@ -0,0 +1,244 @@
+import re
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Phrase lists used by EnhancedReasoningMistakeDetector. They are matched
+# against lowercased thought text, so patterns containing uppercase letters
+# (e.g. 'I think') never match; that mirrors the original per-pattern loop.
+MISTAKE_PATTERNS = [
+    r'on second thought',
+    r'actually',
+    r'wait',
+    r'no[,\s]',
+    r'incorrect',
+    r'wrong',
+    r'mistake',
+    r'error',
+    r'oops',
+    r'sorry',
+    r'let me reconsider',
+    r'I was wrong',
+    r'that\'s not right',
+    r'correction',
+    r'revise'
+]
+
+UNCERTAINTY_PATTERNS = [
+    r'maybe',
+    r'perhaps',
+    r'might',
+    r'could be',
+    r'not sure',
+    r'uncertain',
+    r'possibly',
+    r'I think'
+]
+
+CONFIDENCE_PATTERNS = [
+    r'clearly',
+    r'obviously',
+    r'definitely',
+    r'certainly',
+    r'without doubt',
+    r'I\'m confident',
+    r'sure that',
+    r'determined that'
+]
+
+OVERTHINKING_PATTERNS = [
+    r'but then again',
+    r'on the other hand',
+    r'alternatively',
+    r'or maybe',
+    r'but what if',
+    r'unless',
+    r'although',
+    r'however',
+    r'but I remember',
+    r'given all this'
+]
+
+CIRCULAR_REASONING_PATTERNS = [
+    r'but if I already',
+    r'why do I need to confirm',
+    r'that seems circular',
+    r'back to',
+    r'again'
+]
+
+ANALYSIS_PARALYSIS_PATTERNS = [
+    r'I should first',
+    r'maybe I should',
+    r'perhaps I should',
+    r'to be safe',
+    r'just to make sure',
+    r'I can\'t rule out',
+    r'unless I\'ve',
+    r'might just be'
+]
+
+# Word groups counted by analyze_reasoning_efficiency
+EFFICIENCY_WORD_GROUPS = {
+    'decision': ['will', 'should', 'must', 'need to', 'going to', 'decide'],
+    'analysis': ['consider', 'maybe', 'perhaps', 'might', 'could', 'possibly', 'alternatively'],
+    'conditional': ['if', 'unless', 'although', 'however', 'but']
+}
+
+_REGEX_META = set('.^$*+?{}[]|()')
+
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Return the plain string a regex matches, or None if it is not a pure literal"""
+    chars = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            # Escaped punctuation is literal; escaped letters/digits are classes
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                chars.append(pattern[i + 1])
+                i += 2
+                continue
+            return None
+        if char in _REGEX_META:
+            return None
+        chars.append(char)
+        i += 1
+    return ''.join(chars)
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Regex matching the longest of ``words`` starting at a position"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+
+class PatternSetMatcher:
+    """Counts which patterns of each category occur in a text in a single scan.
+
+    ``count(text)[category]`` equals
+    ``sum(1 for p in patterns if re.search(p, text))`` for that category.
+
+    Pure-literal patterns are merged into one trie-shaped regex that finds the
+    longest literal at each position. Literals that a match hides (ones it
+    contains, or ones starting inside it and running past its end) are
+    resolved from tables built once here, so overlapping phrases such as
+    'might' / 'might just be' or 'again' / 'but then again' are still counted.
+    The rare non-literal patterns are searched individually. Results are
+    memoized per text, up to ``cache_size`` texts.
+    """
+
+    def __init__(self, pattern_sets: Dict[str, List[str]], cache_size: int = 65536):
+        self.categories = list(pattern_sets)
+        self.cache_size = cache_size
+        self._memo: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._counts_by_hits: Dict[Tuple[FrozenSet[str], Tuple[bool, ...]], Tuple[int, ...]] = {}
+
+        owners: Dict[str, List[Tuple[int, int]]] = {}
+        self._non_literals: List[Tuple[Tuple[int, int], "re.Pattern"]] = []
+        for category_index, category in enumerate(self.categories):
+            for pattern_index, pattern in enumerate(pattern_sets[category]):
+                literal = _as_literal(pattern)
+                key = (category_index, pattern_index)
+                if literal:
+                    owners.setdefault(literal, []).append(key)
+                else:
+                    self._non_literals.append((key, re.compile(pattern)))
+
+        literals = sorted(owners, key=len, reverse=True)
+        self._owners = owners
+        self._scanner = re.compile(_trie_regex(literals)) if literals else None
+
+        # Literals implied by a match: itself and every literal it contains
+        self._contained = {
+            literal: frozenset(other for other in literals if other in literal)
+            for literal in literals
+        }
+        # Literals that start inside a match and continue past its end:
+        # (offset within the match, literal) pairs checked with startswith
+        self._straddling = {
+            literal: [(offset, other)
+                      for offset in range(1, len(literal))
+                      for other in literals
+                      if len(other) > len(literal) - offset
+                      and other.startswith(literal[offset:])]
+            for literal in literals
+        }
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of matching patterns per category"""
+        counts = self._memo.get(text)
+        if counts is None:
+            counts = self._scan(text)
+            if self.cache_size:
+                self._memo[text] = counts
+                if len(self._memo) > self.cache_size:
+                    self._memo.popitem(last=False)
+        return dict(zip(self.categories, counts))
+
+    def _scan(self, text: str) -> Tuple[int, ...]:
+        found = set()
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                literal = match.group()
+                found |= self._contained[literal]
+                start = match.start()
+                for offset, other in self._straddling[literal]:
+                    if other not in found and text.startswith(other, start + offset):
+                        found |= self._contained[other]
+
+        non_literal_hits = tuple(bool(regex.search(text)) for _, regex in self._non_literals)
+        hits_key = (frozenset(found), non_literal_hits)
+
+        counts = self._counts_by_hits.get(hits_key)
+        if counts is None:
+            matched = {key for literal in found for key in self._owners[literal]}
+            matched.update(key for (key, _), hit in zip(self._non_literals, non_literal_hits) if hit)
+            totals = [0] * len(self.categories)
+            for category_index, _ in matched:
+                totals[category_index] += 1
+            counts = tuple(totals)
+            self._counts_by_hits[hits_key] = counts
+        return counts
+
+
+class WordGroupCounter:
+    """Counts whole-word occurrences for several word groups in one regex pass.
+
+    Equivalent to ``len(re.findall(r'\\b(w1|w2|...)\\b', text))`` per group,
+    provided no word is shared between groups (checked on construction).
+    """
+
+    def __init__(self, word_groups: Dict[str, List[str]]):
+        seen = {}
+        for group, words in word_groups.items():
+            for token in (t for word in words for t in word.split()):
+                if seen.setdefault(token, group) != group:
+                    raise ValueError(f"'{token}' appears in both {seen[token]} and {group}")
+
+        self.groups = list(word_groups)
+        self._regex = re.compile(r'\b(?:' + '|'.join(
+            f"(?P<{group}>" + '|'.join(word_groups[group]) + ')' for group in self.groups
+        ) + r')\b')
+
+    def count(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.groups, 0)
+        for match in self._regex.finditer(text):
+            counts[match.lastgroup] += 1
+        return counts
@@ -0,0 +1,194 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever SCHEMA changes so running processes apply the new entries
+SCHEMA_VERSION = 5
+
+# (name, statement) pairs. Names are what SHOW INDEXES reports; a uniqueness
+# constraint is found through its backing index of the same name.
+SCHEMA: List[Tuple[str, str]] = [
+    # Version 1: uniqueness constraints for merge keys
+    ('thought_id', "CREATE CONSTRAINT thought_id IF NOT EXISTS FOR (t:Thought) REQUIRE t.id IS UNIQUE"),
+    ('session_id', "CREATE CONSTRAINT session_id IF NOT EXISTS FOR (s:Session) REQUIRE s.id IS UNIQUE"),
+    ('entity_name', "CREATE CONSTRAINT entity_name IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE"),
+    ('tool_name', "CREATE CONSTRAINT tool_name IF NOT EXISTS FOR (t:Tool) REQUIRE t.name IS UNIQUE"),
+    ('strategy_stats_key',
+     "CREATE CONSTRAINT strategy_stats_key IF NOT EXISTS FOR (n:StrategyStats) REQUIRE n.key IS UNIQUE"),
+    ('tool_usage_stats_key',
+     "CREATE CONSTRAINT tool_usage_stats_key IF NOT EXISTS FOR (n:ToolUsageStats) REQUIRE n.key IS UNIQUE"),
+    ('success_pattern_stats_key',
+     "CREATE CONSTRAINT success_pattern_stats_key IF NOT EXISTS "
+     "FOR (n:SuccessPatternStats) REQUIRE n.key IS UNIQUE"),
+    # Version 2: range indexes on the properties queries filter and sort by
+    ('thought_session_id', "CREATE INDEX thought_session_id IF NOT EXISTS FOR (t:Thought) ON (t.session_id)"),
+    ('thought_sequence_order',
+     "CREATE INDEX thought_sequence_order IF NOT EXISTS FOR (t:Thought) ON (t.sequence_order)"),
+    ('session_timestamp', "CREATE INDEX session_timestamp IF NOT EXISTS FOR (s:Session) ON (s.timestamp)"),
+    ('session_reasoning_strategy',
+     "CREATE INDEX session_reasoning_strategy IF NOT EXISTS FOR (s:Session) ON (s.reasoning_strategy)"),
+    ('session_domain', "CREATE INDEX session_domain IF NOT EXISTS FOR (s:Session) ON (s.domain)"),
+    # Version 3: one aggregate rebuild state node, even when processes start together
+    ('pattern_aggregate_state_id',
+     "CREATE CONSTRAINT pattern_aggregate_state_id IF NOT EXISTS "
+     "FOR (n:PatternAggregateState) REQUIRE n.id IS UNIQUE"),
+    # Version 4: one shared graph version node
+    ('graph_version_id',
+     "CREATE CONSTRAINT graph_version_id IF NOT EXISTS FOR (n:GraphVersion) REQUIRE n.id IS UNIQUE"),
+    # Version 5: (write time, key) indexes that serve graph pages in order
+    ('session_timestamp_id',
+     "CREATE INDEX session_timestamp_id IF NOT EXISTS FOR (n:Session) ON (n.timestamp, n.id)"),
+    ('thought_timestamp_id',
+     "CREATE INDEX thought_timestamp_id IF NOT EXISTS FOR (n:Thought) ON (n.timestamp, n.id)"),
+    ('entity_last_seen_name',
+     "CREATE INDEX entity_last_seen_name IF NOT EXISTS FOR (n:Entity) ON (n.last_seen, n.name)"),
+    ('tool_last_seen_name',
+     "CREATE INDEX tool_last_seen_name IF NOT EXISTS FOR (n:Tool) ON (n.last_seen, n.name)"),
+]
+
+_applied: Dict[Tuple[str, Optional[str]], int] = {}
+_lock = threading.Lock()
+
+
+def _missing(existing_names: Optional[set]) -> List[Tuple[str, str]]:
+    if existing_names is None:
+        return list(SCHEMA)
+    return [(name, statement) for name, statement in SCHEMA if name not in existing_names]
+
+
+def ensure_schema(driver, key: str, database: Optional[str] = None) -> List[str]:
+    """Create any missing constraints/indexes, once per process and database
+
+    ``key`` identifies the database server (normally its URI). The first
+    call reads the existing index names in one query and creates only what
+    is missing; later calls for the same key return immediately. Returns
+    the names created.
+    """
+    cache_key = (key, database)
+    with _lock:
+        if _applied.get(cache_key) == SCHEMA_VERSION:
+            return []
+
+        created = []
+        with driver.session(database=database) as session:
+            try:
+                existing = {record['name'] for record in session.run("SHOW INDEXES YIELD name")}
+            except Exception as e:
+                # Without SHOW privileges every IF NOT EXISTS statement is sent
+                logger.warning("Schema check failed, sending every statement: %s", e)
+                existing = None
+
+            for name, statement in _missing(existing):
+                try:
+                    session.run(statement).consume()
+                    created.append(name)
+                except Exception as e:
+                    logger.warning("Could not create %s: %s", name, e)
+
+        _applied[cache_key] = SCHEMA_VERSION
+        return created
+
+
+async def ensure_schema_async(driver, key: str, database: Optional[str] = None) -> List[str]:
+    """ensure_schema for neo4j.AsyncDriver"""
+    cache_key = (key, database)
+    # The thread lock is not held across awaits; a race only re-sends
+    # idempotent IF NOT EXISTS statements
+    if _applied.get(cache_key) == SCHEMA_VERSION:
+        return []
+
+    created = []
+    async with driver.session(database=database) as session:
+        try:
+            result = await session.run("SHOW INDEXES YIELD name")
+            existing = {record['name'] async for record in result}
+        except Exception as e:
+            logger.warning("Schema check failed, sending every statement: %s", e)
+            existing = None
+
+        for name, statement in _missing(existing):
+            try:
+                result = await session.run(statement)
+                await result.consume()
+                created.append(name)
+            except Exception as e:
+                logger.warning("Could not create %s: %s", name, e)
+
+    with _lock:
+        _applied[cache_key] = SCHEMA_VERSION
+    return created
+
+
+def reset_schema_cache():
+    """Forget which databases were checked, e.g. after dropping indexes"""
+    with _lock:
+        _applied.clear()
+
+
+@dataclass
+class QueryPlan:
+    """Operators of one EXPLAIN/PROFILE plan and whether an index is used"""
+    name: str
+    operators: List[str]
+    db_hits: Optional[int] = None
+    rows: Optional[int] = None
+    index_operators: List[str] = field(default_factory=list)
+    scans: List[str] = field(default_factory=list)
+
+    @property
+    def uses_index(self) -> bool:
+        return bool(self.index_operators)
+
+    def __str__(self) -> str:
+        status = "index" if self.uses_index else "NO INDEX"
+        details = f"{status}: {', '.join(self.index_operators) or '-'}"
+        if self.scans:
+            details += f"; scans: {', '.join(self.scans)}"
+        if self.db_hits is not None:
+            details += f"; {self.db_hits} db hits, {self.rows} rows"
+        return f"{self.name:<28} {details}"
+
+
+# Operators that read every node, or every node with a label
+SCAN_OPERATORS = ('AllNodesScan', 'NodeByLabelScan')
+
+
+def _walk(plan) -> List[Dict[str, Any]]:
+    nodes = [plan]
+    for child in plan.get('children', []):
+        nodes.extend(_walk(child))
+    return nodes
+
+
+def describe_plan(name: str, plan: Dict[str, Any]) -> QueryPlan:
+    """Summarize a plan dict from ResultSummary.plan or ResultSummary.profile"""
+    steps = _walk(plan)
+    # Operator names carry a runtime suffix, e.g. 'NodeIndexSeek@neo4j'
+    operators = [step['operatorType'].split('@')[0] for step in steps]
+    profiled = 'dbHits' in plan
+    return QueryPlan(
+        name=name,
+        operators=operators,
+        db_hits=sum(step.get('dbHits', 0) for step in steps) if profiled else None,
+        rows=plan.get('rows') if profiled else None,
+        index_operators=[op for op in operators if 'Index' in op],
+        scans=[op for op in operators if op in SCAN_OPERATORS]
+    )
+
+
+def explain_queries(driver, queries: Dict[str, Tuple[str, Dict[str, Any]]], profile: bool = False,
+                    database: Optional[str] = None) -> List[QueryPlan]:
+    """EXPLAIN (or PROFILE) each named (query, params) pair
+
+    PROFILE executes the query, so only pass read-only queries with it.
+    """
+    prefix = "PROFILE" if profile else "EXPLAIN"
+    plans = []
+    with driver.session(database=database) as session:
+        for name, (query, params) in queries.items():
+            summary = session.run(f"{prefix} {query}", **params).consume()
+            plans.append(describe_plan(name, summary.profile if profile else summary.plan))
+    return plans
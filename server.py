@@ -1,12 +1,46 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, g, request, jsonify, make_response, url_for
+from flask_socketio import SocketIO, emit, join_room
+from drivers import driver_stats
+from jobs import JobQueue, QueueFull
+from log_config import configure_logging, sampled_logger
+from model_client import model_client_stats
 from main import AgentThinkingKG
 import json
+import logging
+import os
+import time
+import zlib
+
+# LOG_LEVEL / LOG_FORMAT pick the level and text or JSON lines; access
+# lines below WARNING are kept at LOG_SAMPLE_RATE
+configure_logging()
+logger = logging.getLogger(__name__)
+access_logger = sampled_logger('server.access')
 
 app = Flask(__name__)
+socketio = SocketIO(app, cors_allowed_origins='http://localhost:3000')
 
 # Initialize the knowledge graph system
 kg_system = AgentThinkingKG()
 
+def emit_job_update(job):
+    # Only to clients watching this job: the result is one user's analysis
+    socketio.emit('job_update', job.as_dict(), to=job.id)
+    if job.done:
+        socketio.close_room(job.id)
+
+# Background /process_message jobs; every status change is pushed as a
+# 'job_update' socket.io event carrying the same body as /jobs/<id>
+job_queue = JobQueue.from_env(on_update=emit_job_update)
+
+# Query parameters that switch /get_graph_data to the paginated graph view
+GRAPH_PAGE_PARAMS = ('cursor', 'limit', 'session_id', 'label', 'since', 'until')
+DEFAULT_GRAPH_PAGE_SIZE = 500
+MAX_GRAPH_PAGE_SIZE = 5000
+
+# Bytes of NDJSON collected before /stream_graph_data sends a chunk
+STREAM_CHUNK_BYTES = 64 * 1024
+
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
@@ -15,6 +49,7 @@ def add_cors_headers(response):
 
 @app.before_request
 def handle_preflight():
+    g.request_started = time.perf_counter()
     if request.method == "OPTIONS":
         response = make_response()
         response = add_cors_headers(response)
@@ -23,75 +58,214 @@ def handle_preflight():
 @app.after_request
 def after_request(response):
     response = add_cors_headers(response)
-    print(f"Request received: {request.method} {request.path}")
-    print(f"Request headers: {dict(request.headers)}")
-    print(f"Response headers: {dict(response.headers)}")
+    duration_ms = (time.perf_counter() - g.get('request_started', time.perf_counter())) * 1000
+    # Server errors are logged regardless of sampling
+    level = logging.WARNING if response.status_code >= 500 else logging.INFO
+    access_logger.log(level, "%s %s %s %.1fms", request.method, request.path,
+                      response.status_code, duration_ms,
+                      extra={'method': request.method, 'path': request.path,
+                             'status': response.status_code, 'duration_ms': round(duration_ms, 1)})
+    if access_logger.isEnabledFor(logging.DEBUG):
+        access_logger.debug("Request headers: %s, response headers: %s",
+                            dict(request.headers), dict(response.headers))
     return response
 
+def run_message(message: str) -> dict:
+    """Run the analysis pipeline for one message and build the response body"""
+    # Process the message with the knowledge graph system; the analysis
+    # comes back already parsed, including when it is the regex fallback
+    result = kg_system.process_thinking(message)
+
+    # Extract the actual LLM response (assuming it's the content of the last thought)
+    llm_response_content = "No response generated" # Default message
+    thoughts = result.analysis.get('thoughts')
+    if thoughts:
+        # Assuming the last thought's content is the main response
+        llm_response_content = thoughts[-1].get('content', "No response content found")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Session %s response: %s, thinking trace: %s...",
+                     result.session_id, llm_response_content, result.raw_llm_response[:150])
+
+    return {
+        'response': llm_response_content, # Send extracted content as the main response
+        'session_id': result.session_id,
+        'thinking_trace': result.raw_llm_response # Send the original raw response with markdown for the trace
+    }
+
+def wants_async() -> bool:
+    """?async=1 or a 'Prefer: respond-async' header asks for a background job"""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
 @app.route('/process_message', methods=['POST'])
 def process_message():
-    print("Received request at /process_message")
     data = request.json
     message = data.get('message')
     
     if not message:
         return jsonify({'error': 'No message provided'}), 400
-    
+
+    if wants_async():
+        # Answer at once; the result is at /jobs/<id> and in a job_update event
+        try:
+            job = job_queue.submit(lambda: run_message(message))
+        except QueueFull as e:
+            response = jsonify({'error': f"Too many pending jobs: {e}"})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        status_url = url_for('get_job', job_id=job.id)
+        response = jsonify({**job.as_dict(), 'status_url': status_url})
+        response.headers['Location'] = status_url
+        return response, 202
+
     try:
-        print(f"Processing message: {message}")
-        # Process the message with the knowledge graph system
-        session_id, raw_llm_response, thinking_text = kg_system.process_thinking(message)
-        print("Finished kg_system.process_thinking")
-
-        # Clean the raw LLM response to remove markdown fencing before parsing
-        cleaned_llm_response = raw_llm_response.strip()
-        if cleaned_llm_response.startswith('```json'):
-            cleaned_llm_response = cleaned_llm_response[7:-3].strip()
-        elif cleaned_llm_response.startswith('```'):
-            cleaned_llm_response = cleaned_llm_response[3:-3].strip()
-
-        # Parse the cleaned LLM response (which is the thinking trace JSON)
-        print(f"Cleaned LLM response: {cleaned_llm_response}")
-        llm_thinking_data = json.loads(cleaned_llm_response)
-        print("Finished json.loads")
-
-        # Extract the actual LLM response (assuming it's the content of the last thought)
-        llm_response_content = "No response generated" # Default message
-        if 'thoughts' in llm_thinking_data and llm_thinking_data['thoughts']:
-            # Assuming the last thought's content is the main response
-            llm_response_content = llm_thinking_data['thoughts'][-1].get('content', "No response content found")
-        print(f"Extracted LLM response content: {llm_response_content}")
-        
-        print(f"Sending response: {llm_response_content}, Thinking Trace: {raw_llm_response[:150]}...")
-        return jsonify({
-            'response': llm_response_content, # Send extracted content as the main response
-            'session_id': session_id,
-            'thinking_trace': raw_llm_response # Send the original raw response with markdown for the trace
-        })
+        return jsonify(run_message(message))
     except Exception as e:
-        print(f"An error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Processing message failed")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.as_dict())
+
+@socketio.on('watch_job')
+def watch_job(data):
+    # The job id from the 202 response is what entitles a client to its updates,
+    # just as for /jobs/<id>
+    job_id = (data or {}).get('job_id', '')
+    if job_queue.get(job_id) is None:
+        return
+    join_room(job_id)
+    # Read again after joining: an update sent before the join was missed
+    job = job_queue.get(job_id)
+    if job is not None:
+        emit('job_update', job.as_dict())
+
+@app.route('/get_job_stats', methods=['GET'])
+def get_job_stats():
+    return jsonify(job_queue.stats())
+
 @app.route('/get_analysis', methods=['GET'])
 def get_analysis():
     try:
-        # Get analysis data
-        patterns = kg_system.analyze_patterns()
-        return jsonify(patterns)
+        # Get analysis data (cached until the graph is written to)
+        patterns, etag = kg_system.analyze_patterns_cached()
+        if request.if_none_match.contains(etag):
+            kg_system.patterns_cache.record_not_modified()
+            response = make_response('', 304)
+        else:
+            response = jsonify(patterns)
+        response.set_etag(etag)
+        # Let browsers keep the body but revalidate it on every poll
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/get_cache_stats', methods=['GET'])
+def get_cache_stats():
+    analysis_cache = kg_system.analyzer.cache
+    return jsonify({
+        'patterns': kg_system.patterns_cache.metrics(),
+        'analysis': analysis_cache.stats.as_dict() if analysis_cache is not None else None
+    })
+
+@app.route('/get_analysis_stats', methods=['GET'])
+def get_analysis_stats():
+    # How model responses were turned into analyses: valid, repaired, retried, partial, fallback
+    return jsonify(kg_system.analyzer.path_stats.as_dict())
+
+@app.route('/get_model_stats', methods=['GET'])
+def get_model_stats():
+    # Calls, retries, timeouts and circuit breaker state per model
+    return jsonify(model_client_stats())
+
+@app.route('/get_pool_stats', methods=['GET'])
+def get_pool_stats():
+    return jsonify(driver_stats())
+
 @app.route('/get_graph_data', methods=['GET'])
 def get_graph_data():
     try:
-        # Get all graph data
-        graph_data = kg_system.get_full_graph_data()
+        args = request.args
+        if any(key in args for key in GRAPH_PAGE_PARAMS):
+            try:
+                limit = int(args.get('limit', DEFAULT_GRAPH_PAGE_SIZE))
+            except ValueError:
+                return jsonify({'error': 'limit must be an integer'}), 400
+            # Paginated/filtered/delta view; page through with next_cursor
+            try:
+                graph_data = kg_system.get_graph_page(
+                    cursor=args.get('cursor'),
+                    limit=max(1, min(limit, MAX_GRAPH_PAGE_SIZE)),
+                    session_id=args.get('session_id'),
+                    labels=args.getlist('label') or None,
+                    since=args.get('since'),
+                    until=args.get('until')
+                )
+            except ValueError as e:
+                # A malformed cursor or an unknown label
+                return jsonify({'error': str(e)}), 400
+        else:
+            # Get all graph data
+            graph_data = kg_system.get_full_graph_data()
         
         return jsonify(graph_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def ndjson_graph_chunks(records, gzip_output: bool = False):
+    """Encode (kind, row) graph records as NDJSON chunks, gzipped on the fly
+
+    Every line is ``{"kind": "node"|"link", ...row}``; the stream ends with a
+    ``{"kind": "end", "nodes": n, "links": m}`` line, or an ``error`` line if
+    the query fails part way, so clients can tell a complete graph from a
+    truncated one.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip_output else None
+    counts = {'node': 0, 'link': 0}
+    buffer, buffered = [], 0
+
+    def encode(data: bytes, final: bool = False) -> bytes:
+        if compressor is None:
+            return data
+        # Sync-flush so every chunk can be decoded as soon as it arrives
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    try:
+        for kind, row in records:
+            counts[kind] += 1
+            line = json.dumps({'kind': kind, **row}, default=str).encode() + b'\n'
+            buffer.append(line)
+            buffered += len(line)
+            # The first record goes out alone for a fast first byte
+            if buffered >= STREAM_CHUNK_BYTES or counts['node'] + counts['link'] == 1:
+                yield encode(b''.join(buffer))
+                buffer, buffered = [], 0
+        trailer = {'kind': 'end', 'nodes': counts['node'], 'links': counts['link']}
+    except Exception as e:
+        logger.warning("Graph stream failed: %s", e)
+        trailer = {'kind': 'error', 'error': str(e)}
+
+    buffer.append(json.dumps(trailer).encode() + b'\n')
+    yield encode(b''.join(buffer), final=True)
+
+@app.route('/stream_graph_data', methods=['GET'])
+def stream_graph_data():
+    # Nodes first, then links, encoded while the Neo4j cursor is consumed
+    gzip_output = request.accept_encodings['gzip'] > 0
+    response = Response(ndjson_graph_chunks(kg_system.iter_graph_records(), gzip_output),
+                        mimetype='application/x-ndjson')
+    if gzip_output:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 if __name__ == '__main__':
-    app.run(debug=True, port=6969) 
\ No newline at end of file
+    # Development server only; production runs under gunicorn with
+    # gunicorn.conf.py (see README)
+    socketio.run(app, debug=os.getenv('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes'),
+                 port=int(os.getenv('PORT', 6969)), allow_unsafe_werkzeug=True) 
\ No newline at end of file
@@ -18,6 +18,64 @@ import DialogContent from '@mui/material/DialogContent';
 import DialogTitle from '@mui/material/DialogTitle';
 import { useTheme } from '@mui/material/styles';
 import { keyframes } from '@mui/system';
+import { io } from 'socket.io-client';
+
+const API_URL = 'http://localhost:6969';
+// Polling interval used alongside socket.io, in case the socket is down
+const JOB_POLL_MS = 3000;
+// Give up on a job after this long; the server's own request timeout is 120s
+const JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
+let jobSocket = null;
+
+// Resolves with the finished job from /process_message?async=1, taking
+// whichever comes first: a 'job_update' socket event or a /jobs/<id> poll.
+// The server only sends a job's updates to clients that sent 'watch_job'.
+// Rejects if the server no longer knows the job (404: evicted, or served by
+// another worker) or it has not finished within JOB_TIMEOUT_MS.
+function waitForJob(jobId) {
+  if (!jobSocket) {
+    jobSocket = io(API_URL);
+  }
+  return new Promise((resolve, reject) => {
+    let timer = null;
+    let deadline = null;
+    const stop = () => {
+      jobSocket.off('job_update', onUpdate);
+      clearInterval(timer);
+      clearTimeout(deadline);
+    };
+    const finish = (job) => {
+      if (job.status !== 'succeeded' && job.status !== 'failed') return;
+      stop();
+      resolve(job);
+    };
+    const fail = (error) => {
+      stop();
+      reject(error);
+    };
+    const onUpdate = (job) => {
+      if (job.job_id === jobId) finish(job);
+    };
+    jobSocket.on('job_update', onUpdate);
+    jobSocket.emit('watch_job', { job_id: jobId });
+    timer = setInterval(async () => {
+      try {
+        const response = await fetch(`${API_URL}/jobs/${jobId}`);
+        if (response.status === 404) {
+          fail(new Error('The server no longer knows this job'));
+        } else if (response.ok) {
+          finish(await response.json());
+        }
+      } catch (error) {
+        console.error('Error polling job:', error);
+      }
+    }, JOB_POLL_MS);
+    deadline = setTimeout(() => {
+      fail(new Error(`No result after ${JOB_TIMEOUT_MS / 1000}s`));
+    }, JOB_TIMEOUT_MS);
+  });
+}
 
 const scrollbarStyles = {
   '&::-webkit-scrollbar': {
@@ -326,8 +384,8 @@ function ChatPanel(props) {
     setInput('');
 
     try {
-      // Send to backend
-      const response = await fetch('http://localhost:6969/process_message', {
+      // Send to backend; it answers 202 with a job id and works in the background
+      const response = await fetch(`${API_URL}/process_message?async=1`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -335,7 +393,15 @@ function ChatPanel(props) {
         body: JSON.stringify({ message: input }),
       });
 
-      const data = await response.json();
+      const accepted = await response.json();
+      if (!response.ok) {
+        throw new Error(accepted.error || `HTTP ${response.status}`);
+      }
+      const job = await waitForJob(accepted.job_id);
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
+      const data = job.result;
       
       console.log('Backend response data:', data);
 
@@ -356,7 +422,7 @@ function ChatPanel(props) {
       console.log('Error details:', error);
       setMessages(prev => [...prev, { 
         role: 'assistant', 
-        content: 'Sorry, there was an error processing your message.' 
+        content: `Sorry, there was an error processing your message: ${error.message}`
       }]);
     }
   };
@@ -45,6 +45,47 @@ const PanelHeader = styled(Box)(({ theme }) => ({
   marginBottom: theme.spacing(2),
 }));
 
+// Read the NDJSON graph stream, publishing the graph as it grows.
+// Nodes arrive before links, so every published snapshot is consistent.
+const readGraphStream = async (response, onUpdate) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const nodes = [];
+  const links = [];
+  let buffered = '';
+  let complete = false;
+
+  const handleLine = (line) => {
+    if (!line) return;
+    const { kind, ...record } = JSON.parse(line);
+    if (kind === 'node') {
+      nodes.push(record);
+    } else if (kind === 'link') {
+      links.push(record);
+    } else if (kind === 'error') {
+      throw new Error(record.error);
+    } else if (kind === 'end') {
+      complete = true;
+    }
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.forEach(handleLine);
+    onUpdate({ nodes: [...nodes], links: [...links] });
+  }
+  handleLine(buffered + decoder.decode());
+
+  if (!complete) {
+    throw new Error('Graph stream ended early');
+  }
+  onUpdate({ nodes, links });
+};
+
 function GraphPanel(props) {
   const [graphData, setGraphData] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -66,9 +107,11 @@ function GraphPanel(props) {
     const fetchGraphData = async () => {
       setLoading(true);
       try {
-        const response = await fetch('http://localhost:6969/get_graph_data');
-        const data = await response.json();
-        setGraphData(data);
+        const response = await fetch('http://localhost:6969/stream_graph_data');
+        await readGraphStream(response, (data) => {
+          setGraphData(data);
+          setLoading(false);
+        });
       } catch (error) {
         console.error('Error fetching graph data:', error);
       }
@@ -0,0 +1,293 @@
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+FRIENDLI_URL = "https://api.friendli.ai/dedicated/v1/chat/completions"
+FRIENDLI_MODEL = "deprysc58e0mlvj"
+
+THINK_START = '<think>'
+THINK_END = '</think>'
+
+# Same boundaries as ThinkingAnalyzer._fallback_analysis: runs of . ! ?
+SENTENCE_END = re.compile(r'[.!?]+')
+
+
+def iter_sse_data(lines: Iterable[Any]) -> Iterator[str]:
+    """Data payloads of a server-sent event stream, up to a ``[DONE]`` payload"""
+    data: List[str] = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r')
+        if not line:
+            if data:
+                payload = "\n".join(data)
+                data = []
+                if payload == '[DONE]':
+                    return
+                yield payload
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if field == 'data':
+            data.append(value[1:] if value.startswith(' ') else value)
+    if data and "\n".join(data) != '[DONE]':
+        yield "\n".join(data)
+
+
+def iter_completion_tokens(lines: Iterable[Any]) -> Iterator[str]:
+    """Content deltas of an OpenAI-style streaming chat completion"""
+    for payload in iter_sse_data(lines):
+        event = json.loads(payload)
+        for choice in event.get('choices') or []:
+            content = (choice.get('delta') or {}).get('content')
+            if content:
+                yield content
+
+
+def stream_chat_completion(prompt: str, url: Optional[str] = None, token: Optional[str] = None,
+                           model: Optional[str] = None, max_tokens: int = 16384,
+                           top_p: float = 0.8, timeout: float = 300) -> Iterator[str]:
+    """Tokens of a chat completion as the inference endpoint produces them
+
+    Uses the same endpoint and payload as agents/deepseek.py with
+    ``stream`` enabled. ``FRIENDLI_URL`` overrides the endpoint, e.g. to
+    point at benchmarks/mock_sse_server.py.
+    """
+    url = url or os.getenv('FRIENDLI_URL', FRIENDLI_URL)
+    token = token or os.getenv('FRIENDLI_API_TOKEN')
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = "Bearer " + token
+    payload = {
+        "model": model or os.getenv('FRIENDLI_MODEL', FRIENDLI_MODEL),
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "top_p": top_p,
+        "stream": True
+    }
+    with requests.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        yield from iter_completion_tokens(response.iter_lines(decode_unicode=True))
+
+
+def _partial_suffix(text: str, marker: str) -> int:
+    """Length of the longest suffix of ``text`` that is a proper prefix of ``marker``"""
+    for size in range(min(len(marker) - 1, len(text)), 0, -1):
+        if marker.startswith(text[-size:]):
+            return size
+    return 0
+
+
+class ThoughtSegmenter:
+    """Cuts streamed tokens into completed sentences.
+
+    Sentences are the ones ``_fallback_analysis`` finds in the finished
+    text. A sentence is emitted once the run of terminators after it has
+    ended. Text after ``</think>`` is the answer and is kept in
+    ``response_text``.
+    """
+
+    def __init__(self):
+        self.in_response = False
+        self._started = False
+        self._buffer = ''
+        self._pending = ''
+        self._thinking: List[str] = []
+        self._response: List[str] = []
+
+    @property
+    def thinking_text(self) -> str:
+        return ''.join(self._thinking).strip()
+
+    @property
+    def response_text(self) -> str:
+        return ''.join(self._response).strip()
+
+    def feed(self, token: str) -> List[str]:
+        """Add a token and return the sentences it completed"""
+        if self.in_response:
+            self._response.append(token)
+            return []
+
+        self._buffer += token
+        if not self._started:
+            # Drop an opening <think> tag once it can be told apart from text
+            stripped = self._buffer.lstrip()
+            if len(stripped) < len(THINK_START) and THINK_START.startswith(stripped):
+                return []
+            if stripped.startswith(THINK_START):
+                self._buffer = stripped[len(THINK_START):]
+            self._started = True
+
+        end = self._buffer.find(THINK_END)
+        if end >= 0:
+            text = self._buffer[:end]
+            self._response.append(self._buffer[end + len(THINK_END):])
+            self._buffer = ''
+            self.in_response = True
+            return self._consume(text, final=True)
+
+        # Hold back what could be the start of </think>
+        held = _partial_suffix(self._buffer, THINK_END)
+        text = self._buffer[:len(self._buffer) - held]
+        self._buffer = self._buffer[len(text):]
+        return self._consume(text, final=False)
+
+    def finish(self) -> List[str]:
+        """Sentences left when the stream ends"""
+        if self.in_response:
+            return []
+        text, self._buffer = self._buffer, ''
+        return self._consume(text, final=True)
+
+    def _consume(self, text: str, final: bool) -> List[str]:
+        self._thinking.append(text)
+        self._pending += text
+        if final:
+            complete, self._pending = self._pending, ''
+        else:
+            # A terminator run touching the end may still grow ("..")
+            cut = 0
+            for match in SENTENCE_END.finditer(self._pending):
+                if match.end() < len(self._pending):
+                    cut = match.end()
+            complete, self._pending = self._pending[:cut], self._pending[cut:]
+        return [sentence.strip() for sentence in SENTENCE_END.split(complete) if sentence.strip()]
+
+
+@dataclass
+class StreamingReport:
+    """What a streamed session wrote, and how soon"""
+    session_id: str
+    thinking_text: str = ""
+    response_text: str = ""
+    thoughts_streamed: int = 0
+    appends: int = 0
+    first_append_seconds: Optional[float] = None
+    stream_seconds: float = 0.0
+    refined: bool = False
+    refine_error: Optional[str] = None
+    raw_llm_response: str = ""
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'thoughts_streamed': self.thoughts_streamed,
+            'appends': self.appends,
+            'first_append_seconds': self.first_append_seconds,
+            'stream_seconds': self.stream_seconds,
+            'refined': self.refined,
+            'refine_error': self.refine_error
+        }
+
+
+class StreamingIngestor:
+    """Appends thoughts to a live graph session while the model is generating.
+
+    Every completed sentence gets the regex analysis of
+    ``ThinkingAnalyzer._fallback_analysis`` and is appended to the session
+    once ``flush_every`` of them are waiting. When the stream ends, the full
+    thinking text is analyzed by the model and overwrites the provisional
+    session (unless ``refine`` is off):
+
+        ingestor = StreamingIngestor(kg)
+        report = ingestor.ingest(stream_chat_completion(prompt))
+    """
+
+    def __init__(self, kg, session_id: Optional[str] = None, flush_every: int = 1, refine: bool = True):
+        self.kg = kg
+        self.session_id = session_id or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.flush_every = max(1, flush_every)
+        self.refine = refine
+        self.segmenter = ThoughtSegmenter()
+        self.report = StreamingReport(session_id=self.session_id)
+        self._pending: List[Dict[str, Any]] = []
+        self._next_index = 0
+        self._started_at: Optional[float] = None
+
+    def feed(self, token: str):
+        """Add one token, appending thoughts it completes"""
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        self._add(self.segmenter.feed(token))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append the waiting thoughts to the session"""
+        if not self._pending:
+            return
+        thoughts, self._pending = self._pending, []
+        self._next_index = self.kg.kg_builder.append_thoughts(
+            self.session_id, thoughts, self._next_index, self.segmenter.thinking_text
+        )
+        self.report.appends += 1
+        self.report.thoughts_streamed += len(thoughts)
+        if self.report.first_append_seconds is None:
+            self.report.first_append_seconds = time.perf_counter() - self._started_at
+
+    def finish(self) -> StreamingReport:
+        """Append what is left, then run the refinement pass"""
+        self._add(self.segmenter.finish())
+        self.flush()
+        report = self.report
+        report.thinking_text = self.segmenter.thinking_text
+        report.response_text = self.segmenter.response_text
+        if self._started_at is not None:
+            report.stream_seconds = time.perf_counter() - self._started_at
+
+        if self.refine and report.thinking_text:
+            try:
+                report.raw_llm_response = self.kg.process_thinking(
+                    report.thinking_text, self.session_id, overwrite=True
+                ).raw_llm_response
+                report.refined = True
+            except Exception as e:
+                # The streamed session stays in the graph as it is
+                logger.warning("Refinement of %s failed: %s", self.session_id, e)
+                report.refine_error = str(e)
+        return report
+
+    def ingest(self, tokens: Iterable[str]) -> StreamingReport:
+        """Feed a whole token stream and finish"""
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        for token in tokens:
+            self.feed(token)
+        return self.finish()
+
+    def _add(self, sentences: List[str]):
+        analyzer = self.kg.analyzer
+        self._pending.extend(analyzer._fallback_thought(sentence) for sentence in sentences)
+
+
+def main():
+    from log_config import configure_logging
+    from main import AgentThinkingKG
+
+    configure_logging()
+    kg_system = AgentThinkingKG()
+    try:
+        prompt = input(":")
+        ingestor = StreamingIngestor(kg_system)
+        report = ingestor.ingest(stream_chat_completion(prompt))
+        print("Thoughts:\n", report.thinking_text)
+        print("\nResponse:\n", report.response_text)
+        print("\nStreaming:", json.dumps(report.as_dict(), indent=2))
+    finally:
+        kg_system.close()
+
+
+if __name__ == "__main__":
+    main()
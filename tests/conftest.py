@@ -0,0 +1,6 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# main.py and analyzer.py refuse to import without a key; these tests never call Gemini
+os.environ.setdefault('GEMINI_API_KEY', 'unused-by-tests')
@@ -0,0 +1,141 @@
+import time
+
+from analysis_cache import AnalysisCache, make_cache_key, normalize_text
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text("  I will\n\ncheck   the\tweather ") == "I will check the weather"
+
+
+def test_cache_key_ignores_formatting_only():
+    key = make_cache_key("check the weather", "v1", "gemini")
+    assert make_cache_key("check  the\nweather ", "v1", "gemini") == key
+    assert make_cache_key("check the weather!", "v1", "gemini") != key
+
+
+def test_cache_key_includes_prompt_version_and_model():
+    key = make_cache_key("check the weather", "v1", "gemini")
+    assert make_cache_key("check the weather", "v2", "gemini") != key
+    assert make_cache_key("check the weather", "v1", "other-model") != key
+
+
+def test_cache_key_parts_do_not_run_together():
+    assert make_cache_key("b", "a", "m") != make_cache_key("", "ab", "m")
+
+
+def test_memory_hit_and_miss_counts():
+    cache = AnalysisCache()
+    assert cache.get("k") is None
+    cache.set("k", {"thoughts": []}, "raw")
+    assert cache.get("k") == ({"thoughts": []}, "raw")
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.memory_hits) == (1, 1, 1)
+
+
+def test_memory_layer_evicts_least_recently_used():
+    cache = AnalysisCache(max_memory_entries=2)
+    cache.set("a", {}, "a")
+    cache.set("b", {}, "b")
+    cache.get("a")
+    cache.set("c", {}, "c")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = AnalysisCache(ttl_seconds=0.01)
+    cache.set("k", {}, "raw")
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.stats.expirations == 1
+
+
+def test_disk_layer_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(path)
+    cache.set("k", {"domain": "weather"}, "raw")
+    cache.close()
+
+    reopened = AnalysisCache(path)
+    assert reopened.get("k") == ({"domain": "weather"}, "raw")
+    assert reopened.stats.disk_hits == 1
+    reopened.close()
+
+
+class CountingModel:
+    """Answers every prompt with the same analysis, or fails if told to"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("bad request")
+        text = ('{"thoughts": [{"content": "check the weather", "type": "action", "entities": [], '
+                '"tools_mentioned": [], "confidence": 0.9}], "relationships": [], '
+                '"reasoning_strategy": "direct", "domain": "weather", "success_indicators": []}')
+        return type('Response', (), {'text': text})()
+
+
+def test_analyzer_reuses_cached_analysis_for_reformatted_text():
+    from main import ThinkingAnalyzer
+
+    analyzer = ThinkingAnalyzer(cache=AnalysisCache(), chunk_chars=0)
+    analyzer.model = CountingModel()
+    first = analyzer.analyze_thinking_text("I will check the weather.")
+    second = analyzer.analyze_thinking_text("I will  check the weather.\n")
+    assert second == first
+    assert analyzer.model.calls == 1
+
+
+def test_analyzer_does_not_cache_fallback_analyses():
+    from main import ThinkingAnalyzer
+
+    analyzer = ThinkingAnalyzer(cache=AnalysisCache(), chunk_chars=0)
+    analyzer.model = CountingModel(fail=True)
+    analysis, raw = analyzer.analyze_thinking_text("I will check the weather.")
+    assert raw == "" and analysis['thoughts']
+    analyzer.analyze_thinking_text("I will check the weather.")
+    assert analyzer.model.calls == 2
+
+
+def test_patterns_cache_recomputes_only_on_version_change():
+    from analysis_cache import PatternsCache
+
+    cache = PatternsCache()
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return {'reasoning_patterns': [{'strategy': 'direct', 'frequency': len(computed)}]}
+
+    result, etag = cache.get_or_compute("epoch:1", compute)
+    assert cache.get_or_compute("epoch:1", compute) == (result, etag)
+    assert len(computed) == 1
+
+    changed, changed_etag = cache.get_or_compute("epoch:2", compute)
+    assert len(computed) == 2
+    assert changed_etag != etag
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_patterns_cache_etag_depends_only_on_content():
+    from analysis_cache import PatternsCache
+
+    cache = PatternsCache()
+    _, etag = cache.get_or_compute("epoch:1", lambda: {'a': 1})
+    _, same = cache.get_or_compute("epoch:2", lambda: {'a': 1})
+    assert same == etag
+
+
+def test_patterns_cache_ttl_bounds_staleness():
+    from analysis_cache import PatternsCache
+
+    cache = PatternsCache(ttl_seconds=0.01)
+    cache.get_or_compute("epoch:1", lambda: {'a': 1})
+    time.sleep(0.02)
+    result, _ = cache.get_or_compute("epoch:1", lambda: {'a': 2})
+    assert result == {'a': 2}
+    assert cache.stats.expirations == 1
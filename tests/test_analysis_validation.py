@@ -0,0 +1,165 @@
+import json
+
+import pytest
+
+from analysis_validation import (ANALYSIS_SCHEMA, ANALYSIS_VALIDATOR, DEFAULT_CONFIDENCE, DEFAULT_STRENGTH,
+                                 DEFAULT_THOUGHT_TYPE, AnalysisParseError, AnalysisPathStats, compile_schema,
+                                 is_valid_analysis, parse_analysis, repair_analysis, strip_fences)
+
+
+def thought(content, **overrides):
+    return {'content': content, 'type': 'analysis', 'entities': ['weather'], 'tools_mentioned': [],
+            'confidence': 0.9, **overrides}
+
+
+def analysis(contents=('Check the forecast', 'Answer the user'), relationships=((0, 1, 'leads_to'),)):
+    return {
+        'thoughts': [thought(content) for content in contents],
+        'relationships': [{'source_thought': s, 'target_thought': t, 'relationship': r, 'strength': 0.9}
+                          for s, t, r in relationships],
+        'reasoning_strategy': 'step_by_step',
+        'domain': 'weather',
+        'success_indicators': ['answered']
+    }
+
+
+def test_strip_fences_handles_closed_and_unclosed_fences_and_prose():
+    assert strip_fences('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_fences('```json\n{"a": 1') == '{"a": 1'
+    assert strip_fences('Here you go: {"a": 1}') == '{"a": 1}'
+    assert strip_fences('  {"a": 1}  ') == '{"a": 1}'
+
+
+@pytest.mark.parametrize('value', [
+    analysis(),
+    analysis(contents=('Only thought',), relationships=()),
+    {**analysis(), 'extra': 'kept'},
+])
+def test_compiled_schema_accepts_what_jsonschema_accepts(value):
+    assert is_valid_analysis(value) and ANALYSIS_VALIDATOR.is_valid(value)
+
+
+@pytest.mark.parametrize('value', [
+    [],
+    {**analysis(), 'thoughts': []},
+    {key: value for key, value in analysis().items() if key != 'domain'},
+    {**analysis(), 'thoughts': [thought('')]},
+    {**analysis(), 'thoughts': [thought('x', confidence=1.5)]},
+    {**analysis(), 'thoughts': [thought('x', confidence=True)]},
+    {**analysis(), 'relationships': [{'source_thought': -1, 'target_thought': 0,
+                                      'relationship': 'leads_to', 'strength': 0.5}]},
+])
+def test_compiled_schema_rejects_what_jsonschema_rejects(value):
+    assert not is_valid_analysis(value) and not ANALYSIS_VALIDATOR.is_valid(value)
+
+
+def test_compile_schema_refuses_unsupported_keywords():
+    with pytest.raises(ValueError, match='pattern'):
+        compile_schema({'type': 'string', 'pattern': '^a'})
+    assert compile_schema(ANALYSIS_SCHEMA)(analysis())
+
+
+def test_parse_analysis_valid_response_is_returned_as_is():
+    data = analysis()
+    parsed = parse_analysis(json.dumps(data))
+    assert parsed.path == 'valid'
+    assert parsed.complete
+    assert parsed.repairs == []
+    assert parsed.analysis == data
+
+
+def test_parse_analysis_strips_fence_without_counting_a_repair():
+    parsed = parse_analysis('```json\n' + json.dumps(analysis()) + '\n```')
+    assert parsed.path == 'valid'
+
+
+def test_parse_analysis_repairs_prose_after_the_object():
+    parsed = parse_analysis(json.dumps(analysis()) + '\nHope this helps!')
+    assert parsed.path == 'repaired'
+    assert parsed.repairs == ['trailing_text']
+    assert parsed.analysis == analysis()
+
+
+def test_parse_analysis_repairs_trailing_commas():
+    text = json.dumps(analysis()).replace(']', ', ]').replace('}', ', }')
+    parsed = parse_analysis(text)
+    assert parsed.path == 'repaired'
+    assert parsed.repairs == ['trailing_commas']
+    assert parsed.analysis == analysis()
+
+
+def test_parse_analysis_fills_missing_fields_with_defaults():
+    data = {'thoughts': [{'content': 'Check the forecast', 'confidence': 'high'},
+                         {'content': 'Answer', 'entities': 'weather'}],
+            'relationships': [{'source_thought': 0, 'target_thought': 1, 'relationship': 'leads_to'}]}
+    parsed = parse_analysis(json.dumps(data))
+
+    assert parsed.path == 'repaired'
+    assert parsed.repairs == ['schema']
+    assert parsed.complete
+    first, second = parsed.analysis['thoughts']
+    assert first['type'] == DEFAULT_THOUGHT_TYPE
+    assert first['confidence'] == DEFAULT_CONFIDENCE
+    assert second['entities'] == ['weather']
+    assert parsed.analysis['relationships'][0]['strength'] == DEFAULT_STRENGTH
+    assert parsed.analysis['reasoning_strategy'] == 'sequential'
+    assert parsed.analysis['domain'] == 'general'
+    assert is_valid_analysis(parsed.analysis)
+
+
+def test_parse_analysis_renumbers_relationships_around_dropped_thoughts():
+    data = analysis(contents=('First', '', 'Third'), relationships=((0, 2, 'supports'), (0, 1, 'leads_to'),
+                                                                     (2, 7, 'leads_to')))
+    parsed = parse_analysis(json.dumps(data))
+    assert [t['content'] for t in parsed.analysis['thoughts']] == ['First', 'Third']
+    assert [(r['source_thought'], r['target_thought'], r['relationship'])
+            for r in parsed.analysis['relationships']] == [(0, 1, 'supports')]
+
+
+def test_parse_analysis_truncated_in_thoughts_is_incomplete_and_chained():
+    text = json.dumps(analysis(contents=('First', 'Second', 'Third')))
+    cut = text[:text.index('Third') + 3]
+    parsed = parse_analysis(cut)
+
+    assert parsed.path == 'repaired'
+    assert not parsed.complete
+    assert 'truncated' in parsed.repairs
+    # The half-written last thought is dropped rather than kept as "Thi"
+    assert [t['content'] for t in parsed.analysis['thoughts']] == ['First', 'Second']
+    assert [(r['source_thought'], r['target_thought'], r['relationship'])
+            for r in parsed.analysis['relationships']] == [(0, 1, 'leads_to')]
+
+
+def test_parse_analysis_truncated_after_thoughts_is_complete():
+    text = json.dumps(analysis())
+    cut = text[:text.index('"reasoning_strategy"') - 2]
+    parsed = parse_analysis(cut)
+    assert parsed.complete
+    assert len(parsed.analysis['thoughts']) == 2
+    assert parsed.analysis['relationships'][0]['relationship'] == 'leads_to'
+
+
+@pytest.mark.parametrize('raw', ['', 'no json here', '[1, 2, 3]', '{"thoughts": []}', '{"thoughts": [{"content": ""}]}'])
+def test_parse_analysis_raises_when_nothing_is_usable(raw):
+    with pytest.raises(AnalysisParseError):
+        parse_analysis(raw)
+
+
+def test_repair_analysis_rejects_non_objects():
+    with pytest.raises(AnalysisParseError, match='list'):
+        repair_analysis([analysis()])
+
+
+def test_path_stats_counts_paths_and_fallback_rate():
+    stats = AnalysisPathStats()
+    assert stats.as_dict()['fallback_rate'] == 0.0
+
+    for path in ('valid', 'valid', 'repaired', 'fallback'):
+        stats.record(path)
+    stats.record_retry_call()
+
+    counts = stats.as_dict()
+    assert counts['valid'] == 2
+    assert counts['total'] == 4
+    assert counts['retry_calls'] == 1
+    assert counts['fallback_rate'] == 0.25
@@ -0,0 +1,90 @@
+import pytest
+
+from chunking import TraceChunk, merge_chunk_analyses, split_trace
+
+
+def thought(content):
+    return {'content': content, 'type': 'analysis', 'entities': [], 'tools_mentioned': [], 'confidence': 0.8}
+
+
+def analysis(contents, relationships=(), strategy='step_by_step', domain='weather', indicators=()):
+    return {
+        'thoughts': [thought(content) for content in contents],
+        'relationships': [{'source_thought': s, 'target_thought': t, 'relationship': r, 'strength': 0.9}
+                          for s, t, r in relationships],
+        'reasoning_strategy': strategy,
+        'domain': domain,
+        'success_indicators': list(indicators)
+    }
+
+
+def edges(merged):
+    return [(r['source_thought'], r['target_thought'], r['relationship']) for r in merged['relationships']]
+
+
+def test_split_trace_keeps_short_text_whole():
+    text = "First I check the weather.\n\nThen I answer."
+    assert [chunk.text for chunk in split_trace(text, max_chars=100)] == [text]
+
+
+def test_split_trace_respects_max_chars_and_covers_the_text():
+    paragraphs = [f"Paragraph {i} says something about step {i}." for i in range(40)]
+    text = "\n\n".join(paragraphs)
+    chunks = split_trace(text, max_chars=200, overlap_chars=60)
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 200 for chunk in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # The first `overlap` characters repeat the end of the previous chunk; new text starts after it
+        assert previous.start < chunk.start <= previous.end
+        assert chunk.start + chunk.overlap >= previous.end
+        assert chunk.text == text[chunk.start:chunk.end]
+
+
+def test_split_trace_cuts_oversized_sentences():
+    chunks = split_trace("x" * 250, max_chars=100, overlap_chars=0)
+    assert [len(chunk.text) for chunk in chunks] == [100, 100, 50]
+
+
+def test_split_trace_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        split_trace("text", max_chars=0)
+
+
+def test_merge_folds_overlapping_thoughts_and_keeps_global_indices():
+    chunks = [TraceChunk(0, 0, 100, 0, ""), TraceChunk(1, 80, 200, 20, "")]
+    merged = merge_chunk_analyses(chunks, [
+        analysis(["Check the forecast for Paris", "Compare it with yesterday"], [(0, 1, 'leads_to')]),
+        analysis(["Compare it with yesterday", "Answer the user"], [(0, 1, 'supports')]),
+    ])
+    assert [t['content'] for t in merged['thoughts']] == [
+        "Check the forecast for Paris", "Compare it with yesterday", "Answer the user"
+    ]
+    # The second chunk's edge from the folded thought crosses the boundary, so no extra leads_to
+    assert edges(merged) == [(0, 1, 'leads_to'), (1, 2, 'supports')]
+
+
+def test_merge_links_chunks_without_overlap():
+    chunks = [TraceChunk(0, 0, 100, 0, ""), TraceChunk(1, 100, 200, 0, "")]
+    merged = merge_chunk_analyses(chunks, [
+        analysis(["Check the forecast"]),
+        analysis(["Answer the user", "Say goodbye"], [(0, 1, 'leads_to')]),
+    ])
+    assert len(merged['thoughts']) == 3
+    assert edges(merged) == [(1, 2, 'leads_to'), (0, 1, 'leads_to')]
+
+
+def test_merge_drops_relationships_to_unknown_thoughts():
+    chunks = [TraceChunk(0, 0, 100, 0, "")]
+    merged = merge_chunk_analyses(chunks, [analysis(["Only thought"], [(0, 5, 'leads_to'), (0, 0, 'leads_to')])])
+    assert merged['relationships'] == []
+
+
+def test_merge_takes_majority_strategy_and_unions_indicators():
+    chunks = [TraceChunk(0, 0, 100, 0, ""), TraceChunk(1, 100, 200, 0, "")]
+    merged = merge_chunk_analyses(chunks, [
+        analysis(["One"], strategy='direct', indicators=['answered']),
+        analysis(["Two", "Three", "Four"], strategy='exploratory', indicators=['answered', 'verified']),
+    ])
+    assert merged['reasoning_strategy'] == 'exploratory'
+    assert merged['success_indicators'] == ['answered', 'verified']
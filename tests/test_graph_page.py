@@ -0,0 +1,37 @@
+import pytest
+
+from main import GRAPH_PAGE_KEYS, decode_graph_cursor, encode_graph_cursor, graph_page_query
+
+
+def test_graph_cursor_round_trips_keys_with_any_characters():
+    cursor = encode_graph_cursor('Entity', '2026-10-17T08:13:48.123456789Z', 'weather:api/"v2"')
+    assert decode_graph_cursor(cursor) == ('Entity', '2026-10-17T08:13:48.123456789Z', 'weather:api/"v2"')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    'bm90IGpzb24=',
+    encode_graph_cursor('Secret', '2026-10-17T00:00:00Z', 'x'),
+    encode_graph_cursor('Tool', 42, 'x'),
+])
+def test_decode_graph_cursor_rejects_anything_else(cursor):
+    with pytest.raises(ValueError, match='Invalid graph cursor'):
+        decode_graph_cursor(cursor)
+
+
+@pytest.mark.parametrize('label', sorted(GRAPH_PAGE_KEYS))
+def test_graph_page_query_orders_by_the_indexed_time_and_key(label):
+    time_key, key = GRAPH_PAGE_KEYS[label]
+    query = graph_page_query(label, after=True, since='2026-10-17T00:00:00Z')
+
+    assert f"MATCH (n:{label})" in query
+    assert f"ORDER BY n.{time_key}, n.{key}" in query
+    assert f"n.{time_key} >= datetime($after_time)" in query
+    assert f"n.{time_key} > datetime($since)" in query
+    assert 'elementId(n) >' not in query
+
+
+def test_graph_page_query_without_cursor_or_window_has_no_range():
+    query = graph_page_query('Thought')
+    assert '$after_time' not in query
+    assert '$since' not in query and '$until' not in query
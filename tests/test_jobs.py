@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobQueue, QueueFull
+
+
+def wait_done(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.done:
+            return job
+        time.sleep(0.005)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_succeeds_with_result_and_timestamps():
+    queue = JobQueue(max_workers=1)
+    job = queue.submit(lambda: {'answer': 42})
+    assert job.status == 'queued'
+
+    finished = wait_done(queue, job.id)
+    assert finished.status == 'succeeded'
+    assert finished.result == {'answer': 42}
+    assert finished.submitted_at <= finished.started_at <= finished.finished_at
+    queue.shutdown()
+
+
+def test_job_failure_records_error():
+    queue = JobQueue(max_workers=1)
+
+    def work():
+        raise RuntimeError("no model")
+
+    finished = wait_done(queue, queue.submit(work).id)
+    assert finished.status == 'failed'
+    assert finished.error == "no model"
+    assert finished.result is None and finished.finished_at is not None
+    queue.shutdown()
+
+
+def test_submit_rejects_when_max_pending_reached():
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_pending=2)
+    jobs = [queue.submit(lambda: release.wait(5) and {}) for _ in range(2)]
+    with pytest.raises(QueueFull):
+        queue.submit(lambda: {})
+    assert queue.stats()['rejected'] == 1
+
+    release.set()
+    for job in jobs:
+        wait_done(queue, job.id)
+    # Finished jobs free their slots
+    wait_done(queue, queue.submit(lambda: {}).id)
+    queue.shutdown()
+
+
+def test_finished_jobs_expire_but_running_jobs_stay():
+    release = threading.Event()
+    queue = JobQueue(max_workers=2, result_ttl_seconds=0.01)
+    finished = wait_done(queue, queue.submit(lambda: {}).id)
+    running = queue.submit(lambda: release.wait(5) and {})
+    time.sleep(0.02)
+
+    assert queue.get(finished.id) is None
+    assert queue.get(running.id) is not None
+    release.set()
+    queue.shutdown()
+
+
+def test_max_finished_evicts_oldest_first():
+    queue = JobQueue(max_workers=1, max_finished=2)
+    ids = [wait_done(queue, queue.submit(lambda: {}).id).id for _ in range(3)]
+    queue.get(ids[-1])  # eviction runs on access
+    assert [queue.get(job_id) is not None for job_id in ids] == [False, True, True]
+    queue.shutdown()
+
+
+def test_get_returns_consistent_snapshots_under_concurrency():
+    queue = JobQueue(max_workers=4, result_ttl_seconds=0.001)
+    ids = [queue.submit(lambda: {}).id for _ in range(50)]
+    torn = []
+
+    def poll():
+        for _ in range(300):
+            for job_id in ids:
+                job = queue.get(job_id)
+                if job is not None and job.done and job.finished_at is None:
+                    torn.append(job)
+
+    pollers = [threading.Thread(target=poll) for _ in range(3)]
+    for poller in pollers:
+        poller.start()
+    for poller in pollers:
+        poller.join()
+    queue.shutdown()
+    assert torn == []
+
+
+def test_on_update_sees_start_and_finish_and_its_errors_are_contained():
+    seen = []
+
+    def on_update(job):
+        seen.append(job.status)
+        raise RuntimeError("socket down")
+
+    queue = JobQueue(max_workers=1, on_update=on_update)
+    finished = wait_done(queue, queue.submit(lambda: {}).id)
+    queue.shutdown()
+    assert finished.status == 'succeeded'
+    assert seen == ['running', 'succeeded']
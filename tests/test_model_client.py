@@ -0,0 +1,295 @@
+import asyncio
+import threading
+
+import pytest
+
+from model_client import (CircuitBreaker, CircuitOpen, ModelBusy, ModelClient, ModelClientSettings,
+                          ModelDeadlineExceeded, ModelUnavailable, RateLimited, TokenBucket, is_retryable)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class StatusError(Exception):
+    """Stands in for a google.api_core error carrying an HTTP status"""
+
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class ScriptedModel:
+    """Raises or returns the scripted outcomes in order, then returns 'ok'"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 'ok'
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def settings(**overrides):
+    return ModelClientSettings(**{'timeout_seconds': 1.0, 'max_attempts': 3, 'backoff_seconds': 0.0,
+                                  'backoff_max_seconds': 0.0, 'breaker_threshold': 2, **overrides})
+
+
+def test_is_retryable_covers_timeouts_and_retryable_statuses_only():
+    assert is_retryable(TimeoutError())
+    assert is_retryable(ConnectionError())
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError('bad prompt'))
+    assert not is_retryable(CircuitOpen())
+    assert not is_retryable(RateLimited())
+    assert not is_retryable(ModelBusy())
+
+
+def test_token_bucket_spends_the_burst_then_queues_callers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert bucket.reserve(max_wait=10) == 0.0
+    assert bucket.reserve(max_wait=10) == 0.0
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.5)
+    # Each reservation pushes the next caller further back
+    assert bucket.reserve(max_wait=10) == pytest.approx(1.0)
+
+    clock.advance(1.0)
+    assert bucket.reserve(max_wait=10) == pytest.approx(0.5)
+
+
+def test_token_bucket_refuses_waits_beyond_max_wait_without_taking_a_token():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=1, clock=clock)
+    assert bucket.reserve(max_wait=0) == 0.0
+
+    assert bucket.reserve(max_wait=0.5) is None
+    assert bucket.reserve(max_wait=0.5) is None
+    assert bucket.reserve(max_wait=1.0) == pytest.approx(1.0)
+
+
+def test_token_bucket_with_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert all(bucket.reserve(max_wait=0) == 0.0 for _ in range(100))
+
+
+def test_circuit_breaker_opens_at_threshold_and_probes_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=3, reset_seconds=30, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+
+    clock.advance(30)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_circuit_breaker_failed_probe_reopens_for_another_reset_period():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.times_opened == 2
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+
+def test_circuit_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=30, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_circuit_breaker_abandoned_probe_lets_another_call_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_seconds=30, clock=clock)
+    breaker.abandon_probe()
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.abandon_probe()
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+
+
+def test_client_retries_retryable_errors_then_succeeds():
+    model = ScriptedModel(StatusError(429), TimeoutError(), 'answer')
+    client = ModelClient(model, settings(breaker_threshold=5), name='test')
+
+    assert client.generate_content('prompt') == 'answer'
+    stats = client.stats()
+    assert model.calls == 3
+    assert stats['retries'] == 2
+    assert stats['succeeded'] == 1
+    assert stats['breaker'] == 'closed'
+
+
+def test_client_propagates_non_retryable_errors_unchanged():
+    model = ScriptedModel(StatusError(400))
+    client = ModelClient(model, settings(), name='test')
+
+    with pytest.raises(StatusError):
+        client.generate_content('prompt')
+    assert model.calls == 1
+    assert client.stats()['unavailable'] == 0
+
+
+def test_client_wraps_exhausted_retries_in_model_unavailable():
+    model = ScriptedModel(*[StatusError(503)] * 3)
+    client = ModelClient(model, settings(breaker_threshold=5), name='test')
+
+    with pytest.raises(ModelUnavailable) as raised:
+        client.generate_content('prompt')
+    assert isinstance(raised.value.__cause__, StatusError)
+    assert model.calls == 3
+    assert client.stats()['unavailable'] == 1
+
+
+def test_client_short_circuits_once_the_breaker_opens():
+    model = ScriptedModel(*[StatusError(503)] * 3)
+    client = ModelClient(model, settings(), name='test')
+
+    with pytest.raises(CircuitOpen):
+        client.generate_content('prompt')
+    assert model.calls == 2
+    stats = client.stats()
+    assert stats['breaker'] == 'open'
+    assert stats['short_circuited'] == 1
+
+    with pytest.raises(CircuitOpen):
+        client.generate_content('prompt')
+    assert model.calls == 2
+
+
+def test_client_deadline_raises_model_deadline_exceeded():
+    release = threading.Event()
+
+    class SlowModel:
+        def generate_content(self, prompt, **kwargs):
+            release.wait(5)
+            return 'late'
+
+    client = ModelClient(SlowModel(), settings(timeout_seconds=0.05, max_attempts=1), name='test')
+    try:
+        with pytest.raises(ModelDeadlineExceeded):
+            client.generate_content('prompt')
+        assert client.stats()['timeouts'] == 1
+    finally:
+        release.set()
+
+
+def test_client_saturation_raises_model_busy_without_tripping_the_breaker():
+    started, release = threading.Event(), threading.Event()
+
+    class BlockingModel:
+        def generate_content(self, prompt, **kwargs):
+            started.set()
+            release.wait(5)
+            return 'done'
+
+    client = ModelClient(BlockingModel(), settings(timeout_seconds=0.2, max_attempts=1, max_concurrency=1,
+                                                   breaker_threshold=2), name='test')
+    try:
+        with pytest.raises(ModelDeadlineExceeded):
+            client.generate_content('a')
+        assert started.is_set()
+        # The abandoned call still holds the only slot
+        with pytest.raises(ModelBusy):
+            client.generate_content('b')
+        stats = client.stats()
+        assert stats['saturated'] == 1
+        # One timeout counts against the threshold of two; the busy call does not
+        assert stats['breaker'] == 'closed'
+    finally:
+        release.set()
+
+
+def test_client_rate_limit_beyond_the_deadline_raises_rate_limited():
+    client = ModelClient(ScriptedModel(), settings(rate_per_second=0.1, burst=1), name='test')
+
+    assert client.generate_content('prompt') == 'ok'
+    with pytest.raises(RateLimited):
+        client.generate_content('prompt')
+    assert client.stats()['rate_limited'] == 1
+
+
+def test_rate_limited_probe_does_not_keep_the_breaker_half_open():
+    clock = FakeClock()
+    client = ModelClient(ScriptedModel(), settings(rate_per_second=0.1, burst=1), name='test')
+    client.bucket = TokenBucket(rate=0.1, capacity=1, clock=clock)
+    client.breaker = CircuitBreaker(threshold=1, reset_seconds=30, clock=clock)
+    client.breaker.record_failure()
+    clock.advance(30)
+    assert client.bucket.reserve(max_wait=0) == 0.0
+
+    with pytest.raises(RateLimited):
+        client.generate_content('probe')
+    assert client.breaker.state == 'half_open'
+
+    clock.advance(10)
+    assert client.generate_content('probe') == 'ok'
+    assert client.breaker.state == 'closed'
+
+
+def test_cancelled_async_probe_lets_another_call_probe():
+    started = asyncio.Event()
+
+    class HangingModel:
+        async def generate_content_async(self, prompt, **kwargs):
+            started.set()
+            await asyncio.sleep(60)
+
+    clock = FakeClock()
+    client = ModelClient(HangingModel(), settings(timeout_seconds=30), name='test')
+    client.breaker = CircuitBreaker(threshold=1, reset_seconds=30, clock=clock)
+    client.breaker.record_failure()
+    clock.advance(30)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(client.generate_content_async('probe'))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert client.breaker.state == 'half_open'
+    assert client.breaker.allow()